@@ -0,0 +1,389 @@
+"""Benchmarks of client throughput, latency and memory, against a local fake server,
+with machine-readable results for comparison between versions."""
+
+import json
+import multiprocessing as mp
+import os
+import platform
+import statistics
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from queue import Empty
+import meorg_client.constants as mcc
+import meorg_client.fake_server as mfs
+import meorg_client.hooks as mhk
+import meorg_client.parallel as meop
+import meorg_client.stats as mst
+from meorg_client import __version__
+from meorg_client.client import Client
+
+# Suites, and their cases as lists of parameters
+SUITES = mcc.BENCH_SUITES
+UPLOAD, METADATA, DELETE = SUITES
+
+UPLOAD_SIZES = [256 * 1024, 8 * 1024**2]
+UPLOAD_COUNTS = [1, 16]
+THREADS = [1, 4]
+METADATA_CALLS = 200
+METADATA_OUTPUTS = 10
+DELETE_FILES = 50
+
+# Smaller cases, i.e. for CI
+QUICK_UPLOAD_SIZES = [256 * 1024]
+QUICK_UPLOAD_COUNTS = [4]
+QUICK_METADATA_CALLS = 40
+QUICK_DELETE_FILES = 10
+
+# Timed runs of each case
+REPEAT = mcc.BENCH_REPEAT
+
+# Relative increase in time or memory reported as a regression, and the memory
+# increase that is never one (noise)
+THRESHOLD = mcc.BENCH_THRESHOLD
+MEMORY_SLACK = 1024**2
+
+
+def get_cases(suites: list = SUITES, quick: bool = False) -> list:
+    """Get the cases of the benchmark suites.
+
+    Parameters
+    ----------
+    suites : list, optional
+        Suites to include, by default SUITES.
+    quick : bool, optional
+        Use fewer and smaller cases, by default False.
+
+    Returns
+    -------
+    list
+        List of (suite, params) tuples.
+    """
+    sizes = QUICK_UPLOAD_SIZES if quick else UPLOAD_SIZES
+    counts = QUICK_UPLOAD_COUNTS if quick else UPLOAD_COUNTS
+
+    cases = list()
+    if UPLOAD in suites:
+        cases += [
+            (UPLOAD, dict(size=size, count=count, n=n))
+            for size in sizes
+            for count in counts
+            for n in THREADS
+            if n <= count
+        ]
+    if METADATA in suites:
+        calls = QUICK_METADATA_CALLS if quick else METADATA_CALLS
+        cases += [
+            (METADATA, dict(calls=calls, outputs=METADATA_OUTPUTS, n=n)) for n in THREADS
+        ]
+    if DELETE in suites:
+        files = QUICK_DELETE_FILES if quick else DELETE_FILES
+        cases += [(DELETE, dict(files=files, n=n)) for n in THREADS]
+    return cases
+
+
+def _serve(queue, kwargs: dict):
+    """Run a fake server until terminated, reporting its port."""
+    server = mfs.FakeServer(**kwargs).start()
+    queue.put(server.port)
+    server.serve_forever()
+
+
+@contextmanager
+def local_server(**kwargs):
+    """Run a fake server in a separate process, so it does not compete with the
+    client for the interpreter.
+
+    Parameters
+    ----------
+    **kwargs :
+        Arguments to meorg_client.fake_server.FakeServer.
+
+    Yields
+    ------
+    str
+        Base URL of the server.
+    """
+    context = mp.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=_serve, args=(queue, kwargs), daemon=True)
+    process.start()
+    try:
+        port = None
+        while port is None:
+            try:
+                port = queue.get(timeout=0.1)
+            except Empty:
+                if not process.is_alive():
+                    raise RuntimeError("The fake server failed to start.")
+        yield f"http://{kwargs.get('host', '127.0.0.1')}:{port}/api"
+    finally:
+        process.terminate()
+        process.join()
+
+
+def _get_client(base_url: str, **kwargs) -> Client:
+    client = Client(validate_requests=False, **kwargs)
+    client.base_url = base_url
+    client.login(mfs.EMAIL, mfs.PASSWORD)
+    return client
+
+
+def _create_model_output(client: Client) -> str:
+    name = f"bench-{time.time_ns()}"
+    response = client.model_output_create("bench", name)
+    return response.get("data").get("modeloutput")
+
+
+def _write_files(directory: str, size: int, count: int) -> list:
+    filepaths = list()
+    for i in range(count):
+        filepath = os.path.join(directory, f"bench-{size}-{i}.nc")
+        if not os.path.isfile(filepath):
+            with open(filepath, "wb") as f:
+                f.write(os.urandom(size))
+        filepaths.append(filepath)
+    return filepaths
+
+
+def _upload(client: Client, directory: str, size: int, count: int, n: int):
+    """Upload count files of size bytes with n threads."""
+    filepaths = _write_files(directory, size, count)
+    id = _create_model_output(client)
+
+    def _prepare():
+        return lambda: client.upload_files(filepaths, id=id, n=n, progress=False)
+
+    return _prepare, dict(operations=count, bytes=size * count)
+
+
+def _metadata(client: Client, directory: str, calls: int, outputs: int, n: int):
+    """Query model outputs and list their files, calls times each, with n threads."""
+    ids = [_create_model_output(client) for _ in range(outputs)]
+    ids = [ids[i % outputs] for i in range(calls)]
+
+    def _call(id):
+        client.model_output_query(id)
+        client.list_files(id)
+        return [id]
+
+    def _prepare():
+        return lambda: meop.parallelise(_call, n, progress=False, threads=True, id=ids)
+
+    return _prepare, dict(operations=2 * calls)
+
+
+def _delete(client: Client, directory: str, files: int, n: int):
+    """Delete files from a model output with n threads, uploading them untimed."""
+    (filepath,) = _write_files(directory, 1024, 1)
+    id = _create_model_output(client)
+
+    def _prepare():
+        responses = client.upload_files([filepath] * files, id=id, n=4, progress=False)
+        file_ids = [r.get("data").get("files")[0].get("id") for r in responses]
+
+        def _call(file_id):
+            return [client.delete_file_from_model_output(id, file_id)]
+
+        return lambda: meop.parallelise(
+            _call, n, progress=False, threads=True, file_id=file_ids
+        )
+
+    return _prepare, dict(operations=files)
+
+
+_SUITES = {UPLOAD: _upload, METADATA: _metadata, DELETE: _delete}
+
+
+def measure(client: Client, prepare: callable, repeat: int = REPEAT) -> dict:
+    """Time a benchmark, then measure its peak memory in one more run.
+
+    Parameters
+    ----------
+    client : Client
+        Client the benchmark uses.
+    prepare : callable
+        Called untimed before each run, returning the run to time.
+    repeat : int, optional
+        Timed runs, by default REPEAT.
+
+    Returns
+    -------
+    dict
+        Seconds of each run, their median and min, the peak memory allocated in
+        this process (by tracemalloc) and the statistics of the requests made.
+    """
+    stats = mst.ClientStats()
+    seconds = list()
+    for _ in range(repeat):
+        task = prepare()
+        stats.attach(client.hooks)
+        try:
+            start = time.perf_counter()
+            task()
+            seconds.append(time.perf_counter() - start)
+        finally:
+            client.hooks.unregister(mhk.POST_RESPONSE, stats.on_response)
+            client.hooks.unregister(mhk.RETRY, stats.on_retry)
+
+    # Separately, as tracing allocations slows the client down
+    task = prepare()
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        task()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+
+    return dict(
+        seconds=[round(s, 6) for s in seconds],
+        median=round(statistics.median(seconds), 6),
+        min=round(min(seconds), 6),
+        peak_memory=peak - baseline,
+        requests=stats.to_dict(),
+    )
+
+
+def run(
+    suites: list = SUITES,
+    quick: bool = False,
+    repeat: int = REPEAT,
+    server: dict = dict(),
+    callback: callable = None,
+    **kwargs,
+) -> dict:
+    """Run the benchmark suites against a local fake server.
+
+    Parameters
+    ----------
+    suites : list, optional
+        Suites to run, by default SUITES.
+    quick : bool, optional
+        Use fewer and smaller cases, by default False.
+    repeat : int, optional
+        Timed runs of each case, by default REPEAT.
+    server : dict, optional
+        Arguments to the fake server (i.e. latency and bandwidth), by default none.
+    callback : callable, optional
+        Called with each result as it completes, by default None.
+    **kwargs :
+        Arguments to the client (i.e. a tracer).
+
+    Returns
+    -------
+    dict
+        Environment and server settings, and a list of results, one per case.
+    """
+    results = list()
+    started = time.strftime("%Y-%m-%dT%H:%M:%S%z")
+
+    with local_server(**server) as base_url, tempfile.TemporaryDirectory() as tmp:
+        client = _get_client(base_url, **kwargs)
+
+        for suite, params in get_cases(suites, quick):
+            prepare, volume = _SUITES[suite](client, tmp, **params)
+            result = dict(suite=suite, params=params, **volume)
+            result.update(measure(client, prepare, repeat))
+
+            # Rates of the median run
+            result["operations_per_second"] = round(
+                result["operations"] / result["median"], 3
+            )
+            if "bytes" in result:
+                result["bytes_per_second"] = round(result["bytes"] / result["median"])
+
+            results.append(result)
+            if callback is not None:
+                callback(result)
+
+    return dict(
+        version=__version__,
+        python=platform.python_version(),
+        platform=platform.platform(),
+        cpus=os.cpu_count(),
+        started=started,
+        quick=quick,
+        repeat=repeat,
+        server=server,
+        results=results,
+    )
+
+
+def _key(result: dict) -> str:
+    return f"{result['suite']} " + json.dumps(result["params"], sort_keys=True)
+
+
+def compare(baseline: dict, current: dict, threshold: float = THRESHOLD) -> list:
+    """Compare the results of two runs, case by case.
+
+    Parameters
+    ----------
+    baseline : dict
+        Results of the earlier run.
+    current : dict
+        Results of the later run.
+    threshold : float, optional
+        Relative increase in median time or peak memory that is a regression, by
+        default THRESHOLD.
+
+    Returns
+    -------
+    list
+        One dict per case in both runs, with the case, the median time and peak
+        memory of each run, the relative changes and whether it regressed.
+    """
+    before = {_key(r): r for r in baseline["results"]}
+
+    rows = list()
+    for result in current["results"]:
+        old = before.get(_key(result))
+        if old is None:
+            continue
+
+        time_change = result["median"] / old["median"] - 1
+        memory_change = result["peak_memory"] / max(old["peak_memory"], 1) - 1
+        rows.append(
+            dict(
+                case=_key(result),
+                median=[old["median"], result["median"]],
+                peak_memory=[old["peak_memory"], result["peak_memory"]],
+                time_change=round(time_change, 4),
+                memory_change=round(memory_change, 4),
+                regression=time_change > threshold
+                or (
+                    memory_change > threshold
+                    and result["peak_memory"] - old["peak_memory"] > MEMORY_SLACK
+                ),
+            )
+        )
+
+    return rows
+
+
+def format_result(result: dict) -> str:
+    """Format a result as one line.
+
+    Parameters
+    ----------
+    result : dict
+        Result of a case.
+
+    Returns
+    -------
+    str
+        Case, median time, rates and peak memory.
+    """
+    params = " ".join(f"{k}={v}" for k, v in result["params"].items())
+    line = (
+        f"{result['suite']:<9} {params:<32} {result['median']:8.3f}s "
+        f"{result['operations_per_second']:9.1f} ops/s"
+    )
+    if "bytes_per_second" in result:
+        line += f" {result['bytes_per_second'] / 1e6:8.1f} MB/s"
+    return line + f"  peak {result['peak_memory'] / 1e6:.1f} MB"
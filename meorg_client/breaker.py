@@ -0,0 +1,212 @@
+"""Client-side circuit breakers, so that requests to a failing endpoint fail fast."""
+
+import threading
+import time
+from collections import deque
+import meorg_client.exceptions as mx
+
+# Circuit states
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Number of recent outcomes kept per endpoint
+DEFAULT_WINDOW = 20
+
+# Minimum number of outcomes before the circuit can open
+DEFAULT_MIN_CALLS = 10
+
+# Proportion of failures that opens the circuit
+DEFAULT_FAILURE_RATE = 0.5
+
+# Seconds the circuit stays open before a trial request is allowed
+DEFAULT_RESET_TIMEOUT = 30
+
+# Number of concurrent trial requests while half-open
+DEFAULT_HALF_OPEN_CALLS = 1
+
+# Number of recent state changes kept
+MAX_TRANSITIONS = 100
+
+
+class _Circuit:
+    """State of the circuit for one endpoint."""
+
+    def __init__(self, window: int):
+        self.state = CLOSED
+        self.outcomes = deque(maxlen=window)
+        self.opened = 0.0
+        self.trials = 0
+
+
+class CircuitBreakers:
+    """Per-endpoint circuit breakers.
+
+    A circuit is closed until the failure rate of its recent requests reaches a
+    threshold, then it opens and requests fail immediately. After a timeout it is
+    half-open: a trial request is let through, which closes the circuit on success or
+    opens it again on failure.
+
+    Parameters
+    ----------
+    window : int, optional
+        Number of recent outcomes kept per endpoint, by default DEFAULT_WINDOW.
+    min_calls : int, optional
+        Minimum number of outcomes before opening, by default DEFAULT_MIN_CALLS.
+    failure_rate : float, optional
+        Proportion of failures that opens the circuit, by default DEFAULT_FAILURE_RATE.
+    reset_timeout : float, optional
+        Seconds before a trial request, by default DEFAULT_RESET_TIMEOUT.
+    half_open_calls : int, optional
+        Number of concurrent trial requests, by default DEFAULT_HALF_OPEN_CALLS.
+    """
+
+    def __init__(
+        self,
+        window: int = DEFAULT_WINDOW,
+        min_calls: int = DEFAULT_MIN_CALLS,
+        failure_rate: float = DEFAULT_FAILURE_RATE,
+        reset_timeout: float = DEFAULT_RESET_TIMEOUT,
+        half_open_calls: int = DEFAULT_HALF_OPEN_CALLS,
+    ):
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.reset_timeout = reset_timeout
+        self.half_open_calls = half_open_calls
+        self.listeners = list()
+        self._reset()
+
+    def _reset(self):
+        self._lock = threading.Lock()
+        self.circuits = dict()
+        self.transitions = deque(maxlen=MAX_TRANSITIONS)
+
+    def __getstate__(self) -> dict:
+        # Locks cannot be pickled, circuits and listeners are local to the process
+        state = self.__dict__.copy()
+        for key in ("_lock", "circuits", "transitions", "listeners"):
+            state.pop(key)
+        return state
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        self.listeners = list()
+        self._reset()
+
+    def add_listener(self, listener: callable):
+        """Add a callable to be notified of state changes.
+
+        Parameters
+        ----------
+        listener : callable
+            Called with (endpoint, old_state, new_state), must not raise.
+        """
+        self.listeners.append(listener)
+
+    def state(self, endpoint: str) -> str:
+        """Get the state of an endpoint's circuit.
+
+        Parameters
+        ----------
+        endpoint : str
+            URL template of the endpoint.
+
+        Returns
+        -------
+        str
+            One of CLOSED, OPEN or HALF_OPEN.
+        """
+        with self._lock:
+            circuit = self.circuits.get(endpoint)
+            return circuit.state if circuit else CLOSED
+
+    def states(self) -> dict:
+        """Get the states of all endpoints that have been used.
+
+        Returns
+        -------
+        dict
+            Endpoints mapped to states.
+        """
+        with self._lock:
+            return {endpoint: c.state for endpoint, c in self.circuits.items()}
+
+    def _transition(self, endpoint: str, circuit: _Circuit, state: str) -> tuple:
+        """Change state (with the lock held), returning the change to notify."""
+        old, circuit.state = circuit.state, state
+        circuit.trials = 0
+        if state == OPEN:
+            circuit.opened = time.monotonic()
+        if state == CLOSED:
+            circuit.outcomes.clear()
+        change = (endpoint, old, state)
+        self.transitions.append((time.time(),) + change)
+        return change
+
+    def _notify(self, change: tuple):
+        if change is not None:
+            for listener in self.listeners:
+                listener(*change)
+
+    def before(self, endpoint: str):
+        """Check that a request may be sent to an endpoint.
+
+        Parameters
+        ----------
+        endpoint : str
+            URL template of the endpoint.
+
+        Raises
+        ------
+        mx.CircuitOpenException
+            When the circuit is open, or half-open with a trial already in flight.
+        """
+        change = None
+        with self._lock:
+            circuit = self.circuits.get(endpoint)
+            if circuit is None:
+                circuit = self.circuits[endpoint] = _Circuit(self.window)
+
+            if circuit.state == OPEN:
+                remaining = circuit.opened + self.reset_timeout - time.monotonic()
+                if remaining > 0:
+                    raise mx.CircuitOpenException(endpoint, remaining)
+                change = self._transition(endpoint, circuit, HALF_OPEN)
+
+            if circuit.state == HALF_OPEN:
+                if circuit.trials >= self.half_open_calls:
+                    raise mx.CircuitOpenException(endpoint, self.reset_timeout)
+                circuit.trials += 1
+
+        self._notify(change)
+
+    def after(self, endpoint: str, success: bool):
+        """Record the outcome of a request to an endpoint.
+
+        Parameters
+        ----------
+        endpoint : str
+            URL template of the endpoint.
+        success : bool
+            False for failures of the server or network.
+        """
+        change = None
+        with self._lock:
+            circuit = self.circuits.get(endpoint)
+            if circuit is None:
+                return
+
+            if circuit.state == HALF_OPEN:
+                change = self._transition(endpoint, circuit, CLOSED if success else OPEN)
+
+            elif circuit.state == CLOSED:
+                circuit.outcomes.append(success)
+                failures = circuit.outcomes.count(False)
+                if (
+                    len(circuit.outcomes) >= self.min_calls
+                    and failures / len(circuit.outcomes) >= self.failure_rate
+                ):
+                    change = self._transition(endpoint, circuit, OPEN)
+
+        self._notify(change)
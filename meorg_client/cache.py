@@ -0,0 +1,229 @@
+"""Local metadata cache."""
+
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import Union
+import meorg_client.utilities as mu
+
+# Default time-to-live of cache entries (seconds)
+DEFAULT_TTL = 300
+
+# Default cache filename, within the user data directory
+DEFAULT_FILENAME = "cache.sqlite"
+
+# Default number of responses kept for conditional requests
+DEFAULT_MAX_VALIDATED = 256
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    tag TEXT,
+    value TEXT NOT NULL,
+    expires REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_tag ON entries (tag);
+"""
+
+
+class MetadataCache:
+    """SQLite-backed cache of JSON responses, with a TTL and invalidation by tag.
+
+    A connection is opened per operation, so a cache may be shared between threads
+    and processes.
+
+    Parameters
+    ----------
+    path : Union[str, Path], optional
+        Path to the database, by default ~/.meorg/cache.sqlite
+    ttl : float, optional
+        Time-to-live of entries in seconds, by default DEFAULT_TTL.
+    """
+
+    def __init__(self, path: Union[str, Path] = None, ttl: float = DEFAULT_TTL):
+        self.path = Path(path or mu.get_user_data_filepath(DEFAULT_FILENAME))
+        self.ttl = ttl
+        self._initialised = False
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection, creating the database if required.
+
+        Returns
+        -------
+        sqlite3.Connection
+            Connection.
+        """
+        if not self._initialised:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        conn = sqlite3.connect(self.path, timeout=30)
+
+        if not self._initialised:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._initialised = True
+
+        return conn
+
+    def get(self, key: str):
+        """Get an entry.
+
+        Parameters
+        ----------
+        key : str
+            Entry key.
+
+        Returns
+        -------
+        mixed
+            The cached value, or None if missing or expired.
+        """
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT value FROM entries WHERE key = ? AND expires > ?",
+                (key, time.time()),
+            ).fetchone()
+        finally:
+            conn.close()
+
+        return json.loads(row[0]) if row else None
+
+    def set(self, key: str, value, tag: str = None, ttl: float = None):
+        """Set an entry.
+
+        Parameters
+        ----------
+        key : str
+            Entry key.
+        value : mixed
+            JSON-serialisable value.
+        tag : str, optional
+            Tag to invalidate the entry by (i.e. the model output ID), by default None.
+        ttl : float, optional
+            Time-to-live in seconds, by default the cache TTL.
+        """
+        expires = time.time() + (self.ttl if ttl is None else ttl)
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, tag, value, expires) VALUES (?, ?, ?, ?)",
+                    (key, tag, json.dumps(value), expires),
+                )
+        finally:
+            conn.close()
+
+    def invalidate(self, *tags: str):
+        """Remove all entries with the given tags.
+
+        Parameters
+        ----------
+        *tags : str
+            Tags to invalidate.
+        """
+        tags = [t for t in tags if t is not None]
+        if not tags:
+            return
+
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany("DELETE FROM entries WHERE tag = ?", [(t,) for t in tags])
+        finally:
+            conn.close()
+
+    def clear(self):
+        """Remove all entries."""
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM entries")
+        finally:
+            conn.close()
+
+    def purge(self):
+        """Remove expired entries."""
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM entries WHERE expires <= ?", (time.time(),))
+        finally:
+            conn.close()
+
+
+class ResponseValidators:
+    """In-memory store of responses with validators (ETag/Last-Modified), used to
+    make conditional requests and serve the stored body when it is not modified.
+
+    Parameters
+    ----------
+    max_entries : int, optional
+        Maximum number of responses to keep (oldest are evicted first), by default DEFAULT_MAX_VALIDATED.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_VALIDATED):
+        self.max_entries = max_entries
+        self.entries = dict()
+
+    def __getstate__(self) -> dict:
+        # Stored responses are local to the process
+        return dict(max_entries=self.max_entries, entries=dict())
+
+    def get(self, key):
+        """Get a stored response.
+
+        Parameters
+        ----------
+        key : hashable
+            Request key.
+
+        Returns
+        -------
+        requests.Response
+            Stored response, or None.
+        """
+        return self.entries.get(key)
+
+    @staticmethod
+    def conditional_headers(response) -> dict:
+        """Get the conditional request headers that revalidate a response.
+
+        Parameters
+        ----------
+        response : requests.Response
+            Stored response.
+
+        Returns
+        -------
+        dict
+            If-None-Match and/or If-Modified-Since headers.
+        """
+        headers = dict()
+        if response.headers.get("ETag"):
+            headers["If-None-Match"] = response.headers["ETag"]
+        if response.headers.get("Last-Modified"):
+            headers["If-Modified-Since"] = response.headers["Last-Modified"]
+        return headers
+
+    def store(self, key, response):
+        """Store a response if it carries validators.
+
+        Parameters
+        ----------
+        key : hashable
+            Request key.
+        response : requests.Response
+            Successful response.
+        """
+        if not self.conditional_headers(response):
+            self.entries.pop(key, None)
+            return
+
+        # Re-insert to keep the most recent last
+        self.entries.pop(key, None)
+        self.entries[key] = response
+
+        while len(self.entries) > self.max_entries:
+            self.entries.pop(next(iter(self.entries)), None)
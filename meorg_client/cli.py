@@ -2,6 +2,16 @@
 
 import click
 from meorg_client.client import Client
+from meorg_client.cache import MetadataCache
+from meorg_client.resolver import Resolver
+from meorg_client.stats import ClientStats, format_summary
+from meorg_client.tracing import FileExporter, Tracer
+from meorg_client.metrics import Metrics
+from meorg_client.snapshot import Progress
+from meorg_client.transcript import Recorder, Replayer
+from requests.adapters import HTTPAdapter
+import meorg_client.snapshot as msn
+import meorg_client.resolver as mr
 import meorg_client.utilities as mcu
 import meorg_client.constants as mcc
 from meorg_client import __version__
@@ -9,13 +19,22 @@ import json
 import os
 import sys
 import getpass
+import tempfile
+import time
 from pathlib import Path
 import json
 
 
-def _get_client() -> Client:
+def _get_client(cache: bool = None, **kwargs) -> Client:
     """Get an authenticated client.
 
+    Parameters
+    ----------
+    cache : bool, optional
+        Use the local metadata cache, by default only when MEORG_CACHE_TTL is set.
+    **kwargs :
+        Other arguments to the client, in place of the defaults.
+
     Returns
     -------
     meorg_client.client.Client
@@ -40,11 +59,32 @@ def _get_client() -> Client:
     else:
         credentials = mcu.load_user_data("credentials.json")
 
+    # The metadata cache is opt-in, by way of a TTL in the environment
+    ttl = os.getenv("MEORG_CACHE_TTL")
+    if cache is None:
+        cache = ttl is not None
+
+    if cache:
+        cache = MetadataCache(ttl=float(ttl)) if ttl else MetadataCache()
+
+    # Statistics and tracing are shared by all clients of a command, when enabled
+    ctx = click.get_current_context(silent=True)
+    obj = (ctx.find_root().obj or dict()) if ctx else dict()
+
     # Get the client
+    defaults = dict(
+        cache=cache,
+        stats=obj.get("stats"),
+        tracer=obj.get("tracer"),
+        metrics=obj.get("metrics"),
+        progress=obj.get("progress"),
+        transport=obj.get("transport"),
+    )
     return Client(
         email=credentials["email"],
         password=credentials["password"],
         dev_mode=mcu.is_dev_mode(),
+        **{**defaults, **kwargs},
     )
 
 
@@ -68,7 +108,7 @@ def _call(func: callable, **kwargs) -> dict:
     try:
         return func(**kwargs)
     except Exception as ex:
-        click.echo(ex.msg, err=True)
+        click.echo(getattr(ex, "msg", str(ex)), err=True)
 
         # Bubble up the exception
         if mcu.is_dev_mode():
@@ -77,25 +117,190 @@ def _call(func: callable, **kwargs) -> dict:
         sys.exit(1)
 
 
+def _get_resolver() -> Resolver:
+    """Get a resolver of the local name index of the server in use, without logging in.
+
+    Returns
+    -------
+    Resolver
+        Resolver, which cannot look names up on the server.
+    """
+    return Resolver(Client(dev_mode=mcu.is_dev_mode(), validate_requests=False))
+
+
+def _resolve(client: Client, kind: str, value):
+    """Resolve names to IDs, IDs are passed straight through without any lookup.
+
+    Parameters
+    ----------
+    client : Client
+        Client object.
+    kind : str
+        One of meorg_client.resolver.KINDS.
+    value : Union[str, list]
+        Name or ID, or list thereof.
+
+    Returns
+    -------
+    Union[str, list]
+        ID, or list of IDs.
+    """
+    return _call(Resolver(client).resolve, kind=kind, value=value)
+
+
 @click.group(context_settings=dict(help_option_names=["-h", "--help"]))
 @click.version_option(version=__version__)
-def cli():
+@click.option(
+    "--stats",
+    is_flag=True,
+    default=False,
+    help="Print request statistics to stderr on exit.",
+)
+@click.option(
+    "--trace",
+    type=click.Path(dir_okay=False),
+    envvar="MEORG_TRACE",
+    help="Append spans of the command and its requests to this file, as OTLP JSON.",
+)
+@click.option(
+    "--metrics-port",
+    type=int,
+    envvar="MEORG_METRICS_PORT",
+    help="Serve Prometheus metrics on this port while the command runs.",
+)
+@click.option(
+    "--metrics-file",
+    type=click.Path(dir_okay=False),
+    envvar="MEORG_METRICS_FILE",
+    help="Write Prometheus metrics to this file every 15 seconds.",
+)
+@click.option(
+    "--profile",
+    type=click.Choice(mcc.PROFILE_MODES),
+    is_flag=False,
+    flag_value=mcc.PROFILE_MODES[0],
+    help="Profile the command (cpu by default, wall or memory).",
+)
+@click.option(
+    "--profile-dir",
+    type=click.Path(file_okay=False),
+    help="Directory to write profiles to, by default ./meorg-profile-TIMESTAMP.",
+)
+@click.option(
+    "--snapshot",
+    type=click.Path(dir_okay=False, allow_dash=True),
+    is_flag=False,
+    flag_value="-",
+    envvar="MEORG_SNAPSHOT",
+    help="On SIGUSR1, write a snapshot of progress and thread stacks to stderr, or append it to this file.",
+)
+@click.option(
+    "--record",
+    type=click.Path(dir_okay=False),
+    envvar="MEORG_RECORD",
+    help="Append a transcript of every request and response (secrets redacted) to this file.",
+)
+@click.option(
+    "--replay",
+    type=click.Path(exists=True, dir_okay=False),
+    envvar="MEORG_REPLAY",
+    help="Serve responses from a recorded transcript rather than the server.",
+)
+@click.option(
+    "--replay-scale",
+    type=float,
+    default=1.0,
+    show_default=True,
+    help="Multiplier of the recorded latencies when replaying, 0 for none.",
+)
+@click.pass_context
+def cli(
+    ctx,
+    stats: bool = False,
+    trace: str = None,
+    metrics_port: int = None,
+    metrics_file: str = None,
+    profile: str = None,
+    profile_dir: str = None,
+    snapshot: str = None,
+    record: str = None,
+    replay: str = None,
+    replay_scale: float = 1.0,
+):
     """
     ModelEvaluation.org client utility.
 
     For more detail run:
     meorg [SUBCOMMAND] --help
     """
-    pass
+    ctx.ensure_object(dict)
+
+    # Started first and stopped last, so it covers everything else
+    if profile:
+        from meorg_client.profiling import Profiler
+
+        profile_dir = profile_dir or time.strftime("meorg-profile-%Y%m%d-%H%M%S")
+        profiler = Profiler(profile, profile_dir)
+        profiler.start()
+        ctx.call_on_close(lambda: click.echo(profiler.stop(), err=True))
+
+    if stats:
+        start = time.perf_counter()
+        ctx.obj["stats"] = ClientStats()
+
+        def _report():
+            wall_time = time.perf_counter() - start
+            click.echo(format_summary(ctx.obj["stats"].to_dict(), wall_time), err=True)
+
+        ctx.call_on_close(_report)
+
+    # One trace per command, with a span for each client call within it
+    if trace:
+        tracer = ctx.obj["tracer"] = Tracer(FileExporter(trace))
+        ctx.with_resource(tracer.span(f"meorg {ctx.invoked_subcommand}"))
+
+    # Metrics for scraping, i.e. of long uploads
+    if metrics_port is not None or metrics_file:
+        metrics = ctx.obj["metrics"] = Metrics()
+
+        if metrics_port is not None:
+            from meorg_client.metrics import MetricsServer
+
+            ctx.call_on_close(MetricsServer(metrics, metrics_port).stop)
+
+        if metrics_file:
+            from meorg_client.metrics import TextfileWriter
+
+            ctx.call_on_close(TextfileWriter(metrics, metrics_file).stop)
+
+    # Snapshots on demand, i.e. of a batch in a job that looks stuck
+    if snapshot:
+        progress = ctx.obj["progress"] = Progress()
+        if not msn.install(progress, None if snapshot == "-" else snapshot):
+            click.echo("Snapshots on SIGUSR1 are not available on this platform.", err=True)
+
+    # Record a transcript, or reproduce one offline
+    if record and replay:
+        raise click.UsageError("Use only one of --record and --replay.")
+    if record:
+        ctx.obj["transport"] = Recorder(record)
+    if replay:
+        ctx.obj["transport"] = Replayer(replay, scale=replay_scale)
 
 
 @click.command("list")
-def list_endpoints():
+@click.option(
+    "--refresh",
+    is_flag=True,
+    default=False,
+    help="Fetch the specification from the server rather than the local cache.",
+)
+def list_endpoints(refresh: bool = False):
     """
     List the available endpoints for the server.
     """
     client = _get_client()
-    endpoints = _call(client.list_endpoints)
+    endpoints = _call(client.list_endpoints, refresh=refresh)
 
     for url, config in endpoints.get("paths").items():
         for method in config.keys():
@@ -110,17 +315,88 @@ def list_endpoints():
             click.echo(out)
 
 
+def _parse_csv(ctx, param, value):
+    if not value:
+        return []
+
+    return value.split(",")
+
+
+def _parse_required_variables(ctx, param, value):
+    required = dict()
+    for item in _parse_csv(ctx, param, value):
+        name, _, units = item.partition(":")
+        required[name] = units or None
+
+    return required
+
+
 @click.command("upload")
 @click.argument("file_path", nargs=-1)
 @click.argument("id")
 @click.option("-n", default=1, help="Number of threads for parallel uploads.")
-def file_upload(file_path, id, n: int = 1):
+@click.option(
+    "--variables",
+    default="",
+    callback=_parse_csv,
+    help="Comma-separated NetCDF variables to upload (e.g. Qle,Qh,NEE).",
+)
+@click.option(
+    "--time-range",
+    default=None,
+    help="Comma-separated ISO 8601 START,END period to upload, either may be empty.",
+)
+@click.option(
+    "--validate",
+    is_flag=True,
+    default=False,
+    help="Validate NetCDF file headers before uploading.",
+)
+@click.option(
+    "--require",
+    default="",
+    callback=_parse_required_variables,
+    help="Comma-separated VARIABLE[:UNITS] that NetCDF files must contain, implies --validate.",
+)
+@click.option(
+    "--batch-size",
+    default=1,
+    help="Maximum number of files to send per request, useful for many small files.",
+)
+@click.option(
+    "--bundle",
+    default=None,
+    help="Stream all files into a single tar archive of this name (for bundle model outputs).",
+)
+@click.option(
+    "--deadline",
+    type=float,
+    default=None,
+    help="Seconds the whole upload must finish within, including retries.",
+)
+def file_upload(
+    file_path,
+    id,
+    n: int = 1,
+    variables: list = [],
+    time_range=None,
+    validate: bool = False,
+    require: dict = {},
+    batch_size: int = 1,
+    bundle: str = None,
+    deadline: float = None,
+):
     """
     Upload a file to the server.
 
     Prints Job ID on success, which is used by file-status to check transfer status.
 
     If attach_to is used then no ID is returned.
+
+    NetCDF files are reduced to the requested --variables and --time-range before upload.
+
+    With --validate (or --require) every NetCDF file header is checked first and
+    nothing is uploaded if any file is malformed, truncated or missing variables.
     """
     client = _get_client()
 
@@ -129,8 +405,15 @@ def file_upload(file_path, id, n: int = 1):
         client.upload_files,
         files=list(file_path),
         n=n,
-        id=id,
+        id=_resolve(client, mr.MODEL_OUTPUT, id),
         progress=True,
+        variables=variables or None,
+        time_range=time_range,
+        validate=validate,
+        required_variables=require or None,
+        batch_size=batch_size,
+        bundle=bundle,
+        deadline=deadline,
     )
 
     for response in responses:
@@ -149,38 +432,56 @@ def file_list(id: str):
     Prints 1 File ID per line.
     """
     client = _get_client()
-    response = _call(client.list_files, id=id)
+    response = _call(client.list_files, id=_resolve(client, mr.MODEL_OUTPUT, id))
 
     for f in response.get("data").get("files"):
         click.echo(f)
 
 
 @click.command("attach")
-@click.argument("file_id")
-@click.argument("output_id")
-def file_attach(file_id: str, output_id: str):
+@click.argument("file_ids", callback=_parse_csv)
+@click.argument("output_ids", callback=_parse_csv)
+@click.option("-n", default=4, help="Number of threads for concurrent attachment.")
+def file_attach(file_ids: list, output_ids: list, n: int = 4):
     """
-    Attach a file to a model output.
+    Attach uploaded files to model outputs.
+
+    FILE_IDS and OUTPUT_IDS may each be a single ID or a comma-separated list of IDs,
+    every file is attached to every model output.
     """
     client = _get_client()
 
-    _ = _call(client.attach_files_to_model_output, id=output_id, files=[file_id])
+    output_ids = _resolve(client, mr.MODEL_OUTPUT, output_ids)
+    _ = _call(
+        client.attach_files_to_model_outputs, ids=output_ids, files=file_ids, n=n
+    )
 
     click.echo("SUCCESS")
 
 
 @click.command("delete_all")
 @click.argument("output_id")
-def file_delete_all(output_id: str):
+@click.option(
+    "--deadline",
+    type=float,
+    default=None,
+    help="Seconds listing and detaching the files must finish within.",
+)
+def file_delete_all(output_id: str, deadline: float = None):
     """Detach all files from a model output.
 
     Parameters
     ----------
     output_id : str
         Model output ID.
+    deadline : float
+        Seconds to finish within.
     """
     client = _get_client()
-    _ = _call(client.delete_all_files_from_model_output, id=output_id)
+    output_id = _resolve(client, mr.MODEL_OUTPUT, output_id)
+    _ = _call(
+        client.delete_all_files_from_model_output, id=output_id, deadline=deadline
+    )
     click.echo("SUCCESS")
 
 
@@ -196,6 +497,7 @@ def file_delete(output_id: str, file_id: str):
         Model output ID.
     """
     client = _get_client()
+    output_id = _resolve(client, mr.MODEL_OUTPUT, output_id)
     _ = _call(client.delete_file_from_model_output, id=output_id, file_id=file_id)
     click.echo("SUCCESS")
 
@@ -213,8 +515,8 @@ def analysis_start(model_output_id: str, experiment_id: str):
 
     response = _call(
         client.start_analysis,
-        model_output_id=model_output_id,
-        experiment_id=experiment_id,
+        model_output_id=_resolve(client, mr.MODEL_OUTPUT, model_output_id),
+        experiment_id=_resolve(client, mr.EXPERIMENT, experiment_id),
     )
 
     if client.success():
@@ -318,6 +620,7 @@ def create_new_model_output(
     if client.success():
         model_output_id = response.get("data").get("modeloutput")
         existing = response.get("data").get("existing")
+        Resolver(client).add(mr.MODEL_OUTPUT, name, model_output_id)
         click.echo(f"Model Output ID: {model_output_id}")
         if existing is not None:
             click.echo("Warning: Overwriting existing model output ID")
@@ -342,24 +645,23 @@ def model_output_query(model_id: str, name: str):
     """
     client = _get_client()
 
+    # A name in place of the ID is queried as a name
+    if model_id and not mr.is_id(model_id):
+        name = model_id
+
     if name:
         response = _call(client.model_output_query, name=name)
     else:
         response = _call(client.model_output_query, model_id=model_id)
 
     if client.success():
+        if name:
+            Resolver(client).learn(response)
 
         model_output_id = response.get("data").get("modeloutput").get("id")
         click.echo(model_output_id)
 
 
-def _parse_csv(ctx, param, value):
-    if not value:
-        return []
-
-    return value.split(",")
-
-
 @click.command("update")
 @click.argument("model_output_id")
 @click.option(
@@ -439,7 +741,7 @@ def model_output_update(
 
     _ = _call(
         client.model_output_update,
-        model_id=model_output_id,
+        model_id=_resolve(client, mr.MODEL_OUTPUT, model_output_id),
         updated_fields=updated_fields,
     )
 
@@ -463,11 +765,13 @@ def model_output_benchmarks_list(model_output_id: str, exp_id: str):
     client = _get_client()
     response = _call(
         client.model_output_benchmarks_list,
-        model_id=model_output_id,
-        exp_id=exp_id,
+        model_id=_resolve(client, mr.MODEL_OUTPUT, model_output_id),
+        exp_id=_resolve(client, mr.EXPERIMENT, exp_id),
     )
 
     if client.success():
+        # Benchmarks are model outputs, remember their names
+        Resolver(client).learn(response)
         click.echo(
             f"List of available benchmarks: {json.dumps(response.get('data').get('benchmarks'), indent=4)}"
         )
@@ -500,9 +804,9 @@ def model_output_benchmarks_replace(
     client = _get_client()
     _ = _call(
         client.model_output_benchmarks_replace,
-        model_id=model_output_id,
-        exp_id=exp_id,
-        updated_benchmarks=benchmark_ids,
+        model_id=_resolve(client, mr.MODEL_OUTPUT, model_output_id),
+        exp_id=_resolve(client, mr.EXPERIMENT, exp_id),
+        updated_benchmarks=_resolve(client, mr.MODEL_OUTPUT, benchmark_ids),
     )
 
     if client.success():
@@ -527,8 +831,8 @@ def model_output_experiments_extend(model_output_id: str, exp_ids: list[str]):
     client = _get_client()
     _ = _call(
         client.model_output_experiments_extend,
-        model_id=model_output_id,
-        updated_experiments=exp_ids,
+        model_id=_resolve(client, mr.MODEL_OUTPUT, model_output_id),
+        updated_experiments=_resolve(client, mr.EXPERIMENT, exp_ids),
     )
 
     if client.success():
@@ -551,7 +855,9 @@ def model_output_experiment_delete(model_output_id: str, exp_id: str):
     """
     client = _get_client()
     _ = _call(
-        client.model_output_experiment_delete, model_id=model_output_id, exp_id=exp_id
+        client.model_output_experiment_delete,
+        model_id=_resolve(client, mr.MODEL_OUTPUT, model_output_id),
+        exp_id=_resolve(client, mr.EXPERIMENT, exp_id),
     )
 
     if client.success():
@@ -573,6 +879,7 @@ def model_output_delete(model_id: str):
     """
     client = _get_client()
 
+    model_id = _resolve(client, mr.MODEL_OUTPUT, model_id)
     response = _call(client.model_output_delete, model_id=model_id)
 
     if client.success():
@@ -607,6 +914,83 @@ def analysis_status(id: str):
     click.echo(url)
 
 
+@click.command("warm")
+@click.argument("model_output_ids", callback=_parse_csv)
+@click.option(
+    "--experiments",
+    default="",
+    callback=_parse_csv,
+    help="Comma-separated experiment IDs to prefetch benchmarks for.",
+)
+@click.option("-n", default=8, help="Number of threads to prefetch with.")
+def cache_warm(model_output_ids: list, experiments: list, n: int = 8):
+    """
+    Prefetch model output metadata into the local cache.
+
+    MODEL_OUTPUT_IDS is a comma-separated list of model output IDs. Subsequent commands
+    use the cache when MEORG_CACHE_TTL (seconds) is set in the environment.
+    """
+    client = _get_client(cache=True)
+    warmed = _call(
+        client.warm_cache,
+        ids=_resolve(client, mr.MODEL_OUTPUT, model_output_ids),
+        experiment_ids=_resolve(client, mr.EXPERIMENT, experiments),
+        n=n,
+    )
+    click.echo(f"Cached {len(warmed)} model outputs in {client.cache.path}")
+
+
+@click.command("clear")
+def cache_clear():
+    """
+    Remove all entries from the local metadata cache.
+    """
+    cache = MetadataCache()
+    cache.clear()
+    click.echo("SUCCESS")
+
+
+@click.command("set")
+@click.argument("kind", type=click.Choice(mr.KINDS))
+@click.argument("name")
+@click.argument("id")
+def names_set(kind: str, name: str, id: str):
+    """
+    Add a name to the local name index.
+
+    Experiments cannot be looked up by name on the server, so must be added here
+    before they can be referred to by name.
+    """
+    _get_resolver().add(kind, name, id)
+    click.echo("SUCCESS")
+
+
+@click.command("list")
+def names_list():
+    """
+    List the local name index.
+
+    Prints KIND NAME ID, one per line.
+    """
+    for kind, entries in _get_resolver().index.items():
+        for name, (id, _) in sorted(entries.items()):
+            click.echo(f"{kind} {name} {id}")
+
+
+@click.command("refresh")
+@click.option("-n", default=8, help="Number of threads to look up names with.")
+@click.option(
+    "--force", is_flag=True, default=False, help="Refresh all names, not just stale ones."
+)
+def names_refresh(n: int = 8, force: bool = False):
+    """
+    Look up stale model output names in the local name index again.
+    """
+    client = _get_client()
+    refreshed = _call(Resolver(client).refresh, n=n, force=force)
+    click.echo(f"Refreshed {refreshed} names")
+
+
 @click.command()
 @click.option(
     "--dev", is_flag=True, default=False, help="Setup for the development server."
@@ -643,6 +1027,327 @@ def initialise(dev: bool = False):
     click.echo("Credentials written to " + str(cred_filepath))
 
 
+def _parse_mix(ctx, param, value):
+    import meorg_client.loadtest as mlt
+
+    try:
+        return mlt.parse_mix(value)
+    except ValueError as ex:
+        raise click.BadParameter(str(ex))
+
+
+def _parse_numbers(ctx, param, value):
+    try:
+        return [float(v) for v in _parse_csv(ctx, param, value)]
+    except ValueError:
+        raise click.BadParameter(f"Expected comma-separated numbers, not {value!r}.")
+
+
+@click.command("loadtest")
+@click.option(
+    "--mix",
+    default="upload=1,query=5,poll=4",
+    callback=_parse_mix,
+    help="Operations and their weights.",
+)
+@click.option(
+    "--concurrency",
+    default="",
+    callback=_parse_numbers,
+    help="Comma-separated concurrency levels to step through.",
+)
+@click.option(
+    "--rate",
+    "rates",
+    default="",
+    callback=_parse_numbers,
+    help="Comma-separated target rates (operations per second) to step through instead.",
+)
+@click.option(
+    "--duration", default=mcc.LOADTEST_DURATION, type=float, help="Seconds of each step."
+)
+@click.option(
+    "--max-workers",
+    default=mcc.LOADTEST_MAX_WORKERS,
+    type=int,
+    help="Most operations in progress at a target rate.",
+)
+@click.option(
+    "--file-size", default=mcc.LOADTEST_FILE_SIZE, type=int, help="Bytes of the uploaded file."
+)
+@click.option(
+    "--model-profile",
+    envvar="MEORG_MODEL_PROFILE_ID",
+    required=True,
+    help="Model profile ID to create the test model output for.",
+)
+@click.option(
+    "--experiment",
+    envvar="MEORG_EXPERIMENT_ID",
+    default=None,
+    help="Experiment ID to start the polled analysis for.",
+)
+@click.option("--analysis", default=None, help="Existing analysis ID to poll instead.")
+@click.option(
+    "--max-error-rate",
+    default=mcc.LOADTEST_MAX_ERROR_RATE,
+    type=float,
+    help="Error rate beyond which the server is saturated.",
+)
+@click.option(
+    "--max-p95",
+    default=None,
+    type=float,
+    help="95th percentile latency (seconds) beyond which the server is saturated.",
+)
+@click.option(
+    "--all-steps",
+    is_flag=True,
+    default=False,
+    help="Carry on past the saturation point.",
+)
+@click.option(
+    "--retries", default=0, type=int, help="Retries of failed requests, hiding errors."
+)
+@click.option("--timeout", default=30.0, type=float, help="Seconds to wait for a response.")
+@click.option("--seed", default=None, type=int, help="Seed of the operations drawn.")
+@click.option(
+    "--output",
+    default=None,
+    type=click.Path(dir_okay=False, allow_dash=True),
+    help="File to write the JSON results to.",
+)
+def loadtest(
+    mix: dict,
+    concurrency: list,
+    rates: list,
+    duration: float,
+    max_workers: int,
+    file_size: int,
+    model_profile: str,
+    experiment: str,
+    analysis: str,
+    max_error_rate: float,
+    max_p95: float,
+    all_steps: bool,
+    retries: int,
+    timeout: float,
+    seed: int,
+    output: str,
+):
+    """
+    Send a mix of uploads, queries and status polls at stepped concurrency levels or
+    rates, reporting latency percentiles and error rates, until the server saturates.
+    """
+    import meorg_client.loadtest as mlt
+
+    if concurrency and rates:
+        raise click.UsageError("Use only one of --concurrency and --rate.")
+
+    # Measure the server, not the client's resilience: no retries, circuit breakers
+    # or shared requests, and a connection per worker
+    workers = max([int(c) for c in concurrency] + [max_workers if rates else 0])
+    ctx = click.get_current_context()
+    obj = ctx.find_root().obj or dict()
+    client = _get_client(
+        cache=False,
+        retries=retries,
+        timeout=timeout,
+        circuit_breakers=False,
+        coalesce_requests=False,
+        transport=obj.get("transport")
+        or HTTPAdapter(
+            pool_connections=mcc.HTTP_POOL_SIZE,
+            pool_maxsize=max(mcc.HTTP_POOL_SIZE, workers),
+        ),
+    )
+
+    test = mlt.LoadTest(
+        client,
+        mix=mix,
+        file_size=file_size,
+        model_profile_id=model_profile,
+        experiment_id=experiment,
+        analysis_id=analysis,
+        seed=seed,
+    )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _call(test.setup, directory=tmp)
+        try:
+            result = test.run(
+                concurrency=[int(c) for c in concurrency],
+                rates=rates,
+                duration=duration,
+                max_workers=max_workers,
+                max_error_rate=max_error_rate,
+                max_p95=max_p95,
+                stop_on_saturation=not all_steps,
+                callback=lambda step: click.echo(mlt.format_step(step)),
+            )
+        finally:
+            _call(test.teardown)
+
+    click.echo(mlt.format_saturation(result))
+
+    if output is not None:
+        with click.open_file(output, "w") as f:
+            json.dump(result, f, indent=4)
+            f.write("\n")
+
+
+@click.command("bench")
+@click.option(
+    "--suite",
+    "suites",
+    multiple=True,
+    type=click.Choice(mcc.BENCH_SUITES),
+    help="Suite to run (repeatable), by default all.",
+)
+@click.option("--quick", is_flag=True, default=False, help="Fewer and smaller cases.")
+@click.option(
+    "--repeat", default=mcc.BENCH_REPEAT, type=int, help="Timed runs of each case."
+)
+@click.option(
+    "--latency", default=0.0, type=float, help="Seconds the server adds to requests."
+)
+@click.option(
+    "--bandwidth", default=None, type=float, help="MB/s the server transfers at."
+)
+@click.option(
+    "--output",
+    default="-",
+    type=click.Path(dir_okay=False, allow_dash=True),
+    help="File to write the JSON results to, by default stdout.",
+)
+@click.option(
+    "--baseline",
+    default=None,
+    type=click.Path(exists=True, dir_okay=False),
+    help="Earlier results to compare with, failing on regressions.",
+)
+@click.option(
+    "--threshold",
+    default=mcc.BENCH_THRESHOLD,
+    type=float,
+    help="Relative increase in time or memory that is a regression.",
+)
+def bench(
+    suites: tuple,
+    quick: bool,
+    repeat: int,
+    latency: float,
+    bandwidth: float,
+    output: str,
+    baseline: str,
+    threshold: float,
+):
+    """
+    Benchmark uploads, metadata calls and deletes against a local fake server.
+    """
+    import meorg_client.bench as mbench
+
+    obj = click.get_current_context().find_root().obj or dict()
+    server = dict(latency=latency, bandwidth=bandwidth * 1e6 if bandwidth else None)
+
+    results = mbench.run(
+        suites=list(suites) or mbench.SUITES,
+        quick=quick,
+        repeat=repeat,
+        server=server,
+        callback=lambda result: click.echo(mbench.format_result(result), err=True),
+        tracer=obj.get("tracer"),
+        metrics=obj.get("metrics"),
+        progress=obj.get("progress"),
+    )
+
+    with click.open_file(output, "w") as f:
+        json.dump(results, f, indent=4)
+        f.write("\n")
+
+    if baseline is None:
+        return
+
+    with open(baseline) as f:
+        rows = mbench.compare(json.load(f), results, threshold)
+
+    for row in rows:
+        flag = "REGRESSION" if row["regression"] else ""
+        click.echo(
+            f"{row['case']:<50} time {row['time_change']:+7.1%} "
+            f"memory {row['memory_change']:+7.1%} {flag}",
+            err=True,
+        )
+
+    if any(row["regression"] for row in rows):
+        sys.exit(1)
+
+
+@click.command("fake-server")
+@click.option("--host", default="127.0.0.1", help="Address to listen on.")
+@click.option("--port", default=8080, type=int, help="Port to listen on, 0 for any.")
+@click.option(
+    "--latency", default=0.0, type=float, help="Seconds added to every request."
+)
+@click.option(
+    "--jitter", default=0.0, type=float, help="Up to this many seconds added at random."
+)
+@click.option(
+    "--bandwidth",
+    default=None,
+    type=float,
+    help="MB/s each request and response is transferred at.",
+)
+@click.option("--error-rate", default=0.0, type=float, help="Probability of a 503.")
+@click.option("--throttle-rate", default=0.0, type=float, help="Probability of a 429.")
+@click.option(
+    "--drop-rate",
+    default=0.0,
+    type=float,
+    help="Probability of dropping the connection without a response.",
+)
+@click.option("--seed", default=None, type=int, help="Seed of the injected faults.")
+def fake_server(
+    host: str,
+    port: int,
+    latency: float,
+    jitter: float,
+    bandwidth: float,
+    error_rate: float,
+    throttle_rate: float,
+    drop_rate: float,
+    seed: int,
+):
+    """
+    Serve a fake ME.org API locally, with injected latency and faults, until interrupted.
+    """
+    from meorg_client.fake_server import FakeServer
+
+    server = FakeServer(
+        latency=latency,
+        jitter=jitter,
+        bandwidth=bandwidth * 1e6 if bandwidth else None,
+        error_rate=error_rate,
+        throttle_rate=throttle_rate,
+        drop_rate=drop_rate,
+        seed=seed,
+        host=host,
+        port=port,
+    )
+    server.start()
+
+    click.echo(f"Serving a fake ME.org API at {server.base_url}")
+    click.echo("Point the client at it with:")
+    click.echo("  export MEORG_DEV_MODE=1")
+    click.echo(f"  export MEORG_BASE_URL_DEV={server.base_url}")
+    click.echo("  export MEORG_EMAIL=user@example.com MEORG_PASSWORD=password")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
 # Add groups for nested subcommands
 @click.group("endpoints", help="API endpoint commands.")
 def cli_endpoints():
@@ -674,9 +1379,20 @@ def cli_model_experiments():
     pass
 
 
+@click.group("cache", help="Local metadata cache commands.")
+def cli_cache():
+    pass
+
+
+@click.group("names", help="Local name index commands.")
+def cli_names():
+    pass
+
+
 # Add file commands
 cli_file.add_command(file_list)
 cli_file.add_command(file_upload)
+cli_file.add_command(file_attach)
 cli_file.add_command(file_delete)
 cli_file.add_command(file_delete_all)
 
@@ -701,14 +1417,28 @@ cli_model_benchmark.add_command(model_output_benchmarks_replace)
 cli_model_experiments.add_command(model_output_experiments_extend)
 cli_model_experiments.add_command(model_output_experiment_delete)
 
+# Cache commands
+cli_cache.add_command(cache_warm)
+cli_cache.add_command(cache_clear)
+
+# Name commands
+cli_names.add_command(names_set)
+cli_names.add_command(names_list)
+cli_names.add_command(names_refresh)
+
 # Add subparsers to the master
 cli.add_command(cli_endpoints)
 cli.add_command(cli_file)
 cli.add_command(cli_analysis)
 cli.add_command(initialise)
+cli.add_command(fake_server)
+cli.add_command(bench)
+cli.add_command(loadtest)
 cli.add_command(cli_model_output)
 cli.add_command(cli_model_benchmark)
 cli.add_command(cli_model_experiments)
+cli.add_command(cli_cache)
+cli.add_command(cli_names)
 
 
 if __name__ == "__main__":
@@ -3,6 +3,11 @@
 import requests
 import hashlib as hl
 import os
+import threading
+from http.cookiejar import DefaultCookiePolicy
+from types import MappingProxyType
+import random
+import time
 from typing import Union
 from urllib.parse import urljoin, urlencode
 from meorg_client.exceptions import RequestException
@@ -11,13 +16,46 @@ import meorg_client.endpoints as endpoints
 import meorg_client.exceptions as mx
 import meorg_client.utilities as mu
 import meorg_client.parallel as meop
+import meorg_client.preprocessing as mpp
+import meorg_client.validation as mv
+import meorg_client.streaming as ms
+import meorg_client.cache as mc
+import meorg_client.spec as msp
+import meorg_client.singleflight as msf
+import meorg_client.hedging as mh
+import meorg_client.breaker as mb
+import meorg_client.deadline as md
+import meorg_client.hooks as mhk
+import meorg_client.stats as mst
+import meorg_client.tracing as mtr
+import meorg_client.metrics as mmt
+import meorg_client.snapshot as msn
 import mimetypes as mt
 from pathlib import Path
 from tqdm import tqdm
 
 
 class Client:
-    def __init__(self, email: str = None, password: str = None, dev_mode: bool = False):
+    def __init__(
+        self,
+        email: str = None,
+        password: str = None,
+        dev_mode: bool = False,
+        cache: Union[bool, mc.MetadataCache] = None,
+        conditional_requests: bool = True,
+        validate_requests: bool = True,
+        coalesce_requests: bool = True,
+        hedge: Union[bool, mh.Hedger] = False,
+        circuit_breakers: Union[bool, mb.CircuitBreakers] = True,
+        timeout: Union[float, tuple] = (mcc.CONNECT_TIMEOUT, mcc.READ_TIMEOUT),
+        total_timeout: float = None,
+        retries: int = mcc.RETRIES,
+        stats: Union[bool, mst.ClientStats] = False,
+        tracer: mtr.Tracer = None,
+        metrics: mmt.Metrics = None,
+        progress: msn.Progress = None,
+        transport: requests.adapters.BaseAdapter = None,
+    ):
         """ME.org Client object.
 
         Supplying email and password will automatically log in.
@@ -32,10 +70,41 @@ class Client:
             User password, by default None
         dev_mode : bool, optional
             Development mode (uses dev environment), by default False
+        cache : Union[bool, mc.MetadataCache], optional
+            Cache metadata reads locally, True for the default cache, by default None (off).
+        conditional_requests : bool, optional
+            Revalidate GET responses with ETag/Last-Modified rather than transfer them again, by default True.
+        validate_requests : bool, optional
+            Validate requests against the (cached) API specification before sending, by default True.
+        coalesce_requests : bool, optional
+            Share one in-flight GET between concurrent identical requests, by default True.
+        hedge : Union[bool, mh.Hedger], optional
+            Hedge slow GETs with a second request, True for the default hedger, by default False.
+        circuit_breakers : Union[bool, mb.CircuitBreakers], optional
+            Fail fast on endpoints that keep failing, True for the defaults, by default True.
+        timeout : Union[float, tuple], optional
+            Seconds to wait for a connection and between response bytes, as (connect, read)
+            or one value for both, by default (mcc.CONNECT_TIMEOUT, mcc.READ_TIMEOUT).
+        total_timeout : float, optional
+            Seconds a request may take including retries, by default None (unlimited).
+        retries : int, optional
+            Number of retries of failed requests that are safe to repeat, by default mcc.RETRIES.
+        stats : Union[bool, mst.ClientStats], optional
+            Keep per-endpoint request statistics, or add them to shared ones, by default False.
+        tracer : mtr.Tracer, optional
+            Record spans of each call and the requests it makes, by default None.
+        metrics : mmt.Metrics, optional
+            Add request and upload metrics to these (i.e. for Prometheus), by default None.
+        progress : msn.Progress, optional
+            Track requests and uploads in flight for snapshots (i.e. on SIGUSR1), by default None.
+        transport : requests.adapters.BaseAdapter, optional
+            Transport for all requests (i.e. a meorg_client.transcript Recorder or
+            Replayer), by default None (pooled HTTP connections).
         """
 
         # Initialise the mimetypes
         mt.init()
+        self.spec = None
 
         # Dev mode can be set by the user or from the environment
         if dev_mode or mu.is_dev_mode():
@@ -43,13 +112,135 @@ class Client:
         else:
             self.base_url = mcc.MEORG_BASE_URL_PROD
 
-        self.headers = {"Cache-Control": "no-cache", "Pragma": "no-cache"}
-        self.last_response = None
+        # Headers (including auth) are never modified, only replaced, so they can be
+        # read from any thread without a lock
+        self._headers = MappingProxyType({"Cache-Control": "no-cache", "Pragma": "no-cache"})
+
+        # Responses are tracked per thread, connections are pooled per process
+        self._local = threading.local()
+        self._session = None
+        self.transport = transport
+
+        # Optional local metadata cache
+        self.cache = mc.MetadataCache() if cache is True else (cache or None)
+        self.validators = mc.ResponseValidators() if conditional_requests else None
+
+        # API specification, for validating requests offline
+        if validate_requests:
+            self.spec = msp.SpecCache(self.base_url, fetch=self._fetch_spec)
+
+        # In-flight GETs, shared by concurrent identical requests
+        self.inflight = msf.SingleFlight() if coalesce_requests else None
+
+        # Optional hedging of slow GETs
+        self.hedger = mh.Hedger() if hedge is True else (hedge or None)
+
+        # Per-endpoint circuit breakers
+        if circuit_breakers is True:
+            circuit_breakers = mb.CircuitBreakers()
+        self.circuit_breakers = circuit_breakers or None
+
+        # Observers of requests and uploads
+        self.hooks = mhk.Hooks()
+
+        # Per-endpoint request statistics
+        self.request_stats = mst.ClientStats() if stats is True else (stats or None)
+        if self.request_stats is not None:
+            self.request_stats.attach(self.hooks)
+
+        # Optional tracing
+        self.tracer = tracer
+        if self.tracer is not None:
+            self.tracer.attach(self.hooks)
+
+        # Optional metrics
+        self.metrics = metrics
+        if self.metrics is not None:
+            self.metrics.attach(self.hooks)
+
+        # Optional progress for snapshots
+        self.progress = progress
+        if self.progress is not None:
+            self.progress.attach(self.hooks, self.circuit_breakers)
+
+        # Timeouts and retries
+        self.timeout = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+        self.total_timeout = total_timeout
+        self.retries = retries
 
         # Automatically login if credentials are set.
         if email is not None and password is not None:
             self.login(email, password)
 
+    def __getstate__(self) -> dict:
+        """Get the state for pickling (i.e. to parallel workers), the last response and
+        connections are local to this process, so they are left behind."""
+        state = self.__dict__.copy()
+        state["_headers"] = dict(self._headers)
+        state.pop("_local")
+        state["_session"] = None
+        return state
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        self._headers = MappingProxyType(self._headers)
+        self._local = threading.local()
+
+        # Hooks do not survive pickling, statistics start afresh
+        if self.request_stats is not None:
+            self.request_stats.attach(self.hooks)
+        if self.tracer is not None:
+            self.tracer.attach(self.hooks)
+        if self.metrics is not None:
+            self.metrics.attach(self.hooks)
+        if self.progress is not None:
+            self.progress.attach(self.hooks, self.circuit_breakers)
+
+    @property
+    def headers(self) -> MappingProxyType:
+        """Read-only client headers (i.e. Auth)."""
+        return self._headers
+
+    @property
+    def base_url(self) -> str:
+        """Base URL of the server, which the cached API specification follows."""
+        return self._base_url
+
+    @base_url.setter
+    def base_url(self, base_url: str):
+        self._base_url = base_url
+        if self.spec is not None:
+            self.spec.base_url = base_url
+
+    @property
+    def last_response(self) -> requests.Response:
+        """The last response received by the calling thread."""
+        return getattr(self._local, "response", None)
+
+    @last_response.setter
+    def last_response(self, response: requests.Response):
+        self._local.response = response
+
+    @property
+    def session(self) -> requests.Session:
+        """Session pooling connections for all threads, created on first use."""
+        session = self._session
+        if session is None:
+            session = requests.Session()
+
+            # Stateless, as with plain requests, so no cookies are shared between calls
+            session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+
+            adapter = self.transport or requests.adapters.HTTPAdapter(
+                pool_connections=mcc.HTTP_POOL_SIZE, pool_maxsize=mcc.HTTP_POOL_SIZE
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+
+            # Harmless if another thread got there first, one session is dropped
+            self._session = session
+        return session
+
     def _make_request(
         self,
         method: str,
@@ -95,6 +286,12 @@ class Client:
         ------
         mx.InvalidHTTPMethodException
             Raised when the specified method is invalid.
+        mx.CircuitOpenException
+            Raised without sending when the endpoint keeps failing.
+        mx.DeadlineExceededException
+            Raised when the request, or the operation it is part of, runs out of time.
+        mx.RequestValidationException
+            Raised when the request does not conform to the API specification.
         RequestException
             Raised when the request fails.
         """
@@ -105,8 +302,12 @@ class Client:
         if method not in mcc.VALID_METHODS:
             raise mx.InvalidHTTPMethodException(method)
 
+        # Check the request against the API specification, before the round trip
+        if self.spec is not None:
+            self.spec.validate(method, endpoint, url_path_fields, json)
+
         # Get the function and URL
-        func = getattr(requests, method.lower())
+        func = getattr(self.session, method.lower())
         url = self._get_url(endpoint, url_params, **url_path_fields)
 
         # Assemble the headers
@@ -115,23 +316,196 @@ class Client:
         # Attach the user agent
         _headers['user-agent'] = mu.get_user_agent()
 
-        # Make the request, set it as the last response for future use
-        self.last_response = func(
-            url, data=data, json=json, headers=_headers, files=files, **kwargs
+        # The request (and its retries) must finish within its own total timeout and
+        # the deadline of the operation it is part of
+        timeout = kwargs.pop("timeout", self.timeout)
+        timeout = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+        deadline = md.earliest(
+            md.current(),
+            md.Deadline(self.total_timeout) if self.total_timeout else None,
         )
 
+        def _attempt(attempt: int):
+            what = f"{method} {endpoint}"
+            _timeout = timeout
+            if deadline is not None:
+                deadline.check(what)
+                _timeout = deadline.timeout(*timeout)
+
+            # Fail fast while the endpoint is failing
+            if self.circuit_breakers is not None:
+                self.circuit_breakers.before(endpoint)
+
+            # Anything that stops the request completing counts as a failure, so a
+            # half-open circuit never waits on a trial that will not report back
+            recorded = False
+            try:
+                # Hooks are looked up once per attempt, nothing else is done without them
+                hooks = self.hooks.registered
+                observed = hooks[mhk.PRE_REQUEST] or hooks[mhk.POST_RESPONSE]
+                if observed:
+                    start = time.perf_counter()
+                    self.hooks.emit(
+                        mhk.PRE_REQUEST,
+                        method=method,
+                        endpoint=endpoint,
+                        url=url,
+                        attempt=attempt,
+                        start=start,
+                        bytes_sent=mhk.get_body_size(data) if data else None,
+                    )
+
+                # Make the request, hedging idempotent reads if enabled
+                try:
+                    if method == mcc.HTTP_GET and self.hedger is not None and not kwargs:
+                        response = self.hedger.call(
+                            endpoint,
+                            func,
+                            url,
+                            data=data,
+                            json=json,
+                            headers=_headers,
+                            files=files,
+                            timeout=_timeout,
+                        )
+                    else:
+                        response = func(
+                            url,
+                            data=data,
+                            json=json,
+                            headers=_headers,
+                            files=files,
+                            timeout=_timeout,
+                            **kwargs,
+                        )
+                except requests.RequestException as ex:
+                    if observed:
+                        self.hooks.emit(
+                            mhk.POST_RESPONSE,
+                            method=method,
+                            endpoint=endpoint,
+                            url=url,
+                            attempt=attempt,
+                            start=start,
+                            duration=time.perf_counter() - start,
+                            error=ex,
+                        )
+
+                    # Timed out because the deadline was reached
+                    if deadline is not None and isinstance(ex, requests.Timeout):
+                        deadline.check(what)
+                    raise
+
+                # Only server errors count against the endpoint, not client errors
+                if self.circuit_breakers is not None:
+                    self.circuit_breakers.after(endpoint, response.status_code < 500)
+                    recorded = True
+
+                if observed:
+                    streamed = kwargs.get("stream")
+                    self.hooks.emit(
+                        mhk.POST_RESPONSE,
+                        method=method,
+                        endpoint=endpoint,
+                        url=url,
+                        attempt=attempt,
+                        start=start,
+                        first_byte=response.elapsed.total_seconds(),
+                        duration=time.perf_counter() - start,
+                        status=response.status_code,
+                        bytes_sent=mhk.get_body_size(response.request.body),
+                        bytes_received=None if streamed else len(response.content),
+                    )
+
+                return response
+            finally:
+                if self.circuit_breakers is not None and not recorded:
+                    self.circuit_breakers.after(endpoint, False)
+
+        def _send():
+            # Revalidate a previously seen response rather than transfer it again
+            validated, key = None, None
+            if method == mcc.HTTP_GET and self.validators is not None:
+                key = (url, self.headers.get("X-User-Id"))
+                validated = self.validators.get(key)
+                if validated is not None:
+                    _headers.update(self.validators.conditional_headers(validated))
+
+            # Reads are retried on any failure, other requests only if never sent
+            for attempt in range(self.retries + 1):
+                last = attempt == self.retries
+                error, response = None, None
+                try:
+                    response = _attempt(attempt)
+                except requests.ConnectTimeout as ex:
+                    if last:
+                        raise
+                    error = ex
+                except (requests.ConnectionError, requests.Timeout) as ex:
+                    if last or method != mcc.HTTP_GET:
+                        raise
+                    error = ex
+                else:
+                    if (
+                        last
+                        or method != mcc.HTTP_GET
+                        or response.status_code not in mcc.RETRY_STATUS_CODES
+                    ):
+                        break
+
+                # Exponential backoff with jitter, never beyond the deadline
+                backoff = min(mcc.RETRY_BACKOFF * 2**attempt, mcc.RETRY_BACKOFF_MAX)
+                backoff *= random.uniform(0.5, 1)
+                if deadline is not None:
+                    backoff = min(backoff, max(deadline.remaining(), 0))
+
+                if self.hooks.registered[mhk.RETRY]:
+                    self.hooks.emit(
+                        mhk.RETRY,
+                        method=method,
+                        endpoint=endpoint,
+                        url=url,
+                        attempt=attempt + 1,
+                        status=getattr(response, "status_code", None),
+                        error=error,
+                        backoff=backoff,
+                    )
+
+                time.sleep(backoff)
+
+            # Not modified, serve the stored body
+            if validated is not None and response.status_code == 304:
+                response = validated
+            elif key is not None and response.status_code == 200:
+                self.validators.store(key, response)
+
+            return response
+
+        # Identical concurrent GETs (same URL and headers, so the same user) share one
+        # request, streamed responses cannot be shared
+        if (
+            method == mcc.HTTP_GET
+            and self.inflight is not None
+            and not (data or json or files or kwargs)
+        ):
+            flight = (url, tuple(sorted(_headers.items())))
+            response = self.inflight.do(flight, _send)
+        else:
+            response = _send()
+
+        # Set it as the last response of this thread for future use
+        self.last_response = response
+
         # Check to see if it was successful
-        if self.last_response.status_code not in mcc.HTTP_STATUS_SUCCESS_RANGE:
-            raise RequestException(
-                self.last_response.status_code, self.last_response.text
-            )
+        if response.status_code not in mcc.HTTP_STATUS_SUCCESS_RANGE:
+            raise RequestException(response.status_code, response.text)
 
         # This is the default
         if return_json:
-            return self.last_response.json()
+            return response.json()
 
         # For flexibility
-        return self.last_response
+        return response
 
     def _get_url(self, endpoint: str, url_params: dict = {}, **url_path_fields: dict):
         """Get the well-formed URL for the call.
@@ -172,6 +546,53 @@ class Client:
         """
         return {**self.headers, **headers}
 
+    def _cached_request(self, tag: str = None, **kwargs) -> dict:
+        """Make a GET request through the metadata cache (if enabled).
+
+        Parameters
+        ----------
+        tag : str, optional
+            Tag to invalidate the entry by (the model output ID), by default the
+            model output ID in the response.
+        **kwargs :
+            Arguments to _make_request.
+
+        Returns
+        -------
+        dict
+            Response from ME.org, or the cache.
+        """
+        if self.cache is None:
+            return self._make_request(method=mcc.HTTP_GET, **kwargs)
+
+        # Key on the user as well, as responses depend on permissions
+        url = self._get_url(
+            kwargs["endpoint"],
+            kwargs.get("url_params", {}),
+            **kwargs.get("url_path_fields", {}),
+        )
+        key = f"{self.headers.get('X-User-Id')}:{url}"
+
+        response = self.cache.get(key)
+        if response is None:
+            response = self._make_request(method=mcc.HTTP_GET, **kwargs)
+            tag = tag or mu.get_model_output_id(response)
+            self.cache.set(key, response, tag=tag)
+
+        return response
+
+    def _invalidate(self, *ids: str):
+        """Invalidate cached metadata for model outputs (write-through).
+
+        Parameters
+        ----------
+        *ids : str
+            Model output IDs.
+        """
+        if self.cache is not None:
+            self.cache.invalidate(*ids)
+
+    @mtr.traced
     def login(self, email: str, password: str):
         """Log the user into ME.org.
 
@@ -200,24 +621,24 @@ class Client:
             method=mcc.HTTP_POST,
             endpoint=endpoints.LOGIN,
             json=login_data,
-            return_json=True,
+            return_json=False,
         )
 
-        # Successful login
-        if self.last_response.status_code == 200:
+        # Successful login, swap in the new auth headers in one go
+        if response.status_code == 200:
+            data = response.json()["data"]
             auth_headers = {
-                "X-User-Id": response["data"]["userId"],
-                "X-Auth-Token": response["data"]["authToken"],
+                "X-User-Id": data["userId"],
+                "X-Auth-Token": data["authToken"],
             }
 
-            self.headers.update(auth_headers)
+            self._headers = MappingProxyType({**self._headers, **auth_headers})
 
         # Unsuccessful login (technically this will have already failed)
         else:
-            raise RequestException(
-                self.last_response.status_code, self.last_response.text
-            )
+            raise RequestException(response.status_code, response.text)
 
+    @mtr.traced
     def logout(self):
         """Log the user out. Likely not necessary, can just let sessions expire."""
         response = self._make_request(
@@ -226,8 +647,13 @@ class Client:
 
         # Clear the headers.
         if response.status_code == 200:
-            self.headers.pop("X-User-Id", None)
-            self.headers.pop("X-Auth-Token", None)
+            self._headers = MappingProxyType(
+                {
+                    k: v
+                    for k, v in self._headers.items()
+                    if k not in ("X-User-Id", "X-Auth-Token")
+                }
+            )
 
     def _upload_files_parallel(
         self,
@@ -235,6 +661,8 @@ class Client:
         id: str,
         n: int = 2,
         progress=True,
+        batch_size: int = 1,
+        batch_bytes: int = mcc.UPLOAD_BATCH_MAX_BYTES,
     ):
         """Upload files in parallel.
 
@@ -246,6 +674,10 @@ class Client:
             Module output id to attach to, by default None.
         n : int, optional
             Number of threads to use, by default 2.
+        batch_size : int, optional
+            Maximum number of files per request, by default 1.
+        batch_bytes : int, optional
+            Maximum number of bytes per request, by default mcc.UPLOAD_BATCH_MAX_BYTES.
 
         Returns
         -------
@@ -255,22 +687,36 @@ class Client:
 
         # Ensure the object is actually iterable
         files = mu.ensure_list(files)
-
-        # Do the parallel upload
-        responses = None
-        responses = meop.parallelise(
-            self._upload_file, n, filepath=files, id=id, progress=progress
+        batches = mu.batch_files(files, batch_size, batch_bytes)
+
+        # Do the parallel upload, one batch per task, sharing this client (and deadline)
+        results = meop.parallelise(
+            self._upload_batch_task,
+            n,
+            filepaths=batches,
+            id=id,
+            progress=progress,
+            threads=True,
         )
 
-        # These should already be a list as per the parallelise function.
-        return responses
+        # Flatten back to one response per file
+        return [response for result in results for response in result]
 
+    @mtr.traced
     def upload_files(
         self,
         files: Union[str, Path, list],
         id: str,
         n: int = 1,
         progress=True,
+        variables: list = None,
+        time_range=None,
+        validate: bool = False,
+        required_variables: Union[list, dict] = None,
+        batch_size: int = 1,
+        batch_bytes: int = mcc.UPLOAD_BATCH_MAX_BYTES,
+        bundle: str = None,
+        deadline: float = None,
     ) -> list:
         """Upload files.
 
@@ -282,12 +728,34 @@ class Client:
             Model output ID to immediately attach to.
         n : int, optional
             Number of threads to parallelise over, by default 1
-
+        variables : list, optional
+            Only upload these variables (and their coordinates) from NetCDF files, by default None (all).
+        time_range : mixed, optional
+            Only upload this (start, end) period from NetCDF files, by default None (all).
+        validate : bool, optional
+            Validate NetCDF file headers before anything is sent, by default False.
+        required_variables : Union[list, dict], optional
+            Variables (or a dict of variables to units) NetCDF files must contain, implies validate, by default None.
+        batch_size : int, optional
+            Maximum number of files to send in a single request, by default 1.
+        batch_bytes : int, optional
+            Maximum number of bytes to send in a single request, by default mcc.UPLOAD_BATCH_MAX_BYTES.
+        bundle : str, optional
+            Stream all files into a single tar archive of this name, by default None.
+        deadline : float, optional
+            Seconds all of the requests (including retries) must finish within, by default None.
 
         Returns
         -------
         list
-            List of dicts
+            List of dicts, one per file, regardless of batching.
+
+        Raises
+        ------
+        mx.FileValidationException
+            When validation is requested and any NetCDF file is malformed.
+        mx.DeadlineExceededException
+            When the deadline passes before all files are uploaded.
         """
 
         # Ensure the files are actually a list
@@ -297,16 +765,52 @@ class Client:
         if n >= 1 == False:
             raise ValueError("Number of threads must be greater than or equal to 1.")
 
-        # Sequential upload
-        responses = list()
-        if n == 1:
-            for fp in tqdm(files, total=len(files)):
-                response = self._upload_file(fp, id=id)
-                responses += response
-        else:
-            responses += self._upload_files_parallel(
-                files, n=n, id=id, progress=progress
-            )
+        if batch_size < 1:
+            raise ValueError("Batch size must be greater than or equal to 1.")
+
+        # Every request made from here on shares the deadline
+        with md.deadline(deadline):
+
+            # Reject malformed files before anything is sent
+            if validate or required_variables:
+                mv.validate_files(files, required_variables)
+
+            # Reduce the files to the requested subset before anything is sent
+            if variables or time_range:
+                with mpp.subset_files(files, variables, time_range) as subset:
+                    return self.upload_files(
+                        subset,
+                        id=id,
+                        n=n,
+                        progress=progress,
+                        batch_size=batch_size,
+                        batch_bytes=batch_bytes,
+                        bundle=bundle,
+                    )
+
+            # Archive on the fly, a single request
+            responses = list()
+            if bundle:
+                responses += self._upload_bundle(files, id=id, name=bundle)
+
+            # Sequential upload
+            elif n == 1:
+                with tqdm(total=len(files), disable=not progress) as pbar:
+                    for batch in mu.batch_files(files, batch_size, batch_bytes):
+                        responses += self._upload_batch(batch, id=id)
+                        pbar.update(len(batch))
+            else:
+                responses += self._upload_files_parallel(
+                    files,
+                    n=n,
+                    id=id,
+                    progress=progress,
+                    batch_size=batch_size,
+                    batch_bytes=batch_bytes,
+                )
+
+            # The file list of the model output has changed
+            self._invalidate(id)
 
         # return mu.ensure_list(responses)
         return responses
@@ -335,40 +839,216 @@ class Client:
         FileNotFoundError
             When supplied file cannot be found.
         """
+        return self._upload_batch([filepath], id=id)
 
-        file_obj = None
+    def _upload_batch_task(self, filepaths: list, id: str) -> list:
+        """Parallelisable wrapper for _upload_batch."""
+        return [self._upload_batch(filepaths, id=id)]
 
-        if isinstance(filepath, (str, Path)) and os.path.isfile(filepath):
-            file_obj = open(filepath, "rb")
+    def _upload_batch(self, filepaths: list, id: str) -> list:
+        """Upload several files in a single multipart request.
 
-        # Bail out
-        else:
-            dtype = type(file_obj)
-            raise TypeError(f"File is neither path-like nor readable ({dtype}).")
+        Parameters
+        ----------
+        filepaths : list
+            List of paths to files.
+        id : str
+            model_output_id to attach the files to
 
-        # Prepare the payload from the files
-        payload = list()
+        Returns
+        -------
+        list
+            One response per file. A single file gets the response as-is, several
+            files get the response split into one dict per file record.
 
-        filename = os.path.basename(file_obj.name)
-        ext = filename.split(".")[-1]
-        mimetype = mt.types_map[f".{ext}"]
-        payload.append(("file", (filename, file_obj, mimetype)))
+        Raises
+        ------
+        TypeError
+            When a supplied file is neither path-like nor readable.
+        """
 
-        # Make the request
-        response = self._make_request(
-            method=mcc.HTTP_POST,
-            endpoint=endpoints.FILE_UPLOAD,
-            files=payload,
-            url_path_fields=dict(id=id),
-            return_json=True,
+        readers = list()
+        parts = list()
+
+        try:
+            for filepath in filepaths:
+
+                if isinstance(filepath, (str, Path)) and os.path.isfile(filepath):
+                    file_obj = open(filepath, "rb")
+
+                # Bail out
+                else:
+                    dtype = type(filepath)
+                    raise TypeError(f"File is neither path-like nor readable ({dtype}).")
+
+                # Prepare the payload from the files, hashing bytes as they are streamed out
+                filename = os.path.basename(file_obj.name)
+                ext = filename.split(".")[-1]
+                mimetype = mt.types_map[f".{ext}"]
+                reader = ms.HashingReader(
+                    file_obj,
+                    callback=self._upload_progress(filename, os.path.getsize(filepath)),
+                )
+                readers.append((filename, reader))
+                parts.append(("file", filename, reader, mimetype))
+
+            payload = ms.MultipartEncoder(parts)
+
+            # Make the request
+            with mtr.span(
+                self.tracer,
+                "upload part",
+                **{"meorg.files": len(readers), "meorg.bytes": len(payload)},
+            ):
+                response = self._make_request(
+                    method=mcc.HTTP_POST,
+                    endpoint=endpoints.FILE_UPLOAD,
+                    data=payload,
+                    headers={"Content-Type": payload.content_type},
+                    url_path_fields=dict(id=id),
+                    return_json=True,
+                )
+
+        # Close the file descriptors regardless of the outcome
+        finally:
+            for _, reader in readers:
+                reader.close()
+
+        # Verify against the server checksums if reported, record them otherwise
+        if len(readers) == 1:
+            filename, reader = readers[0]
+            self._verify_checksum(response, filename, reader.hexdigest())
+            return mu.ensure_list(response)
+
+        responses = mu.split_upload_response(response, [f for f, _ in readers])
+        for (filename, reader), _response in zip(readers, responses):
+            self._verify_checksum(_response, filename, reader.hexdigest())
+
+        return responses
+
+    def _upload_bundle(self, filepaths: list, id: str, name: str) -> list:
+        """Upload files as a tar archive that is built while it is being sent.
+
+        Parameters
+        ----------
+        filepaths : list
+            List of paths to files.
+        id : str
+            model_output_id to attach the archive to
+        name : str
+            Filename of the archive.
+
+        Returns
+        -------
+        list
+            List containing the response from ME.org.
+        """
+        name = name if name.endswith(".tar") else f"{name}.tar"
+        archive = ms.TarStream(filepaths)
+        reader = ms.HashingReader(
+            archive, callback=self._upload_progress(name, len(archive))
+        )
+        payload = ms.MultipartEncoder(
+            [("file", name, reader, "application/x-tar", len(archive))]
         )
 
-        # Close all the file descriptors (requests should do this, but just to be sure)
-        for fd in payload:
-            fd[1][1].close()
+        try:
+            with mtr.span(
+                self.tracer,
+                "upload part",
+                **{"meorg.files": len(filepaths), "meorg.bytes": len(payload)},
+            ):
+                response = self._make_request(
+                    method=mcc.HTTP_POST,
+                    endpoint=endpoints.FILE_UPLOAD,
+                    data=payload,
+                    headers={"Content-Type": payload.content_type},
+                    url_path_fields=dict(id=id),
+                    return_json=True,
+                )
+        finally:
+            payload.close()
+
+        self._verify_checksum(response, name, reader.hexdigest())
 
         return mu.ensure_list(response)
 
+    def _upload_progress(self, filename: str, size: int) -> callable:
+        """Get a callback emitting upload progress events for a file.
+
+        Parameters
+        ----------
+        filename : str
+            Name of the file being uploaded.
+        size : int
+            Size of the file.
+
+        Returns
+        -------
+        callable
+            Callback taking the bytes sent so far, or None when there are no hooks.
+        """
+        if not self.hooks.registered[mhk.UPLOAD_PROGRESS]:
+            return None
+
+        start = time.perf_counter()
+
+        def _progress(bytes_done):
+            self.hooks.emit(
+                mhk.UPLOAD_PROGRESS,
+                endpoint=endpoints.FILE_UPLOAD,
+                filename=filename,
+                start=start,
+                duration=time.perf_counter() - start,
+                bytes_done=bytes_done,
+                bytes_total=size,
+            )
+
+        return _progress
+
+    def _verify_checksum(self, response: dict, filename: str, digest: str):
+        """Verify the digest of an uploaded file against the server's, if reported.
+
+        Only server digests that are explicitly of the same algorithm are compared
+        (i.e. a generic checksum of unknown algorithm is not). When there is none,
+        the local digest is recorded on the file record instead, under the name of
+        the algorithm.
+
+        Parameters
+        ----------
+        response : dict
+            Upload response.
+        filename : str
+            Name of the uploaded file.
+        digest : str
+            Digest computed while uploading.
+
+        Raises
+        ------
+        mx.ChecksumMismatchException
+            When the server-reported checksum does not match.
+        """
+        files = response.get("data", dict()).get("files") or list()
+
+        # Match on name, unless there is no ambiguity
+        matched = [f for f in files if f.get("name") == filename]
+        matched = matched or (files if len(files) == 1 else list())
+
+        for f in matched:
+            remote = next(
+                (
+                    f[k]
+                    for k in mcc.UPLOAD_CHECKSUM_KEYS
+                    if mu.get_checksum_algorithm(k, f.get(k)) == mcc.UPLOAD_HASH_ALGORITHM
+                ),
+                None,
+            )
+            if remote is None:
+                f.setdefault(mcc.UPLOAD_HASH_ALGORITHM, digest)
+            elif remote.split(":")[-1].lower() != digest:
+                raise mx.ChecksumMismatchException(filename, digest, remote)
+
+    @mtr.traced
     def list_files(self, id: str) -> Union[dict, requests.Response]:
         """Get a list of model outputs.
 
@@ -382,12 +1062,91 @@ class Client:
         Union[dict, requests.Response]
             Response from ME.org.
         """
-        return self._make_request(
-            method=mcc.HTTP_GET,
+        return self._cached_request(
+            tag=id,
             endpoint=endpoints.FILE_LIST,
             url_path_fields=dict(id=id),
         )
 
+    @mtr.traced
+    def attach_files_to_model_output(
+        self, id: str, files: Union[str, list]
+    ) -> Union[dict, requests.Response]:
+        """Attach previously uploaded files to a model output by file ID.
+
+        Provisional: the route is not in the published API specification and may
+        change once confirmed by ME.org.
+
+        Parameters
+        ----------
+        id : str
+            Model output ID.
+        files : Union[str, list]
+            A file ID, or a list of file IDs.
+
+        Returns
+        -------
+        Union[dict, requests.Response]
+            Response from ME.org.
+        """
+        response = self._make_request(
+            method=mcc.HTTP_POST,
+            endpoint=endpoints.FILE_ATTACH,
+            url_path_fields=dict(id=id),
+            json=dict(files=mu.ensure_list(files)),
+        )
+
+        self._invalidate(id)
+        return response
+
+    def _attach_files(self, id: str, files: list) -> list:
+        """Parallelisable wrapper for attach_files_to_model_output."""
+        return mu.ensure_list(self.attach_files_to_model_output(id=id, files=files))
+
+    @mtr.traced
+    def attach_files_to_model_outputs(
+        self,
+        ids: Union[str, list],
+        files: Union[str, list],
+        n: int = 4,
+        progress=False,
+    ) -> list:
+        """Attach the same files to many model outputs, so one upload serves them all.
+
+        Provisional, see attach_files_to_model_output.
+
+        Parameters
+        ----------
+        ids : Union[str, list]
+            A model output ID, or a list of model output IDs.
+        files : Union[str, list]
+            A file ID, or a list of file IDs.
+        n : int, optional
+            Number of threads to attach with concurrently, by default 4.
+        progress : bool, optional
+            Show a progress bar, by default False.
+
+        Returns
+        -------
+        list
+            List of responses, one per model output.
+        """
+        ids = mu.ensure_list(ids)
+        files = mu.ensure_list(files)
+
+        if n == 1 or len(ids) == 1:
+            return [self.attach_files_to_model_output(id=id, files=files) for id in ids]
+
+        return meop.parallelise(
+            self._attach_files,
+            min(n, len(ids)),
+            progress=progress,
+            threads=True,
+            id=ids,
+            files=[files] * len(ids),
+        )
+
+    @mtr.traced
     def delete_file_from_model_output(self, id: str, file_id: str):
         """Delete file from model output
 
@@ -403,19 +1162,25 @@ class Client:
         Union[dict, requests.Request]
             Response from ME.org
         """
-        return self._make_request(
+        response = self._make_request(
             method=mcc.HTTP_DELETE,
             endpoint=endpoints.FILE_DELETE,
             url_path_fields=dict(id=id, fileId=file_id),
         )
 
-    def delete_all_files_from_model_output(self, id: str):
+        self._invalidate(id)
+        return response
+
+    @mtr.traced
+    def delete_all_files_from_model_output(self, id: str, deadline: float = None):
         """Delete file from model output
 
         Parameters
         ----------
         id : str
             Model output ID.
+        deadline : float, optional
+            Seconds the listing and every delete must finish within, by default None.
 
         Returns
         -------
@@ -423,19 +1188,23 @@ class Client:
             Response from ME.org
         """
 
-        # Get a list of the files currently on the model output
-        files = self.list_files(id)
-        file_ids = [f.get("id") for f in files.get("data").get("files")]
+        with md.deadline(deadline):
 
-        responses = list()
+            # Get a list of the files currently on the model output (never from the cache)
+            self._invalidate(id)
+            files = self.list_files(id)
+            file_ids = [f.get("id") for f in files.get("data").get("files")]
 
-        # Do the delete one at a time
-        for file_id in file_ids:
-            response = self.delete_file_from_model_output(id=id, file_id=file_id)
-            responses.append(response)
+            responses = list()
+
+            # Do the delete one at a time
+            for file_id in file_ids:
+                response = self.delete_file_from_model_output(id=id, file_id=file_id)
+                responses.append(response)
 
         return responses
 
+    @mtr.traced
     def start_analysis(
         self, model_output_id: str, experiment_id: str
     ) -> Union[dict, requests.Response]:
@@ -457,6 +1226,7 @@ class Client:
             url_path_fields=dict(id=model_output_id, expid=experiment_id),
         )
 
+    @mtr.traced
     def model_output_create(
         self, mod_prof_id: str, name: str, **config_params
     ) -> Union[dict, requests.Response]:
@@ -476,12 +1246,17 @@ class Client:
         Union[dict, requests.Response]
             Response from ME.org.
         """
-        return self._make_request(
+        response = self._make_request(
             method=mcc.HTTP_POST,
             endpoint=endpoints.MODEL_OUTPUT_CREATE,
             json=dict(model=mod_prof_id, name=name) | config_params,
         )
 
+        # An existing model output of the same name may have been overwritten
+        self._invalidate(response.get("data", dict()).get("modeloutput"))
+        return response
+
+    @mtr.traced
     def model_output_query(self, model_id: str = None, name: bool = None) -> Union[dict, requests.Response]:
         """
         Get details for a specific new model output entity
@@ -495,12 +1270,14 @@ class Client:
         Union[dict, requests.Response]
             Response from ME.org.
         """
-        return self._make_request(
-            method=mcc.HTTP_GET,
+        # Queries by name are tagged with the ID they resolve to
+        return self._cached_request(
+            tag=None if name else model_id,
             endpoint=endpoints.MODEL_OUTPUT_QUERY,
             url_params=dict(name=name) if name else dict(id=model_id),
         )
 
+    @mtr.traced
     def model_output_update(
         self, model_id: str, updated_fields: dict
     ) -> Union[dict, requests.Response]:
@@ -519,22 +1296,27 @@ class Client:
         Union[dict, requests.Response]
             Response from ME.org.
         """
-        return self._make_request(
+        response = self._make_request(
             method=mcc.HTTP_PATCH,
             endpoint=endpoints.MODEL_OUTPUT_UPDATE,
             url_path_fields=dict(id=model_id),
             json=updated_fields,
         )
 
+        self._invalidate(model_id)
+        return response
+
+    @mtr.traced
     def model_output_benchmarks_list(
         self, model_id: str, exp_id: str
     ) -> Union[dict, requests.Response]:
-        return self._make_request(
-            method=mcc.HTTP_GET,
+        return self._cached_request(
+            tag=model_id,
             endpoint=endpoints.MODEL_OUTPUT_BENCHMARKS,
             url_path_fields=dict(id=model_id, expId=exp_id),
         )
 
+    @mtr.traced
     def model_output_benchmarks_replace(
         self, model_id: str, exp_id: str, updated_benchmarks: list[str]
     ) -> Union[dict, requests.Response]:
@@ -555,13 +1337,17 @@ class Client:
         Union[dict, requests.Response]
             Response from ME.org.
         """
-        return self._make_request(
+        response = self._make_request(
             method=mcc.HTTP_PATCH,
             endpoint=endpoints.MODEL_OUTPUT_BENCHMARKS,
             url_path_fields=dict(id=model_id, expId=exp_id),
             json=dict(benchmarks=updated_benchmarks),
         )
 
+        self._invalidate(model_id)
+        return response
+
+    @mtr.traced
     def model_output_experiments_extend(
         self, model_id: str, updated_experiments: list[str]
     ) -> Union[dict, requests.Response]:
@@ -582,23 +1368,31 @@ class Client:
         Union[dict, requests.Response]
             Response from ME.org.
         """
-        return self._make_request(
+        response = self._make_request(
             method=mcc.HTTP_PATCH,
             endpoint=endpoints.MODEL_OUTPUT_EXPERIMENTS,
             url_path_fields=dict(id=model_id),
             json=dict(experiments=updated_experiments),
         )
 
+        self._invalidate(model_id)
+        return response
+
+    @mtr.traced
     def model_output_experiment_delete(
         self, model_id: str, exp_id: str
     ) -> Union[dict, requests.Response]:
-        return self._make_request(
+        response = self._make_request(
             method=mcc.HTTP_DELETE,
             endpoint=endpoints.MODEL_OUTPUT_EXPERIMENTS,
             url_path_fields=dict(id=model_id),
             json=dict(experiment=exp_id),
         )
 
+        self._invalidate(model_id)
+        return response
+
+    @mtr.traced
     def model_output_delete(self, model_id: str) -> Union[dict, requests.Response]:
         """
         Remove specific new model output entity
@@ -612,12 +1406,70 @@ class Client:
         Union[dict, requests.Response]
             Response from ME.org.
         """
-        return self._make_request(
+        response = self._make_request(
             method=mcc.HTTP_DELETE,
             endpoint=endpoints.MODEL_OUTPUT_DELETE,
             url_path_fields=dict(id=model_id),
         )
 
+        self._invalidate(model_id)
+        return response
+
+    def _warm_cache(self, id: str, experiment_ids: list) -> list:
+        """Parallelisable prefetch of the metadata for a single model output."""
+        self.model_output_query(model_id=id)
+        self.list_files(id)
+        for exp_id in experiment_ids:
+            self.model_output_benchmarks_list(id, exp_id)
+        return [id]
+
+    @mtr.traced
+    def warm_cache(
+        self,
+        ids: Union[str, list],
+        experiment_ids: Union[str, list] = None,
+        n: int = 8,
+        progress=False,
+    ) -> list:
+        """Prefetch model output metadata into the cache, in parallel.
+
+        Parameters
+        ----------
+        ids : Union[str, list]
+            A model output ID, or a list of model output IDs.
+        experiment_ids : Union[str, list], optional
+            Experiment IDs to prefetch benchmarks for, by default None.
+        n : int, optional
+            Number of threads, by default 8.
+        progress : bool, optional
+            Show a progress bar, by default False.
+
+        Returns
+        -------
+        list
+            Model output IDs warmed.
+
+        Raises
+        ------
+        ValueError
+            When the cache is not enabled.
+        """
+        if self.cache is None:
+            raise ValueError("The metadata cache is not enabled.")
+
+        ids = mu.ensure_list(ids)
+        experiment_ids = mu.ensure_list(experiment_ids) if experiment_ids else list()
+
+        return meop.parallelise(
+            self._warm_cache,
+            max(1, min(n, len(ids))),
+            progress=progress,
+            threads=True,
+            id=ids,
+            experiment_ids=[experiment_ids] * len(ids),
+        )
+
+    @mtr.traced
     def get_analysis_status(self, id: str) -> Union[dict, requests.Response]:
         """Check the status of the analysis chain.
 
@@ -637,20 +1489,53 @@ class Client:
             url_path_fields=dict(id=id),
         )
 
-    def list_endpoints(self) -> Union[dict, requests.Response]:
+    @mtr.traced
+    def list_endpoints(self, refresh: bool = False) -> Union[dict, requests.Response]:
         """List the endpoints available to the user.
 
         Paths are available at .get('paths').keys()
 
+        Parameters
+        ----------
+        refresh : bool, optional
+            Fetch from the server even if the cached specification is fresh, by default False.
+
         Returns
         -------
         Union[dict, requests.Response]
-            Response from ME.org.
+            Response from ME.org, or the cached specification.
+        """
+        if self.spec is not None and not refresh and not self.spec.is_stale():
+            return self.spec.spec
+
+        response = self._make_request(method=mcc.HTTP_GET, endpoint=endpoints.ENDPOINT_LIST)
+
+        if self.spec is not None and msp.is_spec(response):
+            self.spec.save(response)
+
+        return response
+
+    def _fetch_spec(self, url: str) -> dict:
+        """Fetch the specification for the cache to refresh itself with, in the
+        background of the user's requests: not through hooks, statistics, circuit
+        breakers or a transcript, nor at all through a custom transport."""
+        if self.transport is not None:
+            return None
+        return msp.fetch_spec(url, self.session)
+
+    def stats(self) -> dict:
+        """Get per-endpoint request statistics.
+
+        Returns
+        -------
+        dict
+            Endpoint templates mapped to dicts of count, errors, retries, bytes_sent,
+            bytes_received, statuses, mean, max, p50, p95 and p99 (latencies in seconds).
         """
-        return self._make_request(method=mcc.HTTP_GET, endpoint=endpoints.ENDPOINT_LIST)
+        return self.request_stats.to_dict() if self.request_stats is not None else dict()
 
     def success(self) -> bool:
-        """Test if the last request was successful.
+        """Test if the last request (of the calling thread) was successful.
 
         Returns
         -------
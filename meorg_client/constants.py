@@ -19,3 +19,48 @@ HTTP_STATUS_SUCCESS_RANGE = range(200, 300)
 
 # Production URL
 MEORG_BASE_URL_PROD = "https://modelevaluation.org/api"
+
+# Digest computed over uploaded file bytes as they are sent
+UPLOAD_HASH_ALGORITHM = "sha256"
+
+# Keys of a server-reported digest in an uploaded file record (in order of preference),
+# only compared when the digest is explicitly of UPLOAD_HASH_ALGORITHM (by its key, or
+# an "algorithm:" prefix)
+UPLOAD_CHECKSUM_KEYS = [UPLOAD_HASH_ALGORITHM, "checksum"]
+
+# Bytes read from disk at a time when streaming uploads
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Maximum bytes per upload request (server limit is 12 GB per request)
+UPLOAD_BATCH_MAX_BYTES = 12 * 1000**3
+
+# Seconds to wait for a connection, and between bytes of a response
+CONNECT_TIMEOUT = 10
+READ_TIMEOUT = 300
+
+# Retries of failed requests, with exponential backoff (seconds) capped at a maximum
+RETRIES = 2
+RETRY_BACKOFF = 0.5
+RETRY_BACKOFF_MAX = 10
+
+# Responses that are worth retrying
+RETRY_STATUS_CODES = [502, 503, 504]
+
+# Connections kept open per host, shared by all threads using a client
+HTTP_POOL_SIZE = 32
+
+# Profiling modes (meorg --profile), the first is the default
+PROFILE_MODES = ["cpu", "wall", "memory"]
+
+# Benchmark suites, timed runs of each case, and the relative increase in time or
+# memory reported as a regression (meorg bench)
+BENCH_SUITES = ["upload", "metadata", "delete"]
+BENCH_REPEAT = 3
+BENCH_THRESHOLD = 0.1
+
+# Seconds per load step, threads sending requests at a target rate, bytes of the
+# uploaded file and the error rate past which a server is saturated (meorg loadtest)
+LOADTEST_DURATION = 30
+LOADTEST_MAX_WORKERS = 64
+LOADTEST_FILE_SIZE = 1024**2
+LOADTEST_MAX_ERROR_RATE = 0.01
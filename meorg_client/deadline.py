@@ -0,0 +1,109 @@
+"""Deadlines for operations spanning several requests."""
+
+import contextvars
+import time
+from contextlib import contextmanager
+import meorg_client.exceptions as mx
+
+# Deadline of the operation in progress, if any
+_current = contextvars.ContextVar("meorg_deadline", default=None)
+
+
+class Deadline:
+    """A point in (wall clock) time by which an operation must finish.
+
+    Wall clock time is used so that a deadline means the same in other processes.
+
+    Parameters
+    ----------
+    seconds : float
+        Seconds from now.
+    """
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.at = time.time() + seconds
+
+    def remaining(self) -> float:
+        """Get the seconds remaining (negative once expired)."""
+        return self.at - time.time()
+
+    def check(self, what: str = "Operation"):
+        """Raise if the deadline has passed.
+
+        Parameters
+        ----------
+        what : str, optional
+            Description of the work that is out of time, by default "Operation".
+
+        Raises
+        ------
+        mx.DeadlineExceededException
+            When the deadline has passed.
+        """
+        if self.remaining() <= 0:
+            raise mx.DeadlineExceededException(
+                f"{what} did not finish within the {self.seconds:g}s deadline."
+            )
+
+    def timeout(self, connect: float, read: float) -> tuple:
+        """Limit (connect, read) timeouts to the time remaining.
+
+        Parameters
+        ----------
+        connect : float
+            Connect timeout in seconds, None for no timeout.
+        read : float
+            Read timeout in seconds, None for no timeout.
+
+        Returns
+        -------
+        tuple
+            (connect, read) timeouts.
+        """
+        remaining = max(self.remaining(), 0.001)
+        return tuple(remaining if t is None else min(t, remaining) for t in (connect, read))
+
+
+def current() -> Deadline:
+    """Get the deadline of the operation in progress.
+
+    Returns
+    -------
+    Deadline
+        Deadline, or None.
+    """
+    return _current.get()
+
+
+def earliest(*deadlines: Deadline) -> Deadline:
+    """Get the earliest of some deadlines, ignoring None."""
+    deadlines = [d for d in deadlines if d is not None]
+    return min(deadlines, key=lambda d: d.at) if deadlines else None
+
+
+@contextmanager
+def deadline(seconds):
+    """Apply a deadline to every request made within the context.
+
+    Nested deadlines cannot extend an enclosing one.
+
+    Parameters
+    ----------
+    seconds : Union[float, Deadline]
+        Seconds from now, an existing Deadline, or None for no (additional) deadline.
+
+    Yields
+    ------
+    Deadline
+        Deadline in effect, or None.
+    """
+    if seconds is not None and not isinstance(seconds, Deadline):
+        seconds = Deadline(seconds)
+
+    effective = earliest(_current.get(), seconds)
+    token = _current.set(effective)
+    try:
+        yield effective
+    finally:
+        _current.reset(token)
@@ -11,6 +11,8 @@ LOGOUT = "logout"
 FILE_LIST = "modeloutput/{id}/files"
 FILE_UPLOAD = FILE_LIST
 FILE_DELETE = "modeloutput/{id}/files/{fileId}"
+# Provisional, not in the published specification
+FILE_ATTACH = "modeloutput/{id}/files/attach"
 FILE_STATUS = "files/status/{id}"
 
 # Analysis
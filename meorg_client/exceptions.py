@@ -30,3 +30,86 @@ class InvalidHTTPMethodException(Exception):
 
     def __init__(self, method):
         super().__init__(f"Invalid HTTP Method {method}.")
+
+
+class FileValidationException(Exception):
+    """Raised when files fail pre-flight validation.
+
+    Parameters
+    ----------
+    errors : dict
+        Filepaths mapped to lists of problems.
+    """
+
+    def __init__(self, errors):
+        self.errors = errors
+        lines = [f"{fp}: {'; '.join(problems)}" for fp, problems in errors.items()]
+        self.msg = "File validation failed:\n" + "\n".join(lines)
+        super().__init__(self.msg)
+
+
+class ChecksumMismatchException(Exception):
+    """Raised when the server-reported checksum of an upload does not match.
+
+    Parameters
+    ----------
+    filename : str
+        Name of the uploaded file.
+    local : str
+        Digest computed while uploading.
+    remote : str
+        Digest reported by the server.
+    """
+
+    def __init__(self, filename, local, remote):
+        self.filename = filename
+        self.local = local
+        self.remote = remote
+        self.msg = f"Checksum mismatch for {filename}: sent {local}, server reported {remote}."
+        super().__init__(self.msg)
+
+
+class RequestValidationException(Exception):
+    """Raised when a request does not conform to the API specification.
+
+    Parameters
+    ----------
+    msg : str
+        Description of the problem.
+    """
+
+    def __init__(self, msg):
+        self.msg = msg
+        super().__init__(self.msg)
+
+
+class CircuitOpenException(Exception):
+    """Raised instead of sending a request while the endpoint's circuit is open.
+
+    Parameters
+    ----------
+    endpoint : str
+        URL template of the endpoint.
+    retry_after : float
+        Seconds until a trial request is allowed.
+    """
+
+    def __init__(self, endpoint, retry_after):
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+        self.msg = f"Circuit open for {endpoint} after repeated failures, retry in {retry_after:.0f}s."
+        super().__init__(self.msg)
+
+
+class DeadlineExceededException(Exception):
+    """Raised when an operation runs out of time.
+
+    Parameters
+    ----------
+    msg : str
+        Description of what was not done in time.
+    """
+
+    def __init__(self, msg):
+        self.msg = msg
+        super().__init__(self.msg)
@@ -0,0 +1,777 @@
+"""In-process fake ME.org server, with injected latency, bandwidth limits and faults,
+to exercise the client offline (tests, benchmarks and load tests)."""
+
+import collections
+import hashlib
+import json
+import random
+import re
+import secrets
+import socket
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+import meorg_client.constants as mcc
+import meorg_client.endpoints as endpoints
+import meorg_client.utilities as mu
+from meorg_client.client import Client
+
+# Credentials the fake server accepts (any are, these are for convenience)
+EMAIL = "user@example.com"
+PASSWORD = "password"
+
+# Status polls before a started analysis completes
+ANALYSIS_POLLS = 2
+
+# Seconds clients are asked to wait after a 429
+RETRY_AFTER = 1
+
+# Kinds of injected faults
+DROP = "drop"
+THROTTLE = "throttle"
+ERROR = "error"
+
+# Alphabet of generated IDs, so they resolve as IDs rather than names
+_ID_CHARS = "23456789ABCDEFGHJKLMNPQRSTWXYZabcdefghijkmnopqrstuvwxyz"
+
+# Endpoints served without authentication
+_PUBLIC = [endpoints.ENDPOINT_LIST, endpoints.LOGIN]
+
+
+def _new_id() -> str:
+    return "".join(secrets.choice(_ID_CHARS) for _ in range(17))
+
+
+def _compile(template: str) -> re.Pattern:
+    """Compile an endpoint template into a pattern capturing its path fields."""
+    pattern = re.sub(r"\\\{(\w+)\\\}", r"(?P<\1>[^/]+)", re.escape(template))
+    return re.compile(f"^{pattern}$")
+
+
+def _unquote(value: str) -> str:
+    """Reverse the quoting of a multipart header parameter value."""
+    return (
+        value.replace("%0A", "\n")
+        .replace("%0D", "\r")
+        .replace("%22", '"')
+        .replace("\\\\", "\\")
+    )
+
+
+class _Body:
+    """Request body of a fixed length (or chunked), read at a limited bandwidth."""
+
+    def __init__(self, handler: "_Handler"):
+        self.handler = handler
+        self.chunked = "chunked" in handler.headers.get("Transfer-Encoding", "")
+        self.remaining = int(handler.headers.get("Content-Length") or 0)
+        self.done = not self.chunked and not self.remaining
+
+    def read(self, size: int = mcc.UPLOAD_CHUNK_SIZE) -> bytes:
+        if self.done:
+            return b""
+
+        rfile = self.handler.rfile
+        if self.chunked:
+            if not self.remaining:
+                self.remaining = int(rfile.readline().split(b";")[0], 16)
+                if not self.remaining:
+                    # Trailers, up to the final blank line
+                    while rfile.readline().strip():
+                        pass
+                    self.done = True
+                    return b""
+            chunk = rfile.read(min(size, self.remaining))
+            self.remaining -= len(chunk)
+            if not self.remaining:
+                rfile.readline()
+        else:
+            chunk = rfile.read(min(size, self.remaining))
+            self.remaining -= len(chunk)
+            self.done = not self.remaining or not chunk
+
+        self.handler.throttle(len(chunk))
+        return chunk
+
+    def drain(self):
+        while self.read():
+            pass
+
+
+def _read_multipart(body: _Body, boundary: str) -> list:
+    """Read a multipart body, hashing the parts rather than keeping them.
+
+    Returns
+    -------
+    list
+        One dict of name, size and sha256 per part.
+    """
+    delimiter = b"\r\n--" + boundary.encode("utf-8")
+
+    # The first delimiter has no leading line break
+    buffer = b"\r\n"
+    parts, part = list(), None
+
+    while True:
+        chunk = body.read()
+        buffer += chunk
+
+        while True:
+            if part is None:
+                i = buffer.find(delimiter)
+                j = i + len(delimiter)
+                if i < 0 or len(buffer) < j + 2:
+                    break
+
+                # Closing delimiter
+                if buffer[j : j + 2] == b"--":
+                    body.drain()
+                    return parts
+
+                end = buffer.find(b"\r\n\r\n", j)
+                if end < 0:
+                    break
+                headers = buffer[j:end].decode("utf-8", "replace")
+                match = re.search(r'filename="([^"]*)"', headers)
+                name = _unquote(match.group(1)) if match else None
+                part = dict(name=name, size=0, hash=hashlib.sha256())
+                buffer = buffer[end + 4 :]
+
+            else:
+                i = buffer.find(delimiter)
+
+                # Hold back what may be the start of a delimiter
+                cut = max(len(buffer) - len(delimiter), 0) if i < 0 else i
+                part["size"] += cut
+                part["hash"].update(buffer[:cut])
+                buffer = buffer[cut:]
+                if i < 0:
+                    break
+
+                parts.append(part)
+                part = None
+
+        if not chunk:
+            return parts
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Handler of one connection, dispatching to the routes of the fake server."""
+
+    protocol_version = "HTTP/1.1"
+    server_version = "FakeMEorg"
+
+    def setup(self):
+        super().setup()
+        # Headers and body are written separately, which Nagle would delay
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._dispatch()
+
+    do_POST = do_PUT = do_PATCH = do_DELETE = do_GET
+
+    def throttle(self, size: int):
+        """Wait out the transfer of size bytes at the bandwidth of the server."""
+        bandwidth = self.server.fake.bandwidth
+        if bandwidth:
+            self._transferred += size
+            ahead = self._transferred / bandwidth - (time.perf_counter() - self._start)
+            if ahead > 0:
+                time.sleep(ahead)
+
+    def _dispatch(self):
+        self._start = time.perf_counter()
+        self._transferred = 0
+        fake = self.server.fake
+
+        url = urlsplit(self.path)
+        path = url.path[len(fake.prefix) :].strip("/")
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        body = _Body(self)
+
+        route, fields = fake.match(self.command, path)
+        endpoint = route[1] if route else None
+
+        with fake._lock:
+            fake.hits[(self.command, endpoint)] += 1
+
+        fault = fake.fault(endpoint)
+        if fault is not None:
+            with fake._lock:
+                fake.faults[fault] += 1
+
+        # Hang up without a response
+        if fault == DROP:
+            self.close_connection = True
+            self.connection.shutdown(socket.SHUT_RDWR)
+            return
+
+        if fault == THROTTLE:
+            body.drain()
+            self._reply(
+                429,
+                dict(status="error", message="Too many requests."),
+                {"Retry-After": str(fake.retry_after)},
+            )
+            return
+
+        if fault == ERROR:
+            body.drain()
+            self._reply(503, dict(status="error", message="Service unavailable."))
+            return
+
+        if route is None:
+            body.drain()
+            self._reply(404, dict(status="error", message="API endpoint does not exist."))
+            return
+
+        method, endpoint, func = route
+        if endpoint not in _PUBLIC and not fake.authenticated(self.headers):
+            body.drain()
+            self._reply(
+                401, dict(status="error", message="You must be logged in to do this.")
+            )
+            return
+
+        # Multipart uploads are read by their route, as they are streamed
+        content_type = self.headers.get("Content-Type", "")
+        payload = None
+        if not content_type.startswith("multipart/"):
+            raw = b"".join(iter(body.read, b""))
+            payload = _decode(raw, content_type)
+
+        status, response = func(
+            dict(
+                fields=fields,
+                query=query,
+                json=payload,
+                body=body,
+                headers=self.headers,
+            )
+        )
+        body.drain()
+
+        if fake.latency or fake.jitter:
+            time.sleep(fake.latency + fake.uniform(0, fake.jitter))
+
+        self._reply(status, response)
+
+    def _reply(self, status: int, response: dict, headers: dict = dict()):
+        content = json.dumps(response).encode("utf-8")
+        etag = f'"{hashlib.sha1(content).hexdigest()[:16]}"'
+
+        # Revalidated reads transfer nothing
+        if (
+            self.command == mcc.HTTP_GET
+            and status == 200
+            and self.headers.get("If-None-Match") == etag
+        ):
+            status, content = 304, b""
+
+        self.send_response(status)
+        for k, v in headers.items():
+            self.send_header(k, v)
+        if self.command == mcc.HTTP_GET and status in (200, 304):
+            self.send_header("ETag", etag)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        if status >= 400:
+            # The request body may not have been read in full
+            self.send_header("Connection", "close")
+            self.close_connection = True
+        self.end_headers()
+
+        for i in range(0, len(content), mcc.UPLOAD_CHUNK_SIZE):
+            chunk = content[i : i + mcc.UPLOAD_CHUNK_SIZE]
+            self.throttle(len(chunk))
+            self.wfile.write(chunk)
+
+
+def _decode(raw: bytes, content_type: str):
+    if not raw:
+        return dict()
+    if "x-www-form-urlencoded" in content_type:
+        return {k: v[0] for k, v in parse_qs(raw.decode("utf-8")).items()}
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return dict()
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def handle_error(self, request, client_address):
+        # Clients hanging up (i.e. on a timeout) are expected
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def _success(**data) -> tuple:
+    return 200, dict(status="success", data=data)
+
+
+def _not_found(what: str) -> tuple:
+    return 404, dict(status="error", message=f"{what} not found.")
+
+
+class FakeServer:
+    """In-process fake of the ME.org API, on a local port.
+
+    Implements every endpoint of meorg_client.endpoints against in-memory state.
+    Any credentials log in. Faults are injected per request, with the given
+    probabilities, before the request is handled: a dropped connection, a 429
+    with Retry-After, or a 503.
+
+    Parameters
+    ----------
+    latency : float, optional
+        Seconds added to every handled request, by default 0.
+    jitter : float, optional
+        Up to this many seconds added at random to the latency, by default 0.
+    bandwidth : float, optional
+        Bytes per second each request and response is transferred at, by default
+        None (unlimited).
+    error_rate : float, optional
+        Probability of a 503, by default 0.
+    throttle_rate : float, optional
+        Probability of a 429, by default 0.
+    drop_rate : float, optional
+        Probability of dropping the connection without a response, by default 0.
+    fault_endpoints : list, optional
+        Endpoint templates (from meorg_client.endpoints) to inject faults on, by
+        default None (all).
+    retry_after : int, optional
+        Seconds in the Retry-After header of a 429, by default RETRY_AFTER.
+    analysis_polls : int, optional
+        Status polls before an analysis completes, by default ANALYSIS_POLLS.
+    seed : int, optional
+        Seed of the faults and jitter, for reproducible runs, by default None.
+    host : str, optional
+        Address to listen on, by default "127.0.0.1".
+    port : int, optional
+        Port to listen on, by default 0 (any free port).
+    """
+
+    def __init__(
+        self,
+        latency: float = 0,
+        jitter: float = 0,
+        bandwidth: float = None,
+        error_rate: float = 0,
+        throttle_rate: float = 0,
+        drop_rate: float = 0,
+        fault_endpoints: list = None,
+        retry_after: int = RETRY_AFTER,
+        analysis_polls: int = ANALYSIS_POLLS,
+        seed: int = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.bandwidth = bandwidth
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.drop_rate = drop_rate
+        self.fault_endpoints = fault_endpoints
+        self.retry_after = retry_after
+        self.analysis_polls = analysis_polls
+        self.host = host
+        self.port = port
+        self.prefix = "/api"
+
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+        self._server = None
+        self._thread = None
+
+        # Requests by (method, endpoint), endpoint None when unknown, and faults by kind
+        self.hits = collections.Counter()
+        self.faults = collections.Counter()
+
+        # In-memory state
+        self.tokens = dict()
+        self.model_outputs = dict()
+        self.files = dict()
+        self.analyses = dict()
+
+        self.routes = [
+            (method, endpoint, _compile(endpoint), func)
+            for method, endpoint, func in [
+                (mcc.HTTP_GET, endpoints.ENDPOINT_LIST, self._list_endpoints),
+                (mcc.HTTP_POST, endpoints.LOGIN, self._login),
+                (mcc.HTTP_POST, endpoints.LOGOUT, self._logout),
+                (mcc.HTTP_GET, endpoints.FILE_LIST, self._list_files),
+                (mcc.HTTP_POST, endpoints.FILE_UPLOAD, self._upload_files),
+                (mcc.HTTP_POST, endpoints.FILE_ATTACH, self._attach_files),
+                (mcc.HTTP_DELETE, endpoints.FILE_DELETE, self._delete_file),
+                (mcc.HTTP_GET, endpoints.FILE_STATUS, self._file_status),
+                (mcc.HTTP_PUT, endpoints.ANALYSIS_START, self._start_analysis),
+                (mcc.HTTP_GET, endpoints.ANALYSIS_STATUS, self._analysis_status),
+                (mcc.HTTP_GET, endpoints.MODEL_OUTPUT_QUERY, self._query),
+                (mcc.HTTP_POST, endpoints.MODEL_OUTPUT_CREATE, self._create),
+                (mcc.HTTP_PATCH, endpoints.MODEL_OUTPUT_UPDATE, self._update),
+                (mcc.HTTP_DELETE, endpoints.MODEL_OUTPUT_DELETE, self._delete),
+                (mcc.HTTP_GET, endpoints.MODEL_OUTPUT_BENCHMARKS, self._benchmarks),
+                (
+                    mcc.HTTP_PATCH,
+                    endpoints.MODEL_OUTPUT_BENCHMARKS,
+                    self._replace_benchmarks,
+                ),
+                (
+                    mcc.HTTP_PATCH,
+                    endpoints.MODEL_OUTPUT_EXPERIMENTS,
+                    self._extend_experiments,
+                ),
+                (
+                    mcc.HTTP_DELETE,
+                    endpoints.MODEL_OUTPUT_EXPERIMENTS,
+                    self._delete_experiment,
+                ),
+            ]
+        ]
+
+    def __enter__(self) -> "FakeServer":
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    @property
+    def base_url(self) -> str:
+        """Base URL of the API, i.e. for MEORG_BASE_URL_DEV."""
+        return f"http://{self.host}:{self.port}{self.prefix}"
+
+    def start(self) -> "FakeServer":
+        """Start serving in a background thread.
+
+        Returns
+        -------
+        FakeServer
+            The server, with the port it listens on.
+        """
+        self._server = _Server((self.host, self.port), _Handler)
+        self._server.fake = self
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="meorg-fake-server", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = None
+
+    def serve_forever(self):
+        """Serve until interrupted, starting if not already."""
+        if self._server is None:
+            self.start()
+        try:
+            while self._thread.is_alive():
+                self._thread.join(0.5)
+        finally:
+            self.stop()
+
+    def client(self, **kwargs) -> Client:
+        """Get a client of the server, logged in.
+
+        Parameters
+        ----------
+        **kwargs :
+            Arguments to Client, other than the credentials.
+
+        Returns
+        -------
+        Client
+            Client.
+        """
+        client = Client(**kwargs)
+        client.base_url = self.base_url
+        client.login(EMAIL, PASSWORD)
+        return client
+
+    def uniform(self, a: float, b: float) -> float:
+        with self._lock:
+            return self._random.uniform(a, b)
+
+    def fault(self, endpoint: str) -> str:
+        """Draw the fault to inject into a request, if any.
+
+        Parameters
+        ----------
+        endpoint : str
+            Endpoint template, None when unknown.
+
+        Returns
+        -------
+        str
+            DROP, THROTTLE, ERROR or None.
+        """
+        if self.fault_endpoints is not None and endpoint not in self.fault_endpoints:
+            return None
+
+        with self._lock:
+            draw = self._random.random()
+
+        for kind, rate in [
+            (DROP, self.drop_rate),
+            (THROTTLE, self.throttle_rate),
+            (ERROR, self.error_rate),
+        ]:
+            if draw < rate:
+                return kind
+            draw -= rate
+        return None
+
+    def match(self, method: str, path: str) -> tuple:
+        """Match a request to a route.
+
+        Returns
+        -------
+        tuple
+            (method, endpoint, handler) and the path fields, or (None, None).
+        """
+        for _method, endpoint, pattern, func in self.routes:
+            match = pattern.match(path)
+            if _method == method and match:
+                return (_method, endpoint, func), match.groupdict()
+        return None, None
+
+    def authenticated(self, headers) -> bool:
+        user_id = headers.get("X-User-Id")
+        with self._lock:
+            return user_id is not None and self.tokens.get(
+                headers.get("X-Auth-Token")
+            ) == user_id
+
+    # Routes, each taking the request (fields, query, json, body, headers) and
+    # returning the status and response
+
+    def _list_endpoints(self, request: dict) -> tuple:
+        return 200, mu.load_package_data(endpoints.ENDPOINT_LIST)
+
+    def _login(self, request: dict) -> tuple:
+        email = (request["json"] or dict()).get("email")
+        if not email:
+            return 401, dict(status="error", message="Unauthorized")
+
+        user_id = hashlib.sha256(email.encode("utf-8")).hexdigest()[:17]
+        token = secrets.token_urlsafe(32)
+        with self._lock:
+            self.tokens[token] = user_id
+        return _success(userId=user_id, authToken=token)
+
+    def _logout(self, request: dict) -> tuple:
+        with self._lock:
+            self.tokens.pop(request["headers"].get("X-Auth-Token"), None)
+        return 200, dict(status="success", data=dict(message="You've been logged out!"))
+
+    def _record(self, id: str) -> dict:
+        return {k: v for k, v in self.model_outputs[id].items() if k != "files"}
+
+    def _list_files(self, request: dict) -> tuple:
+        id = request["fields"]["id"]
+        with self._lock:
+            if id not in self.model_outputs:
+                return _not_found("Model output")
+            files = [
+                dict(id=f, name=self.files[f]["name"])
+                for f in self.model_outputs[id]["files"]
+            ]
+        return _success(files=files)
+
+    def _upload_files(self, request: dict) -> tuple:
+        id = request["fields"]["id"]
+        content_type = request["headers"].get("Content-Type", "")
+        match = re.search(r"boundary=\"?([^\";]+)", content_type)
+        if match is None:
+            return 400, dict(status="error", message="Expected a multipart upload.")
+
+        parts = _read_multipart(request["body"], match.group(1))
+
+        with self._lock:
+            if id not in self.model_outputs:
+                return _not_found("Model output")
+
+            files = list()
+            for part in parts:
+                file_id = _new_id()
+                sha256 = part["hash"].hexdigest()
+                self.files[file_id] = dict(
+                    id=file_id, name=part["name"], size=part["size"], sha256=sha256
+                )
+                self.model_outputs[id]["files"].append(file_id)
+                files.append(
+                    dict(file=file_id, id=file_id, name=part["name"], sha256=sha256)
+                )
+
+        return _success(files=files)
+
+    def _attach_files(self, request: dict) -> tuple:
+        id = request["fields"]["id"]
+        file_ids = mu.ensure_list((request["json"] or dict()).get("files") or list())
+        with self._lock:
+            if id not in self.model_outputs:
+                return _not_found("Model output")
+            missing = [f for f in file_ids if f not in self.files]
+            if missing:
+                return _not_found(f"File {missing[0]}")
+            attached = self.model_outputs[id]["files"]
+            attached.extend(f for f in file_ids if f not in attached)
+        return _success(files=file_ids)
+
+    def _delete_file(self, request: dict) -> tuple:
+        id, file_id = request["fields"]["id"], request["fields"]["fileId"]
+        with self._lock:
+            files = self.model_outputs.get(id, dict()).get("files", list())
+            if file_id not in files:
+                return _not_found("File")
+            files.remove(file_id)
+        return 200, dict(status="success")
+
+    def _file_status(self, request: dict) -> tuple:
+        with self._lock:
+            if request["fields"]["id"] not in self.files:
+                return _not_found("File")
+        return _success(status="complete")
+
+    def _start_analysis(self, request: dict) -> tuple:
+        id = request["fields"]["id"]
+        with self._lock:
+            if id not in self.model_outputs:
+                return _not_found("Model output")
+            analysis_id = _new_id()
+            self.analyses[analysis_id] = dict(
+                modeloutput=id, experiment=request["fields"]["expid"], polls=0
+            )
+        return _success(analysisId=analysis_id)
+
+    def _analysis_status(self, request: dict) -> tuple:
+        id = request["fields"]["id"]
+        with self._lock:
+            analysis = self.analyses.get(id)
+            if analysis is None:
+                return _not_found("Analysis")
+            analysis["polls"] += 1
+            polls = analysis["polls"]
+
+        if polls <= self.analysis_polls:
+            status = "pending" if polls == 1 else "running"
+            return _success(status=status, url=None)
+        url = f"http://{self.host}:{self.port}/analysis/{id}"
+        return _success(status="complete", url=url)
+
+    def _query(self, request: dict) -> tuple:
+        query = request["query"]
+        with self._lock:
+            if "id" in query:
+                id = query["id"] if query["id"] in self.model_outputs else None
+            else:
+                id = next(
+                    (
+                        k
+                        for k, v in self.model_outputs.items()
+                        if v["name"] == query.get("name")
+                    ),
+                    None,
+                )
+            if id is None:
+                return _not_found("Model output")
+            return _success(modeloutput=self._record(id))
+
+    def _create(self, request: dict) -> tuple:
+        fields = dict(request["json"] or dict())
+        name = fields.get("name")
+        if not name or not fields.get("model"):
+            return 400, dict(status="error", message="A model and name are required.")
+
+        with self._lock:
+            # Names are unique, an existing model output is overwritten
+            id = next(
+                (k for k, v in self.model_outputs.items() if v["name"] == name), None
+            )
+            existing = id is not None
+            id = id or _new_id()
+            self.model_outputs[id] = dict(
+                fields, id=id, files=list(), experiments=list(), benchmarks=dict()
+            )
+
+        # As the server does, only an overwritten model output is flagged as existing
+        if existing:
+            return _success(modeloutput=id, existing=True)
+        return _success(modeloutput=id)
+
+    def _update(self, request: dict) -> tuple:
+        id = request["fields"]["id"]
+        with self._lock:
+            if id not in self.model_outputs:
+                return _not_found("Model output")
+            self.model_outputs[id].update(
+                {
+                    k: v
+                    for k, v in (request["json"] or dict()).items()
+                    if k not in ("id", "files")
+                }
+            )
+            return _success(modeloutput=self._record(id))
+
+    def _delete(self, request: dict) -> tuple:
+        with self._lock:
+            if self.model_outputs.pop(request["fields"]["id"], None) is None:
+                return _not_found("Model output")
+        return 200, dict(status="success")
+
+    def _benchmarks(self, request: dict) -> tuple:
+        id, exp_id = request["fields"]["id"], request["fields"]["expId"]
+        with self._lock:
+            if id not in self.model_outputs:
+                return _not_found("Model output")
+            benchmarks = [
+                dict(id=k, name=v["name"])
+                for k, v in self.model_outputs.items()
+                if k != id and exp_id in v["experiments"]
+            ]
+            current = list(self.model_outputs[id]["benchmarks"].get(exp_id, list()))
+        return _success(benchmarks=benchmarks, current=current)
+
+    def _replace_benchmarks(self, request: dict) -> tuple:
+        id, exp_id = request["fields"]["id"], request["fields"]["expId"]
+        benchmarks = (request["json"] or dict()).get("benchmarks") or list()
+        with self._lock:
+            if id not in self.model_outputs:
+                return _not_found("Model output")
+            self.model_outputs[id]["benchmarks"][exp_id] = list(benchmarks)
+        return 200, dict(status="success")
+
+    def _extend_experiments(self, request: dict) -> tuple:
+        id = request["fields"]["id"]
+        experiments = (request["json"] or dict()).get("experiments") or list()
+        with self._lock:
+            if id not in self.model_outputs:
+                return _not_found("Model output")
+            current = self.model_outputs[id]["experiments"]
+            current.extend(e for e in experiments if e not in current)
+        return 200, dict(status="success")
+
+    def _delete_experiment(self, request: dict) -> tuple:
+        id = request["fields"]["id"]
+        experiment = (request["json"] or dict()).get("experiment")
+        with self._lock:
+            current = self.model_outputs.get(id, dict()).get("experiments")
+            if current is None or experiment not in current:
+                return _not_found("Experiment")
+            current.remove(experiment)
+        return 200, dict(status="success")
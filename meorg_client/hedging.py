@@ -0,0 +1,205 @@
+"""Hedged requests, to cut the tail latency of idempotent reads."""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+
+# Percentile of recent latencies after which a hedge is sent
+DEFAULT_PERCENTILE = 95
+
+# Hedges allowed per request, i.e. at most 10% extra load
+DEFAULT_BUDGET = 0.1
+
+# Maximum number of hedges that can be saved up from the budget
+DEFAULT_BURST = 10
+
+# Number of recent latencies kept per endpoint, and needed before hedging
+DEFAULT_WINDOW = 100
+DEFAULT_MIN_SAMPLES = 20
+
+# Never hedge sooner than this (seconds)
+DEFAULT_MIN_DELAY = 0.05
+
+
+class Hedger:
+    """Sends a second, identical request when the first has not answered by an
+    adaptive percentile of recent latencies, and returns whichever answers first
+    without a server error.
+
+    Latencies are tracked per key (i.e. endpoint). Hedges are drawn from a global
+    budget that accrues with every request, which bounds the extra load. Calls that
+    cannot be hedged are made on the calling thread.
+
+    Parameters
+    ----------
+    percentile : float, optional
+        Latency percentile after which to hedge, by default DEFAULT_PERCENTILE.
+    budget : float, optional
+        Hedges allowed per request, by default DEFAULT_BUDGET.
+    burst : float, optional
+        Maximum hedges saved up from the budget, by default DEFAULT_BURST.
+    window : int, optional
+        Number of recent latencies kept per key, by default DEFAULT_WINDOW.
+    min_samples : int, optional
+        Number of latencies required before hedging a key, by default DEFAULT_MIN_SAMPLES.
+    min_delay : float, optional
+        Minimum delay (seconds) before hedging, by default DEFAULT_MIN_DELAY.
+    """
+
+    def __init__(
+        self,
+        percentile: float = DEFAULT_PERCENTILE,
+        budget: float = DEFAULT_BUDGET,
+        burst: float = DEFAULT_BURST,
+        window: int = DEFAULT_WINDOW,
+        min_samples: int = DEFAULT_MIN_SAMPLES,
+        min_delay: float = DEFAULT_MIN_DELAY,
+    ):
+        self.percentile = percentile
+        self.budget = budget
+        self.burst = burst
+        self.window = window
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self._reset()
+
+    def _reset(self):
+        self._lock = threading.Lock()
+        self.latencies = dict()
+        self.tokens = 0.0
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    def __getstate__(self) -> dict:
+        # Locks cannot be pickled, latencies are local to the process
+        state = self.__dict__.copy()
+        for key in ("_lock", "latencies"):
+            state.pop(key)
+        return state
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        self._reset()
+
+    def record(self, key, seconds: float):
+        """Record the latency of a request.
+
+        Parameters
+        ----------
+        key : hashable
+            Key (i.e. endpoint).
+        seconds : float
+            Latency in seconds.
+        """
+        with self._lock:
+            if key not in self.latencies:
+                self.latencies[key] = deque(maxlen=self.window)
+            self.latencies[key].append(seconds)
+
+    def threshold(self, key) -> float:
+        """Get the delay after which a request is hedged.
+
+        Parameters
+        ----------
+        key : hashable
+            Key (i.e. endpoint).
+
+        Returns
+        -------
+        float
+            Delay in seconds, or None if there are too few latencies to tell.
+        """
+        with self._lock:
+            latencies = sorted(self.latencies.get(key, ()))
+
+        if len(latencies) < max(1, self.min_samples):
+            return None
+
+        index = min(len(latencies) - 1, int(len(latencies) * self.percentile / 100))
+        return max(self.min_delay, latencies[index])
+
+    def _acquire(self) -> bool:
+        """Take a hedge from the budget, if there is one."""
+        with self._lock:
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            self.hedged += 1
+            return True
+
+    def _timed(self, key, func: callable, args: tuple, kwargs: dict):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.record(key, time.perf_counter() - start)
+
+    def _start(self, key, func: callable, args: tuple, kwargs: dict) -> Future:
+        """Call func in its own thread, so that a slow call can be left to finish."""
+        future = Future()
+
+        def _run():
+            try:
+                future.set_result(self._timed(key, func, args, kwargs))
+            except BaseException as ex:
+                future.set_exception(ex)
+
+        threading.Thread(target=_run, name="meorg-hedge", daemon=True).start()
+        return future
+
+    @staticmethod
+    def _answered(future: Future) -> bool:
+        """Whether a call returned, and not with a server error."""
+        if future.exception() is not None:
+            return False
+        return getattr(future.result(), "status_code", 0) < 500
+
+    def call(self, key, func: callable, *args, **kwargs):
+        """Call func, hedging it with a second call if it is slow.
+
+        Parameters
+        ----------
+        key : hashable
+            Key (i.e. endpoint) to track latencies by.
+        func : callable
+            Idempotent function to call.
+        *args, **kwargs :
+            Arguments to func.
+
+        Returns
+        -------
+        mixed
+            Result of the first call to succeed without a server error (or of the
+            primary, if neither does).
+        """
+        with self._lock:
+            self.requests += 1
+            self.tokens = min(self.burst, self.tokens + self.budget)
+            affordable = self.tokens >= 1
+
+        # Nothing to wait for, so nothing is handed to another thread
+        threshold = self.threshold(key)
+        if threshold is None or not affordable:
+            return self._timed(key, func, args, kwargs)
+
+        primary = self._start(key, func, args, kwargs)
+        done, _ = wait([primary], timeout=threshold)
+        if done or not self._acquire():
+            return primary.result()
+
+        hedge = self._start(key, func, args, kwargs)
+        pending = {primary, hedge}
+
+        # Take the first answer, the slower call finishes in the background
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            winner = next((f for f in done if self._answered(f)), None)
+            if winner is None and not pending:
+                winner = primary
+            if winner is hedge:
+                with self._lock:
+                    self.hedge_wins += 1
+            if winner is not None:
+                return winner.result()
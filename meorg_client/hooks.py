@@ -0,0 +1,186 @@
+"""Hooks to observe requests and uploads made by the client."""
+
+import threading
+
+# Events
+PRE_REQUEST = "pre_request"
+POST_RESPONSE = "post_response"
+RETRY = "retry"
+UPLOAD_PROGRESS = "upload_progress"
+EVENTS = [PRE_REQUEST, POST_RESPONSE, RETRY, UPLOAD_PROGRESS]
+
+
+class Event:
+    """An event passed to hooks.
+
+    Timings are time.perf_counter() values (start) and durations in seconds, any
+    field not relevant to the event is None.
+
+    Attributes
+    ----------
+    name : str
+        One of EVENTS.
+    method : str
+        HTTP method.
+    endpoint : str
+        URL template of the endpoint (i.e. modeloutput/{id}/files).
+    url : str
+        Full URL.
+    attempt : int
+        Attempt number, starting at 0 (retries are 1 onwards).
+    start : float
+        When the attempt started.
+    first_byte : float
+        Seconds from the start until the response headers arrived.
+    duration : float
+        Seconds from the start until the response was complete, or failed.
+    status : int
+        HTTP status code.
+    bytes_sent : int
+        Size of the request body.
+    bytes_received : int
+        Size of the response body (None when streamed).
+    error : Exception
+        Exception raised by the attempt.
+    backoff : float
+        Seconds until the retry.
+    filename : str
+        Name of the file (or archive) being uploaded.
+    bytes_done : int
+        Bytes of the file sent so far.
+    bytes_total : int
+        Size of the file.
+    """
+
+    __slots__ = [
+        "name",
+        "method",
+        "endpoint",
+        "url",
+        "attempt",
+        "start",
+        "first_byte",
+        "duration",
+        "status",
+        "bytes_sent",
+        "bytes_received",
+        "error",
+        "backoff",
+        "filename",
+        "bytes_done",
+        "bytes_total",
+    ]
+
+    def __init__(self, name: str, **fields):
+        for field in self.__slots__:
+            setattr(self, field, fields.pop(field, None))
+        self.name = name
+
+        if fields:
+            raise TypeError(f"Unknown event fields {sorted(fields)}.")
+
+    def __repr__(self) -> str:
+        fields = ", ".join(
+            f"{f}={getattr(self, f)!r}"
+            for f in self.__slots__[1:]
+            if getattr(self, f) is not None
+        )
+        return f"Event({self.name!r}, {fields})"
+
+
+class Hooks:
+    """Registry of hooks by event.
+
+    Registrations replace the tuple of hooks for an event rather than modify it, so
+    emitting needs no lock, and checking for hooks before building an event is a
+    dictionary lookup.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.registered = dict.fromkeys(EVENTS, ())
+
+    def __getstate__(self) -> dict:
+        # Hooks are local to the process (and often cannot be pickled)
+        return dict()
+
+    def __setstate__(self, state: dict):
+        self.__init__()
+
+    def register(self, event: str, hook: callable):
+        """Register a hook for an event.
+
+        Parameters
+        ----------
+        event : str
+            One of EVENTS.
+        hook : callable
+            Called with an Event from the thread doing the work, so it must be quick
+            and must not raise.
+
+        Raises
+        ------
+        ValueError
+            When the event is unknown.
+        """
+        if event not in self.registered:
+            raise ValueError(f"Unknown event {event}, expected one of {EVENTS}.")
+
+        with self._lock:
+            self.registered = {**self.registered, event: self.registered[event] + (hook,)}
+
+    def unregister(self, event: str, hook: callable):
+        """Remove a hook for an event, if registered.
+
+        Parameters
+        ----------
+        event : str
+            One of EVENTS.
+        hook : callable
+            Hook to remove.
+        """
+        with self._lock:
+            hooks = tuple(h for h in self.registered.get(event, ()) if h != hook)
+            self.registered = {**self.registered, event: hooks}
+
+    def emit(self, event: str, **fields):
+        """Call the hooks for an event.
+
+        Callers on hot paths should check `registered[event]` first, to skip building
+        the fields when there are no hooks.
+
+        Parameters
+        ----------
+        event : str
+            One of EVENTS.
+        **fields :
+            Fields of the Event.
+        """
+        hooks = self.registered[event]
+        if hooks:
+            _event = Event(event, **fields)
+            for hook in hooks:
+                hook(_event)
+
+
+def get_body_size(body) -> int:
+    """Get the size of a request body without reading it.
+
+    Parameters
+    ----------
+    body : mixed
+        Prepared request body (bytes, str, stream or None).
+
+    Returns
+    -------
+    int
+        Size in bytes, or None if unknown.
+    """
+    if body is None:
+        return 0
+    if isinstance(body, str):
+        return len(body.encode("utf-8"))
+    try:
+        return len(body)
+    except TypeError:
+        return None
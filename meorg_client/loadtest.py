@@ -0,0 +1,525 @@
+"""Synthetic concurrent traffic against a ME.org server, stepping up the load to find
+where it saturates."""
+
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+import meorg_client.constants as mcc
+import meorg_client.exceptions as mx
+from meorg_client.client import Client
+
+# Operations, and the default mix of them by weight
+UPLOAD = "upload"
+QUERY = "query"
+POLL = "poll"
+OPERATIONS = [UPLOAD, QUERY, POLL]
+MIX = {UPLOAD: 1, QUERY: 5, POLL: 4}
+
+# Size of the uploaded file
+FILE_SIZE = mcc.LOADTEST_FILE_SIZE
+
+# Seconds per load step, and the concurrency levels stepped through by default
+DURATION = mcc.LOADTEST_DURATION
+CONCURRENCY = [1, 2, 4, 8, 16, 32]
+
+# Threads sending requests at a target rate, beyond which operations queue
+MAX_WORKERS = mcc.LOADTEST_MAX_WORKERS
+
+# A step is saturated past this error rate, when doubling the concurrency gains less
+# than MIN_GAIN in throughput, or when less than MIN_ACHIEVED of a target rate is
+# achieved
+MAX_ERROR_RATE = mcc.LOADTEST_MAX_ERROR_RATE
+MIN_GAIN = 0.1
+MIN_ACHIEVED = 0.9
+
+PERCENTILES = [50, 90, 95, 99]
+
+
+def parse_mix(value: str) -> dict:
+    """Parse a mix of operations.
+
+    Parameters
+    ----------
+    value : str
+        Comma-separated operation=weight pairs, i.e. "upload=1,query=5".
+
+    Returns
+    -------
+    dict
+        Operations mapped to weights, without those of weight 0.
+
+    Raises
+    ------
+    ValueError
+        When an operation is unknown, or a weight is not a non-negative number.
+    """
+    mix = dict()
+    for pair in value.split(","):
+        operation, _, weight = pair.strip().partition("=")
+        if operation not in OPERATIONS:
+            raise ValueError(f"Unknown operation {operation!r}, not one of {OPERATIONS}.")
+        mix[operation] = float(weight) if weight else 1.0
+        if mix[operation] < 0:
+            raise ValueError(f"Negative weight of {operation}.")
+
+    mix = {k: v for k, v in mix.items() if v > 0}
+    if not mix:
+        raise ValueError("The mix has no operations.")
+    return mix
+
+
+def percentile(values: list, p: float) -> float:
+    """Get a percentile of sorted values, by nearest rank.
+
+    Parameters
+    ----------
+    values : list
+        Sorted values.
+    p : float
+        Percentile (0-100).
+
+    Returns
+    -------
+    float
+        Percentile, or None when there are no values.
+    """
+    if not values:
+        return None
+    rank = max(int(-(-p * len(values) // 100)), 1)
+    return values[rank - 1]
+
+
+def _describe(ex: Exception) -> str:
+    """Get the kind of an error, i.e. "HTTP 503" or "ConnectionError"."""
+    if isinstance(ex, mx.RequestException):
+        return f"HTTP {ex.status_code}"
+    return type(ex).__name__
+
+
+def summarise(samples: list, elapsed: float) -> dict:
+    """Summarise the operations of a step.
+
+    Parameters
+    ----------
+    samples : list
+        List of (operation, latency, error) tuples, error None on success.
+    elapsed : float
+        Seconds from the start of the step until the last operation finished.
+
+    Returns
+    -------
+    dict
+        Operations, errors by kind, error rate, throughput (successful operations
+        per second) and latency percentiles, overall and per operation.
+    """
+
+    def _summary(samples: list) -> dict:
+        latencies = sorted(latency for _, latency, _ in samples)
+        errors = dict()
+        for _, _, error in samples:
+            if error is not None:
+                errors[error] = errors.get(error, 0) + 1
+        failed = sum(errors.values())
+
+        summary = dict(
+            operations=len(samples),
+            errors=errors,
+            error_rate=round(failed / len(samples), 4) if samples else 0,
+            throughput=round((len(samples) - failed) / elapsed, 3) if elapsed else 0,
+            mean=round(sum(latencies) / len(latencies), 6) if latencies else None,
+            max=round(latencies[-1], 6) if latencies else None,
+        )
+        for p in PERCENTILES:
+            value = percentile(latencies, p)
+            summary[f"p{p}"] = round(value, 6) if value is not None else None
+        return summary
+
+    summary = _summary(samples)
+    summary["elapsed"] = round(elapsed, 3)
+    summary["by_operation"] = {
+        operation: _summary([s for s in samples if s[0] == operation])
+        for operation in sorted({s[0] for s in samples})
+    }
+    return summary
+
+
+def find_saturation(
+    steps: list,
+    max_error_rate: float = MAX_ERROR_RATE,
+    max_p95: float = None,
+) -> dict:
+    """Find the first step at which the server is saturated.
+
+    Parameters
+    ----------
+    steps : list
+        Summaries of the steps, in increasing load, with "concurrency" or "rate".
+    max_error_rate : float, optional
+        Error rate beyond which a step is saturated, by default MAX_ERROR_RATE.
+    max_p95 : float, optional
+        95th percentile latency (seconds) beyond which a step is saturated, by default
+        None (any).
+
+    Returns
+    -------
+    dict
+        Whether it saturated, the first saturated step and why, and the last step
+        that was not (the highest sustained load), each None when there is none.
+    """
+    saturation = dict(saturated=False, step=None, reasons=list(), sustained=None)
+
+    previous = None
+    for i, step in enumerate(steps):
+        reasons = list()
+        if step["error_rate"] > max_error_rate:
+            reasons.append(f"error rate {step['error_rate']:.1%}")
+        if max_p95 is not None and (step["p95"] or 0) > max_p95:
+            reasons.append(f"p95 latency {step['p95']:.3f}s")
+        if step.get("rate") and step["throughput"] < MIN_ACHIEVED * step["rate"]:
+            reasons.append(
+                f"throughput {step['throughput']:.1f}/s below the target "
+                f"{step['rate']:g}/s"
+            )
+        if (
+            step.get("concurrency")
+            and previous is not None
+            and step["throughput"] < (1 + MIN_GAIN) * previous["throughput"]
+        ):
+            reasons.append(
+                f"throughput {step['throughput']:.1f}/s against "
+                f"{previous['throughput']:.1f}/s at concurrency {previous['concurrency']}"
+            )
+
+        if reasons:
+            saturation.update(saturated=True, step=i, reasons=reasons)
+            break
+
+        saturation["sustained"] = i
+        previous = step
+
+    return saturation
+
+
+class LoadTest:
+    """Mix of uploads, queries and status polls sent through a client, at stepped
+    concurrency levels or target rates.
+
+    Queries and polls target a model output and an analysis created for the test
+    (unless given), and uploads send a generated file to that model output.
+
+    Parameters
+    ----------
+    client : Client
+        Logged in client, shared by every worker thread.
+    mix : dict, optional
+        Operations mapped to weights, by default MIX.
+    file_size : int, optional
+        Bytes of the uploaded file, by default FILE_SIZE.
+    model_profile_id : str, optional
+        Model profile to create the model output for, by default None.
+    experiment_id : str, optional
+        Experiment to start the polled analysis for, by default None.
+    analysis_id : str, optional
+        Existing analysis to poll instead, by default None.
+    seed : int, optional
+        Seed of the operations drawn, by default None.
+    """
+
+    def __init__(
+        self,
+        client: Client,
+        mix: dict = MIX,
+        file_size: int = FILE_SIZE,
+        model_profile_id: str = None,
+        experiment_id: str = None,
+        analysis_id: str = None,
+        seed: int = None,
+    ):
+        self.client = client
+        self.mix = mix
+        self.file_size = file_size
+        self.model_profile_id = model_profile_id
+        self.experiment_id = experiment_id
+        self.analysis_id = analysis_id
+        self.seed = seed
+        self.model_output_id = None
+        self.filepath = None
+
+        self._operations = {
+            UPLOAD: self._upload,
+            QUERY: self._query,
+            POLL: self._poll,
+        }
+
+    def setup(self, directory: str):
+        """Create the model output, analysis and file the operations use.
+
+        Parameters
+        ----------
+        directory : str
+            Directory to write the uploaded file to.
+
+        Raises
+        ------
+        ValueError
+            When polling with neither an analysis nor an experiment to start one for.
+        """
+        if POLL in self.mix and not (self.analysis_id or self.experiment_id):
+            raise ValueError("Polling needs an analysis, or an experiment to start one.")
+
+        name = f"meorg-loadtest-{time.strftime('%Y%m%d-%H%M%S')}"
+        response = self.client.model_output_create(self.model_profile_id, name)
+        self.model_output_id = response.get("data").get("modeloutput")
+
+        if POLL in self.mix and self.analysis_id is None:
+            response = self.client.start_analysis(
+                self.model_output_id, self.experiment_id
+            )
+            self.analysis_id = response.get("data").get("analysisId")
+
+        if UPLOAD in self.mix:
+            self.filepath = os.path.join(directory, "meorg-loadtest.nc")
+            with open(self.filepath, "wb") as f:
+                f.write(os.urandom(self.file_size))
+
+    def teardown(self):
+        """Delete the model output, and with it the uploaded files."""
+        if self.model_output_id is not None:
+            self.client.model_output_delete(self.model_output_id)
+            self.model_output_id = None
+
+    def _upload(self):
+        self.client.upload_files(self.filepath, id=self.model_output_id, progress=False)
+
+    def _query(self):
+        self.client.model_output_query(self.model_output_id)
+
+    def _poll(self):
+        self.client.get_analysis_status(self.analysis_id)
+
+    def _draw(self, rng: random.Random) -> str:
+        return rng.choices(list(self.mix), weights=list(self.mix.values()))[0]
+
+    def _call(self, operation: str, start: float, samples: list):
+        """Run an operation, recording its latency from start (when it was due)."""
+        error = None
+        try:
+            self._operations[operation]()
+        except Exception as ex:
+            error = _describe(ex)
+        samples.append((operation, time.perf_counter() - start, error))
+
+    def _seeded(self, offset: int) -> random.Random:
+        return random.Random(None if self.seed is None else self.seed + offset)
+
+    def run_concurrency(self, concurrency: int, duration: float = DURATION) -> dict:
+        """Run workers that each send one operation after another (closed loop).
+
+        Parameters
+        ----------
+        concurrency : int
+            Number of workers.
+        duration : float, optional
+            Seconds to start operations for, by default DURATION.
+
+        Returns
+        -------
+        dict
+            Summary of the step.
+        """
+        samples = list()
+        start = time.perf_counter()
+        deadline = start + duration
+
+        def _worker(i: int):
+            rng = self._seeded(i)
+            while time.perf_counter() < deadline:
+                self._call(self._draw(rng), time.perf_counter(), samples)
+
+        threads = [
+            threading.Thread(target=_worker, args=(i,), name=f"meorg-loadtest-{i}")
+            for i in range(concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        return dict(
+            concurrency=concurrency,
+            **summarise(samples, time.perf_counter() - start),
+        )
+
+    def run_rate(
+        self, rate: float, duration: float = DURATION, max_workers: int = MAX_WORKERS
+    ) -> dict:
+        """Start operations at a target rate, with random (Poisson) arrivals, whether
+        or not earlier ones have finished (open loop).
+
+        Latencies are measured from when each operation was due, so time spent queued
+        for a worker counts.
+
+        Parameters
+        ----------
+        rate : float
+            Operations per second.
+        duration : float, optional
+            Seconds to start operations for, by default DURATION.
+        max_workers : int, optional
+            Most operations in progress at once, by default MAX_WORKERS.
+
+        Returns
+        -------
+        dict
+            Summary of the step.
+        """
+        samples = list()
+        rng = self._seeded(0)
+        futures = list()
+
+        with ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="meorg-loadtest"
+        ) as executor:
+            start = time.perf_counter()
+            due = start
+            while True:
+                due += rng.expovariate(rate)
+                if due - start >= duration:
+                    break
+                time.sleep(max(0, due - time.perf_counter()))
+                futures.append(
+                    executor.submit(self._call, self._draw(rng), due, samples)
+                )
+            wait(futures)
+
+        return dict(rate=rate, **summarise(samples, time.perf_counter() - start))
+
+    def run(
+        self,
+        concurrency: list = None,
+        rates: list = None,
+        duration: float = DURATION,
+        max_workers: int = MAX_WORKERS,
+        max_error_rate: float = MAX_ERROR_RATE,
+        max_p95: float = None,
+        stop_on_saturation: bool = True,
+        callback: callable = None,
+    ) -> dict:
+        """Step through concurrency levels, or target rates, to find the saturation
+        point.
+
+        Parameters
+        ----------
+        concurrency : list, optional
+            Concurrency levels, by default CONCURRENCY (when no rates are given).
+        rates : list, optional
+            Target rates (operations per second), instead of concurrency levels, by
+            default None.
+        duration : float, optional
+            Seconds of each step, by default DURATION.
+        max_workers : int, optional
+            Most operations in progress at once at a target rate, by default MAX_WORKERS.
+        max_error_rate : float, optional
+            Error rate beyond which a step is saturated, by default MAX_ERROR_RATE.
+        max_p95 : float, optional
+            95th percentile latency beyond which a step is saturated, by default None.
+        stop_on_saturation : bool, optional
+            Stop at the first saturated step, by default True.
+        callback : callable, optional
+            Called with the summary of each step as it completes, by default None.
+
+        Returns
+        -------
+        dict
+            Mix, duration, the summaries of the steps and the saturation point (see
+            find_saturation).
+        """
+        if rates:
+            loads = [(self.run_rate, dict(rate=r, max_workers=max_workers)) for r in rates]
+        else:
+            loads = [
+                (self.run_concurrency, dict(concurrency=c))
+                for c in (concurrency or CONCURRENCY)
+            ]
+
+        steps = list()
+        for func, kwargs in loads:
+            steps.append(func(duration=duration, **kwargs))
+            if callback is not None:
+                callback(steps[-1])
+
+            saturation = find_saturation(steps, max_error_rate, max_p95)
+            if saturation["saturated"] and stop_on_saturation:
+                break
+
+        return dict(
+            mix=self.mix,
+            duration=duration,
+            steps=steps,
+            saturation=find_saturation(steps, max_error_rate, max_p95),
+        )
+
+
+def format_step(step: dict) -> str:
+    """Format the summary of a step as one line.
+
+    Parameters
+    ----------
+    step : dict
+        Summary of a step.
+
+    Returns
+    -------
+    str
+        Load, operations, throughput, error rate and latency percentiles.
+    """
+    if "rate" in step:
+        load = f"rate {step['rate']:g}/s"
+    else:
+        load = f"concurrency {step['concurrency']}"
+
+    def _ms(value):
+        return "-" if value is None else f"{value * 1000:.0f}ms"
+
+    latencies = " ".join(f"p{p} {_ms(step[f'p{p}'])}" for p in PERCENTILES)
+    return (
+        f"{load:<18} {step['operations']:6d} ops {step['throughput']:8.1f}/s "
+        f"errors {step['error_rate']:6.1%}  {latencies}"
+    )
+
+
+def format_saturation(result: dict) -> str:
+    """Format the saturation point of a run.
+
+    Parameters
+    ----------
+    result : dict
+        Result of LoadTest.run.
+
+    Returns
+    -------
+    str
+        Highest sustained load, and where and why the server saturated.
+    """
+    steps, saturation = result["steps"], result["saturation"]
+
+    def _load(step):
+        return (
+            f"rate {step['rate']:g}/s"
+            if "rate" in step
+            else f"concurrency {step['concurrency']}"
+        )
+
+    lines = list()
+    if saturation["sustained"] is not None:
+        step = steps[saturation["sustained"]]
+        lines.append(f"Sustained: {_load(step)} at {step['throughput']:.1f} ops/s")
+    if saturation["saturated"]:
+        step = steps[saturation["step"]]
+        reasons = "; ".join(saturation["reasons"])
+        lines.append(f"Saturated: {_load(step)} ({reasons})")
+    else:
+        lines.append("Not saturated")
+    return "\n".join(lines)
@@ -0,0 +1,290 @@
+"""Metrics of client requests in the Prometheus text format."""
+
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import meorg_client.hooks as mhk
+import meorg_client.parallel as meop
+import meorg_client.stats as mst
+
+# Request duration histogram buckets (seconds)
+DURATION_BUCKETS = [0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 1800]
+
+# Content type of the exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _format_number(value: float) -> str:
+    return str(value) if isinstance(value, int) else repr(float(value))
+
+
+class Metrics:
+    """Counters, gauges and histograms of client requests and uploads, collected by
+    way of client hooks.
+
+    One instance may be shared by several clients.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = dict()
+        self.durations = dict()
+        self.bytes_sent = dict()
+        self.bytes_received = dict()
+        self.retries = dict()
+        self.inflight = dict()
+        self.uploaded = 0
+        self._uploads = dict()
+
+    def __getstate__(self) -> dict:
+        # Metrics are local to the process
+        return dict()
+
+    def __setstate__(self, state: dict):
+        self.__init__()
+
+    def attach(self, hooks: mhk.Hooks):
+        """Register with the hooks of a client.
+
+        Parameters
+        ----------
+        hooks : mhk.Hooks
+            Client hooks.
+        """
+        hooks.register(mhk.PRE_REQUEST, self.on_request)
+        hooks.register(mhk.POST_RESPONSE, self.on_response)
+        hooks.register(mhk.RETRY, self.on_retry)
+        hooks.register(mhk.UPLOAD_PROGRESS, self.on_upload_progress)
+
+    def on_request(self, event: mhk.Event):
+        with self._lock:
+            self.inflight[event.endpoint] = self.inflight.get(event.endpoint, 0) + 1
+
+    def on_response(self, event: mhk.Event):
+        status = "error" if event.error is not None else str(event.status)
+        key = (event.endpoint, event.method)
+        with self._lock:
+            self.inflight[event.endpoint] = self.inflight.get(event.endpoint, 1) - 1
+            self.requests[key + (status,)] = self.requests.get(key + (status,), 0) + 1
+
+            histogram = self.durations.get(key)
+            if histogram is None:
+                histogram = self.durations[key] = mst.Histogram(DURATION_BUCKETS)
+            histogram.add(event.duration)
+
+            if event.bytes_sent:
+                self.bytes_sent[key] = self.bytes_sent.get(key, 0) + event.bytes_sent
+            if event.bytes_received:
+                received = self.bytes_received.get(key, 0) + event.bytes_received
+                self.bytes_received[key] = received
+
+    def on_retry(self, event: mhk.Event):
+        key = (event.endpoint, event.method)
+        with self._lock:
+            self.retries[key] = self.retries.get(key, 0) + 1
+
+    def on_upload_progress(self, event: mhk.Event):
+        # Counted as the bytes go, as one upload may take hours. Events of the same
+        # file share a start.
+        with self._lock:
+            done = self._uploads.pop(event.start, 0)
+            self.uploaded += event.bytes_done - done
+            if event.bytes_done < event.bytes_total:
+                self._uploads[event.start] = event.bytes_done
+
+    def expose(self) -> str:
+        """Get the metrics in the Prometheus text exposition format.
+
+        Returns
+        -------
+        str
+            Metrics.
+        """
+        lines = list()
+
+        def _metric(name, kind, help, samples):
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for suffix, labels, value in samples:
+                lines.append(f"{name}{suffix}{_format_labels(labels)} {_format_number(value)}")
+
+        def _by_request(values):
+            return [
+                ("", dict(endpoint=e, method=m), v) for (e, m), v in sorted(values.items())
+            ]
+
+        with self._lock:
+            _metric(
+                "meorg_requests_total",
+                "counter",
+                "Requests made (including retries), by endpoint, method and status.",
+                [
+                    ("", dict(endpoint=e, method=m, status=s), v)
+                    for (e, m, s), v in sorted(self.requests.items())
+                ],
+            )
+
+            samples = list()
+            for (endpoint, method), histogram in sorted(self.durations.items()):
+                labels = dict(endpoint=endpoint, method=method)
+                cumulative = histogram.cumulative(DURATION_BUCKETS)
+                for bound, count in zip(DURATION_BUCKETS, cumulative):
+                    samples.append(("_bucket", dict(labels, le=_format_number(bound)), count))
+                samples.append(("_bucket", dict(labels, le="+Inf"), histogram.count))
+                samples.append(("_sum", labels, histogram.sum))
+                samples.append(("_count", labels, histogram.count))
+            _metric(
+                "meorg_request_duration_seconds",
+                "histogram",
+                "Duration of requests, by endpoint and method.",
+                samples,
+            )
+
+            _metric(
+                "meorg_request_bytes_total",
+                "counter",
+                "Bytes sent in completed requests, by endpoint and method.",
+                _by_request(self.bytes_sent),
+            )
+            _metric(
+                "meorg_response_bytes_total",
+                "counter",
+                "Bytes received in responses, by endpoint and method.",
+                _by_request(self.bytes_received),
+            )
+            _metric(
+                "meorg_upload_bytes_total",
+                "counter",
+                "Bytes of files uploaded, counted as they are sent.",
+                [("", dict(), self.uploaded)],
+            )
+            _metric(
+                "meorg_retries_total",
+                "counter",
+                "Retries of failed requests, by endpoint and method.",
+                _by_request(self.retries),
+            )
+            _metric(
+                "meorg_inflight_requests",
+                "gauge",
+                "Requests (i.e. uploads) in progress, by endpoint.",
+                [("", dict(endpoint=e), v) for e, v in sorted(self.inflight.items())],
+            )
+
+        _metric(
+            "meorg_pending_tasks",
+            "gauge",
+            "Tasks (i.e. file batches) queued or running in worker pools.",
+            [("", dict(), meop.get_pending())],
+        )
+
+        return "\n".join(lines) + "\n"
+
+
+def write_textfile(metrics: Metrics, path: str):
+    """Write the metrics to a file atomically, i.e. for the node exporter textfile
+    collector (which reads *.prom files).
+
+    Parameters
+    ----------
+    metrics : Metrics
+        Metrics.
+    path : str
+        Path to the file.
+    """
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        f.write(metrics.expose())
+    os.replace(tmp, path)
+
+
+class TextfileWriter:
+    """Write the metrics to a file periodically, from a background thread.
+
+    Parameters
+    ----------
+    metrics : Metrics
+        Metrics.
+    path : str
+        Path to the file.
+    interval : float, optional
+        Seconds between writes, by default 15.
+    """
+
+    def __init__(self, metrics: Metrics, path: str, interval: float = 15):
+        self.metrics = metrics
+        self.path = path
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            write_textfile(self.metrics, self.path)
+
+    def stop(self):
+        """Stop writing, after writing the final values."""
+        self._stopped.set()
+        self._thread.join()
+        write_textfile(self.metrics, self.path)
+
+
+class MetricsServer(ThreadingHTTPServer):
+    """HTTP listener serving the metrics at /metrics, from a background thread.
+
+    Parameters
+    ----------
+    metrics : Metrics
+        Metrics.
+    port : int
+        Port to listen on, 0 for any free port.
+    address : str, optional
+        Address to listen on, by default "" (all).
+    """
+
+    daemon_threads = True
+
+    def __init__(self, metrics: Metrics, port: int, address: str = ""):
+        self.metrics = metrics
+        super().__init__((address, port), _MetricsHandler)
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+
+    @property
+    def port(self) -> int:
+        """Port listened on."""
+        return self.server_address[1]
+
+    def stop(self):
+        """Stop listening."""
+        self.shutdown()
+        self.server_close()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+
+        body = self.server.metrics.expose().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes are not worth logging
+        pass
@@ -1,9 +1,45 @@
 """Methods for parallel execution."""
 
+import contextvars
+import threading
 import pandas as pd
+import meorg_client.tracing as mtr
 import multiprocessing as mp
+from multiprocessing.pool import ThreadPool
 from tqdm import tqdm
 
+# Tasks submitted to pools in this process that have not finished (i.e. for metrics)
+_pending = 0
+_pending_lock = threading.Lock()
+
+# Runs tasks in worker processes, set by _init_process
+_profile_task = None
+
+
+def _add_pending(n: int):
+    global _pending
+    with _pending_lock:
+        _pending += n
+
+
+def get_pending() -> int:
+    """Get the number of tasks submitted to worker pools that have not finished.
+
+    Returns
+    -------
+    int
+        Number of tasks queued or running.
+    """
+    return _pending
+
+
+def _init_process():
+    """Set up a worker process, once, to profile its tasks when the parent is profiling."""
+    global _profile_task
+    from meorg_client.profiling import profile_task
+
+    _profile_task = profile_task
+
 
 def _execute(mp_args: tuple):
     """Execute an instance of the parallel function.
@@ -11,14 +47,22 @@ def _execute(mp_args: tuple):
     Parameters
     ----------
     mp_args : tuple
-        2-tuple consisting of a callable and an arguments dictionary.
+        2-tuple consisting of a callable and an arguments dictionary, optionally
+        followed by a context to run the callable in (threads), or the span to
+        continue the trace from (processes, which also profile the callable when
+        the parent is profiling).
 
     Returns
     -------
     mixed
         Returning value of the callable.
     """
-    return mp_args[0](**mp_args[1])
+    if len(mp_args) > 2 and isinstance(mp_args[2], contextvars.Context):
+        return mp_args[2].copy().run(mp_args[0], **mp_args[1])
+
+    # Worker processes continue the caller's trace, and profile
+    with mtr.attach(mp_args[2] if len(mp_args) > 2 else None):
+        return _profile_task(mp_args[0], mp_args[1])
 
 
 def _convert_kwargs(**kwargs):
@@ -32,7 +76,9 @@ def _convert_kwargs(**kwargs):
     return pd.DataFrame(kwargs).to_dict("records")
 
 
-def parallelise(func: callable, num_threads: int, progress=True, **kwargs):
+def parallelise(
+    func: callable, num_threads: int, progress=True, threads=False, **kwargs
+):
     """Execute `func` in parallel over `num_threads`.
 
     Parameters
@@ -41,6 +87,12 @@ def parallelise(func: callable, num_threads: int, progress=True, **kwargs):
         Function to parallelise.
     num_threads : int
         Number of threads.
+    progress : bool, optional
+        Show a progress bar, by default True.
+    threads : bool, optional
+        Use a pool of threads rather than processes (for light, I/O bound work), by default False.
+        The client itself only uses threads. Processes remain the default for callers
+        with CPU-bound work, whose tasks are still traced and profiled.
     **kwargs :
         Keyword arguments for `func` all lists must have equal length, scalars will be converted to lists.
 
@@ -56,23 +108,36 @@ def parallelise(func: callable, num_threads: int, progress=True, **kwargs):
     # Attach the function pointer as the first argument
     mp_args = [[func, mp_arg] for mp_arg in mp_args]
 
+    # Threads inherit the caller's context (i.e. deadline), processes cannot, but
+    # can continue the caller's trace
+    if threads:
+        context = contextvars.copy_context()
+        mp_args = [mp_arg + [context] for mp_arg in mp_args]
+    elif mtr.get_context() is not None:
+        context = mtr.get_context()
+        mp_args = [mp_arg + [context] for mp_arg in mp_args]
+
     # Start with empty results
     results = list()
 
-    # Establish a pool of workers (blocking)
-    with mp.Pool(processes=num_threads) as pool:
-
-        if progress:
+    # Establish a pool of workers (blocking), counting down tasks as they finish
+    _add_pending(len(mp_args))
+    try:
+        if threads:
+            pool = ThreadPool(processes=num_threads)
+        else:
+            pool = mp.Pool(processes=num_threads, initializer=_init_process)
 
-            with tqdm(total=len(mp_args)) as pbar:
-                for result in pool.map(_execute, mp_args):
+        with pool:
+            with tqdm(total=len(mp_args), disable=not progress) as pbar:
+                for result in pool.imap(_execute, mp_args):
                     results.append(result[0])
+                    _add_pending(-1)
                     pbar.update()
 
-        else:
-
-            for result in pool.map(_execute, mp_args):
-                results.append(result[0])
+    # Tasks left behind by a failure will never finish
+    finally:
+        _add_pending(len(results) - len(mp_args))
 
     # Return the results
     return results
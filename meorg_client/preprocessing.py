@@ -0,0 +1,382 @@
+"""Methods for preprocessing files prior to upload."""
+
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Union
+
+# Extensions considered to be NetCDF files.
+NETCDF_EXTENSIONS = (".nc", ".nc4", ".cdf")
+
+# Number of time steps to copy at a time when streaming variables.
+DEFAULT_CHUNK_SIZE = 1024
+
+# Variable attributes that reference other variables that must be carried along.
+_REFERENCE_ATTRIBUTES = ("coordinates", "bounds", "climatology")
+
+
+def _import_netcdf4():
+    """Import the optional netCDF4 dependency.
+
+    Returns
+    -------
+    module
+        The netCDF4 module.
+
+    Raises
+    ------
+    ImportError
+        When netCDF4 is not installed.
+    """
+    try:
+        import netCDF4
+
+        return netCDF4
+    except ImportError as ex:
+        raise ImportError(
+            "Subsetting NetCDF files requires the netCDF4 package, "
+            "install it with `pip install meorg_client[netcdf]`."
+        ) from ex
+
+
+def is_netcdf(filepath: Union[str, Path]) -> bool:
+    """Check if a filepath has a NetCDF extension.
+
+    Parameters
+    ----------
+    filepath : Union[str, Path]
+        Path to the file.
+
+    Returns
+    -------
+    bool
+        True if the file is named like a NetCDF file.
+    """
+    return str(filepath).lower().endswith(NETCDF_EXTENSIONS)
+
+
+def parse_time_range(time_range) -> tuple:
+    """Parse a time range into a 2-tuple of datetimes.
+
+    Parameters
+    ----------
+    time_range : mixed
+        A 2-sequence of ISO 8601 strings, datetimes or None (open ended), or a
+        comma-separated string of the same.
+
+    Returns
+    -------
+    tuple
+        (start, end) datetimes, either may be None.
+
+    Raises
+    ------
+    ValueError
+        When the time range cannot be parsed.
+    """
+    if time_range is None:
+        return None, None
+
+    if isinstance(time_range, str):
+        time_range = time_range.split(",")
+
+    if len(time_range) != 2:
+        raise ValueError(f"Time range must have a start and an end ({time_range}).")
+
+    bounds = list()
+    for bound in time_range:
+        if isinstance(bound, str):
+            bound = bound.strip()
+            bound = datetime.fromisoformat(bound) if bound else None
+        bounds.append(bound)
+
+    start, end = bounds
+    if start is not None and end is not None and start > end:
+        raise ValueError(f"Time range start {start} is after end {end}.")
+
+    return start, end
+
+
+def _get_time_variable(dataset):
+    """Find the time coordinate variable of a dataset.
+
+    Parameters
+    ----------
+    dataset : netCDF4.Dataset
+        Open dataset.
+
+    Returns
+    -------
+    netCDF4.Variable or None
+        The time variable, if one exists.
+    """
+    for name, variable in dataset.variables.items():
+        if name == "time" or getattr(variable, "axis", None) == "T":
+            return variable
+        if getattr(variable, "standard_name", None) == "time":
+            return variable
+    return None
+
+
+def _time_slice(time_variable, start: datetime, end: datetime) -> slice:
+    """Get the index slice of the time variable between start and end (inclusive).
+
+    Parameters
+    ----------
+    time_variable : netCDF4.Variable
+        Monotonically increasing time coordinate variable.
+    start : datetime
+        Start of the period, or None for the first time step.
+    end : datetime
+        End of the period, or None for the last time step.
+
+    Returns
+    -------
+    slice
+        Slice along the time dimension.
+    """
+    import cftime
+    import numpy as np
+
+    units = time_variable.units
+    calendar = getattr(time_variable, "calendar", "standard")
+    values = time_variable[:]
+
+    def _to_num(dt):
+        dt = cftime.datetime(*dt.timetuple()[:6], calendar=calendar)
+        return cftime.date2num(dt, units, calendar=calendar)
+
+    i0 = 0 if start is None else int(np.searchsorted(values, _to_num(start), "left"))
+    i1 = len(values) if end is None else int(np.searchsorted(values, _to_num(end), "right"))
+    return slice(i0, max(i0, i1))
+
+
+def _select_variables(dataset, variables: list) -> list:
+    """Expand the requested variables to include their coordinates and references.
+
+    Parameters
+    ----------
+    dataset : netCDF4.Dataset
+        Open dataset.
+    variables : list
+        Requested variable names, None for all variables.
+
+    Returns
+    -------
+    list
+        Names of variables to write, in dataset order.
+
+    Raises
+    ------
+    ValueError
+        When a requested variable does not exist in the dataset.
+    """
+    if not variables:
+        return list(dataset.variables.keys())
+
+    missing = [v for v in variables if v not in dataset.variables]
+    if missing:
+        raise ValueError(
+            f"Variables {missing} not found in {dataset.filepath()}."
+        )
+
+    selected = set()
+    pending = list(variables)
+
+    while pending:
+        name = pending.pop()
+        if name in selected or name not in dataset.variables:
+            continue
+        selected.add(name)
+        variable = dataset.variables[name]
+
+        # Coordinate variables for each dimension
+        pending += [d for d in variable.dimensions if d in dataset.variables]
+
+        # Variables referenced by attribute
+        for attr in _REFERENCE_ATTRIBUTES:
+            pending += getattr(variable, attr, "").split()
+
+    return [name for name in dataset.variables.keys() if name in selected]
+
+
+def subset_netcdf(
+    src: Union[str, Path],
+    dst: Union[str, Path],
+    variables: list = None,
+    time_range=None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Path:
+    """Write a reduced copy of a NetCDF file.
+
+    Data are streamed `chunk_size` time steps at a time, so memory use is bounded
+    regardless of the size of the source file.
+
+    Parameters
+    ----------
+    src : Union[str, Path]
+        Path to the source file.
+    dst : Union[str, Path]
+        Path to the output file.
+    variables : list, optional
+        Variables to keep (coordinates are kept automatically), by default None (all).
+    time_range : mixed, optional
+        Period to keep, see `parse_time_range`, by default None (all).
+    chunk_size : int, optional
+        Number of time steps to copy at a time, by default DEFAULT_CHUNK_SIZE.
+
+    Returns
+    -------
+    Path
+        Path to the output file.
+
+    Raises
+    ------
+    ValueError
+        When variables are missing, or a time range is given without a time variable
+        (or with a scalar one).
+    """
+    netCDF4 = _import_netcdf4()
+    start, end = parse_time_range(time_range)
+
+    with netCDF4.Dataset(src, "r") as ds_in:
+        ds_in.set_auto_maskandscale(False)
+
+        # Work out the time selection
+        time_dim = None
+        time_sel = slice(None)
+        time_variable = _get_time_variable(ds_in)
+
+        # A scalar time coordinate has no dimension to subset along
+        if time_variable is not None and time_variable.dimensions:
+            time_dim = time_variable.dimensions[0]
+
+        if start is not None or end is not None:
+            if time_variable is None:
+                raise ValueError(f"No time variable found in {src}.")
+            if time_dim is None:
+                raise ValueError(
+                    f"Time variable {time_variable.name} in {src} is a scalar, "
+                    "it cannot be subset by a time range."
+                )
+            time_sel = _time_slice(time_variable, start, end)
+
+        names = _select_variables(ds_in, variables)
+
+        with netCDF4.Dataset(dst, "w", format=ds_in.data_model) as ds_out:
+            ds_out.setncatts({a: ds_in.getncattr(a) for a in ds_in.ncattrs()})
+
+            # Only create dimensions that are used by the selected variables
+            used_dims = {d for n in names for d in ds_in.variables[n].dimensions}
+            for name, dim in ds_in.dimensions.items():
+                if name not in used_dims:
+                    continue
+                if dim.isunlimited():
+                    size = None
+                elif name == time_dim:
+                    size = len(range(*time_sel.indices(len(dim))))
+                else:
+                    size = len(dim)
+                ds_out.createDimension(name, size)
+
+            for name in names:
+                _copy_variable(ds_in.variables[name], ds_out, time_dim, time_sel, chunk_size)
+
+    return Path(dst)
+
+
+def _copy_variable(var_in, ds_out, time_dim: str, time_sel: slice, chunk_size: int):
+    """Stream a variable into an output dataset.
+
+    Parameters
+    ----------
+    var_in : netCDF4.Variable
+        Source variable.
+    ds_out : netCDF4.Dataset
+        Output dataset (open for writing).
+    time_dim : str
+        Name of the time dimension, or None.
+    time_sel : slice
+        Selection along the time dimension.
+    chunk_size : int
+        Number of time steps to copy at a time.
+    """
+    attrs = {a: var_in.getncattr(a) for a in var_in.ncattrs()}
+    fill_value = attrs.pop("_FillValue", None)
+
+    kwargs = dict()
+    filters = var_in.filters() or dict()
+    if filters.get("zlib"):
+        kwargs.update(zlib=True, complevel=filters.get("complevel", 4))
+    if filters.get("shuffle"):
+        kwargs.update(shuffle=True)
+
+    var_out = ds_out.createVariable(
+        var_in.name, var_in.datatype, var_in.dimensions, fill_value=fill_value, **kwargs
+    )
+    var_out.set_auto_maskandscale(False)
+    var_out.setncatts(attrs)
+
+    # Scalars and variables without a time dimension are copied whole
+    if time_dim not in var_in.dimensions:
+        var_out[...] = var_in[...]
+        return
+
+    axis = var_in.dimensions.index(time_dim)
+    indices = range(*time_sel.indices(var_in.shape[axis]))
+
+    for offset in range(0, len(indices), chunk_size):
+        block = indices[offset : offset + chunk_size]
+        src_key = [slice(None)] * var_in.ndim
+        dst_key = [slice(None)] * var_in.ndim
+        src_key[axis] = slice(block.start, block.stop)
+        dst_key[axis] = slice(offset, offset + len(block))
+        var_out[tuple(dst_key)] = var_in[tuple(src_key)]
+
+
+@contextmanager
+def subset_files(
+    files: list, variables: list = None, time_range=None, tmpdir: str = None
+):
+    """Subset a list of files into a temporary directory, cleaned up on exit.
+
+    Files that are not NetCDF are passed through untouched. Subset files keep their
+    original basenames, so they are named identically on the server.
+
+    Parameters
+    ----------
+    files : list
+        List of filepaths.
+    variables : list, optional
+        Variables to keep, by default None (all).
+    time_range : mixed, optional
+        Period to keep, by default None (all).
+    tmpdir : str, optional
+        Parent directory for temporary files, by default None (system default).
+
+    Yields
+    ------
+    list
+        List of filepaths to upload.
+    """
+    workdir = tempfile.mkdtemp(prefix="meorg-", dir=tmpdir)
+
+    try:
+        subset = list()
+        for i, filepath in enumerate(files):
+            if not is_netcdf(filepath):
+                subset.append(filepath)
+                continue
+
+            # Use a subdirectory per file to avoid clashes between identical basenames
+            dst = Path(workdir) / str(i) / os.path.basename(filepath)
+            dst.parent.mkdir()
+            subset.append(subset_netcdf(filepath, dst, variables, time_range))
+
+        yield subset
+
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
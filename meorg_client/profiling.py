@@ -0,0 +1,325 @@
+"""Profiling of client work, i.e. for meorg --profile."""
+
+import cProfile
+import collections
+import io
+import itertools
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+import meorg_client.constants as mcc
+
+# Profiling modes
+MODES = mcc.PROFILE_MODES
+CPU, WALL, MEMORY = MODES
+
+# Seconds between samples of the stacks of every thread (wall mode)
+SAMPLE_INTERVAL = 0.01
+
+# Frames kept per allocation (memory mode)
+MEMORY_FRAMES = 10
+
+# Entries in the summary
+TOP = 20
+
+# Set in the environment while profiling, so that worker processes (which run
+# tasks through meorg_client.parallel) profile their tasks into the same directory
+ENV_MODE = "MEORG_PROFILE"
+ENV_DIR = "MEORG_PROFILE_DIR"
+
+# Profiler started in this process, if any (inherited by forked workers)
+_active = None
+
+# Numbers the dumps of tasks run by worker processes
+_tasks = itertools.count()
+
+
+def _format_frame(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class WallSampler:
+    """Sample the stacks of every thread at intervals, from a background thread.
+
+    Samples are counted by stack, as in the collapsed format of flame graph tools
+    (thread;outermost;...;innermost).
+
+    Parameters
+    ----------
+    interval : float, optional
+        Seconds between samples, by default SAMPLE_INTERVAL.
+    """
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks = collections.Counter()
+        self.samples = 0
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        """Start sampling."""
+        self._thread.start()
+
+    def stop(self):
+        """Stop sampling."""
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stopped.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+
+                stack = list()
+                while frame is not None:
+                    stack.append(_format_frame(frame))
+                    frame = frame.f_back
+
+                stack.append(names.get(ident, str(ident)))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+
+class Profiler:
+    """Profile the process (all threads), and worker processes started within.
+
+    Parameters
+    ----------
+    mode : str, optional
+        One of MODES: cpu (cProfile), wall (sampled stacks) or memory (tracemalloc),
+        by default CPU.
+    directory : Union[str, Path], optional
+        Directory to write the profiles to, created if required, by default the
+        current directory.
+
+    Raises
+    ------
+    ValueError
+        When the mode is unknown.
+    """
+
+    def __init__(self, mode: str = CPU, directory=None):
+        if mode not in MODES:
+            raise ValueError(f"Unknown profiling mode {mode}, expected one of {MODES}.")
+
+        self.mode = mode
+        self.directory = Path(directory or os.getcwd())
+        self._profiles = list()
+        self._lock = threading.Lock()
+        self._sampler = None
+        self._start = None
+
+    def start(self):
+        """Start profiling."""
+        global _active
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        os.environ[ENV_MODE] = self.mode
+        os.environ[ENV_DIR] = str(self.directory)
+        self._start = time.perf_counter()
+        _active = self
+
+        if self.mode == CPU:
+            profile = cProfile.Profile()
+            self._profiles.append(profile)
+            profile.enable()
+
+            # Before 3.12 profiling is per thread, so threads started from here on get
+            # a profile of their own
+            if sys.version_info < (3, 12):
+                threading.setprofile(self._profile_thread)
+
+        elif self.mode == WALL:
+            self._sampler = WallSampler()
+            self._sampler.start()
+
+        else:
+            tracemalloc.start(MEMORY_FRAMES)
+
+    def _profile_thread(self, frame, event, arg):
+        # Called once at the start of each new thread, replaced by its own profile
+        sys.setprofile(None)
+        profile = cProfile.Profile()
+        with self._lock:
+            self._profiles.append(profile)
+        profile.enable()
+
+    def abandon(self):
+        """Stop profiling without writing anything (i.e. inherited by a worker)."""
+        global _active
+        _active = None
+
+        if self.mode == CPU:
+            threading.setprofile(None)
+            self._profiles[0].disable()
+        elif self.mode == MEMORY:
+            tracemalloc.stop()
+
+    def stop(self, name: str = None) -> str:
+        """Stop profiling and write the profile, along with a summary.
+
+        Parameters
+        ----------
+        name : str, optional
+            Name of the files written, by default the mode (worker processes add to
+            these when they are written).
+
+        Returns
+        -------
+        str
+            Summary.
+        """
+        global _active
+        _active = None
+
+        wall_time = time.perf_counter() - self._start
+        name = name or self.mode
+        for key in (ENV_MODE, ENV_DIR):
+            os.environ.pop(key, None)
+
+        if self.mode == CPU:
+            summary = self._stop_cpu(name)
+        elif self.mode == WALL:
+            summary = self._stop_wall(name)
+        else:
+            summary = self._stop_memory(name)
+
+        summary = "\n".join(
+            [
+                f"Profile ({self.mode}) written to {self.directory}",
+                f"Wall time: {wall_time:.2f}s",
+                summary,
+            ]
+        )
+
+        (self.directory / f"{name}-summary.txt").write_text(summary + "\n")
+        return summary
+
+    def _workers(self, name: str, ext: str) -> list:
+        # Profiles written by worker processes
+        return sorted(self.directory.glob(f"{name}-*.{ext}"))
+
+    def _stop_cpu(self, name: str) -> str:
+        threading.setprofile(None)
+        for profile in self._profiles:
+            profile.disable()
+
+        stats = pstats.Stats(self._profiles[0])
+        for profile in self._profiles[1:]:
+            stats.add(profile)
+        for path in self._workers(name, "pstats"):
+            stats.add(str(path))
+
+        stats.dump_stats(self.directory / f"{name}.pstats")
+
+        stream = io.StringIO()
+        stats.stream = stream
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(TOP)
+        return stream.getvalue().strip("\n")
+
+    def _stop_wall(self, name: str) -> str:
+        self._sampler.stop()
+        stacks = self._sampler.stacks
+        samples = self._sampler.samples
+
+        for path in self._workers(name, "folded"):
+            for line in open(path):
+                stack, count = line.rsplit(" ", 1)
+                stacks[stack] += int(count)
+
+        with open(self.directory / f"{name}.folded", "w") as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+        # Self samples (innermost frame) and total samples (anywhere in the stack)
+        own, total = collections.Counter(), collections.Counter()
+        for stack, count in stacks.items():
+            frames = stack.split(";")[1:]
+            if frames:
+                own[frames[-1]] += count
+            for frame in set(frames):
+                total[frame] += count
+
+        n = sum(stacks.values()) or 1
+        lines = [
+            f"Samples: {samples} every {SAMPLE_INTERVAL * 1000:.0f}ms, "
+            f"{len({s.split(';')[0] for s in stacks})} threads",
+            f"{'SELF':>6} {'TOTAL':>6}  FUNCTION",
+        ]
+        for frame, count in own.most_common(TOP):
+            lines.append(f"{count / n:>6.1%} {total[frame] / n:>6.1%}  {frame}")
+        return "\n".join(lines)
+
+    def _stop_memory(self, name: str) -> str:
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            [
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+            ]
+        )
+        tracemalloc.stop()
+        snapshot.dump(str(self.directory / f"{name}.tracemalloc"))
+
+        # Allocations still held, by line, including those of worker processes
+        sizes, counts = collections.Counter(), collections.Counter()
+        snapshots = [snapshot] + [
+            tracemalloc.Snapshot.load(str(p)) for p in self._workers(name, "tracemalloc")
+        ]
+        for _snapshot in snapshots:
+            for stat in _snapshot.statistics("lineno"):
+                sizes[str(stat.traceback)] += stat.size
+                counts[str(stat.traceback)] += stat.count
+
+        lines = [
+            f"Traced memory: {current / 1e6:.1f} MB at exit, {peak / 1e6:.1f} MB peak",
+            f"{'SIZE':>10} {'COUNT':>8}  LINE",
+        ]
+        for line, size in sizes.most_common(TOP):
+            lines.append(f"{size / 1e3:>8.1f}kB {counts[line]:>8}  {line}")
+        return "\n".join(lines)
+
+
+def profile_task(func: callable, kwargs: dict):
+    """Run a task in a worker process, profiling it when the parent is profiling.
+
+    Parameters
+    ----------
+    func : callable
+        Task.
+    kwargs : dict
+        Arguments to the task.
+
+    Returns
+    -------
+    mixed
+        Returning value of the task.
+    """
+    mode = os.environ.get(ENV_MODE)
+    if mode is None:
+        return func(**kwargs)
+
+    # A forked worker inherits the parent's profiler, which would profile it twice
+    if _active is not None:
+        _active.abandon()
+
+    profiler = Profiler(mode, os.environ[ENV_DIR])
+    profiler.start()
+    try:
+        return func(**kwargs)
+    finally:
+        # Picked up by the parent by name, for the next task in this worker too
+        name = f"{mode}-{os.getpid()}-{next(_tasks)}"
+        profiler.stop(name)
+        (profiler.directory / f"{name}-summary.txt").unlink()
+        os.environ[ENV_MODE] = mode
+        os.environ[ENV_DIR] = str(profiler.directory)
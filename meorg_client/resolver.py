@@ -0,0 +1,243 @@
+"""Resolution of names to IDs."""
+
+import hashlib as hl
+import json
+import os
+import re
+import tempfile
+import time
+from pathlib import Path
+from typing import Union
+import meorg_client.exceptions as mx
+import meorg_client.parallel as meop
+import meorg_client.utilities as mu
+
+# Kinds of entity that can be named. Benchmarks are model outputs.
+MODEL_OUTPUT = "model_output"
+EXPERIMENT = "experiment"
+KINDS = [MODEL_OUTPUT, EXPERIMENT]
+
+# Age (seconds) after which an entry is refreshed
+DEFAULT_MAX_AGE = 7 * 24 * 60 * 60
+
+# ME.org IDs are 17 character random IDs (Meteor)
+_ID = re.compile(r"^[23456789ABCDEFGHJKLMNPQRSTWXYZabcdefghijkmnopqrstuvwxyz]{17}$")
+
+
+def is_id(value: str) -> bool:
+    """Check if a value looks like an ID rather than a name.
+
+    Parameters
+    ----------
+    value : str
+        Name or ID.
+
+    Returns
+    -------
+    bool
+        True if the value is an ID.
+    """
+    return bool(_ID.match(value or ""))
+
+
+def get_index_filepath(base_url: str) -> Path:
+    """Get the path of the name index for a server.
+
+    Parameters
+    ----------
+    base_url : str
+        Base URL of the server.
+
+    Returns
+    -------
+    Path
+        Path to the index.
+    """
+    server = hl.sha1(str(base_url).encode("utf-8")).hexdigest()[:12]
+    return mu.get_user_data_filepath("names") / f"{server}.json"
+
+
+class Resolver:
+    """Translates names to IDs using an index held in memory and on disk.
+
+    Values that are already IDs are returned untouched, without any I/O. Names
+    missing from the index are looked up in one concurrent batch and added to it.
+
+    Parameters
+    ----------
+    client : meorg_client.client.Client
+        Client of the server, which need only be authenticated to look names up.
+    path : Union[str, Path], optional
+        Path to the index, by default one per server in ~/.meorg/names
+    max_age : float, optional
+        Age in seconds after which entries are looked up again, by default DEFAULT_MAX_AGE.
+    """
+
+    def __init__(
+        self, client, path: Union[str, Path] = None, max_age: float = DEFAULT_MAX_AGE
+    ):
+        self.client = client
+        self.path = Path(path or get_index_filepath(client.base_url))
+        self.max_age = max_age
+        self._index = None
+
+    @property
+    def index(self) -> dict:
+        """Kinds mapped to dicts of names to [id, time resolved]."""
+        if self._index is None:
+            try:
+                self._index = json.loads(self.path.read_text())
+            except (OSError, ValueError):
+                self._index = dict()
+            for kind in KINDS:
+                self._index.setdefault(kind, dict())
+        return self._index
+
+    def save(self):
+        """Write the index to disk (atomically)."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(self.index, f, indent=4)
+        os.replace(tmp, self.path)
+
+    def add(self, kind: str, name: str, id: str, save: bool = True):
+        """Add a name to the index.
+
+        Parameters
+        ----------
+        kind : str
+            One of KINDS.
+        name : str
+            Name.
+        id : str
+            ID.
+        save : bool, optional
+            Write the index to disk, by default True.
+        """
+        self.index[kind][name] = [id, time.time()]
+        if save:
+            self.save()
+
+    def learn(self, response: dict, save: bool = True):
+        """Add any (id, name) pairs of model outputs found in a response.
+
+        Parameters
+        ----------
+        response : dict
+            Response from a model output query or benchmark list.
+        save : bool, optional
+            Write the index to disk, by default True.
+        """
+        data = response.get("data") or dict()
+        records = [data.get("modeloutput")] + list(data.get("benchmarks") or list())
+
+        for record in records:
+            if isinstance(record, dict) and record.get("id") and record.get("name"):
+                self.add(MODEL_OUTPUT, record["name"], record["id"], save=False)
+
+        if save:
+            self.save()
+
+    def _lookup(self, kind: str, name: str) -> str:
+        """Get a fresh ID from the index.
+
+        Returns
+        -------
+        str
+            ID, or None if missing or stale.
+        """
+        entry = self.index[kind].get(name)
+        if entry is None or time.time() - entry[1] > self.max_age:
+            return None
+        return entry[0]
+
+    def _fetch(self, name: str) -> list:
+        """Parallelisable lookup of a model output ID by name, None if not found."""
+        try:
+            response = self.client.model_output_query(name=name)
+        except mx.RequestException as ex:
+            if ex.status_code != 404:
+                raise
+            return [(name, None, None)]
+        return [(name, mu.get_model_output_id(response), response)]
+
+    def resolve(self, kind: str, value: Union[str, list], n: int = 8):
+        """Resolve names to IDs.
+
+        Parameters
+        ----------
+        kind : str
+            One of KINDS.
+        value : Union[str, list]
+            A name or ID, or a list of names and/or IDs.
+        n : int, optional
+            Number of threads to look up missing names with, by default 8.
+
+        Returns
+        -------
+        Union[str, list]
+            ID, or list of IDs, matching the input.
+
+        Raises
+        ------
+        KeyError
+            When a name cannot be resolved.
+        """
+        values = mu.ensure_list(value)
+
+        # IDs need no resolution at all
+        names = [v for v in values if not is_id(v)]
+        if not names:
+            return value
+
+        ids = {name: self._lookup(kind, name) for name in names}
+        missing = sorted({name for name, id in ids.items() if id is None})
+
+        # Only model outputs (including benchmarks) can be looked up by name
+        if missing and kind == MODEL_OUTPUT:
+            results = meop.parallelise(
+                self._fetch,
+                max(1, min(n, len(missing))),
+                progress=False,
+                threads=True,
+                name=missing,
+            )
+            for name, id, response in results:
+                ids[name] = id
+                if response is not None:
+                    self.learn(response, save=False)
+            self.save()
+
+        unresolved = [name for name in names if ids[name] is None]
+        if unresolved:
+            raise KeyError(f"Unable to resolve {kind} names {unresolved}.")
+
+        resolved = [ids.get(v, v) for v in values]
+        return resolved if isinstance(value, list) else resolved[0]
+
+    def refresh(self, n: int = 8, force: bool = False) -> int:
+        """Look up stale model output names again, in one concurrent batch.
+
+        Parameters
+        ----------
+        n : int, optional
+            Number of threads, by default 8.
+        force : bool, optional
+            Refresh all entries, not just stale ones, by default False.
+
+        Returns
+        -------
+        int
+            Number of names refreshed.
+        """
+        names = [
+            name
+            for name in self.index[MODEL_OUTPUT]
+            if force or self._lookup(MODEL_OUTPUT, name) is None
+        ]
+        if names:
+            for name in names:
+                del self.index[MODEL_OUTPUT][name]
+            self.resolve(MODEL_OUTPUT, names, n=n)
+        return len(names)
@@ -0,0 +1,78 @@
+"""Coalescing of identical concurrent calls."""
+
+import threading
+
+
+class _Call:
+    """An in-flight call, with its outcome once finished."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time, concurrent callers with the same key
+    wait for that call and share its result (or exception).
+
+    Only use for idempotent calls whose result may be shared between callers.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = dict()
+        self.shared = 0
+
+    def __getstate__(self) -> dict:
+        # Locks cannot be pickled, and in-flight calls are local to the process
+        return dict()
+
+    def __setstate__(self, state: dict):
+        self.__init__()
+
+    def do(self, key, func: callable, *args, **kwargs):
+        """Call func, or wait for an identical call that is already in flight.
+
+        Parameters
+        ----------
+        key : hashable
+            Key identifying identical calls.
+        func : callable
+            Function to call.
+        *args, **kwargs :
+            Arguments to func.
+
+        Returns
+        -------
+        mixed
+            Result of func.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.waiters += 1
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+        except BaseException as ex:
+            call.error = ex
+            raise
+        finally:
+            # Later callers make a new call, rather than get a stale result
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.result
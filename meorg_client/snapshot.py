@@ -0,0 +1,191 @@
+"""Live snapshots of client progress, i.e. on SIGUSR1."""
+
+import collections
+import os
+import signal
+import sys
+import threading
+import time
+import traceback
+import meorg_client.breaker as mb
+import meorg_client.hooks as mhk
+import meorg_client.parallel as meop
+
+# Recent retries kept for the snapshot
+MAX_RETRIES = 20
+
+# Name of the thread writing snapshots on a signal, left out of them
+THREAD_NAME = "meorg-snapshot"
+
+
+class Progress:
+    """Requests and uploads in flight and recent retries, collected by way of client
+    hooks, for snapshots of work that may look stuck.
+
+    One instance may be shared by several clients.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = dict()
+        self.uploads = dict()
+        self.retries = collections.deque(maxlen=MAX_RETRIES)
+        self.circuit_breakers = list()
+
+    def __getstate__(self) -> dict:
+        # Progress is local to the process
+        return dict()
+
+    def __setstate__(self, state: dict):
+        self.__init__()
+
+    def attach(self, hooks: mhk.Hooks, circuit_breakers: mb.CircuitBreakers = None):
+        """Register with the hooks of a client.
+
+        Parameters
+        ----------
+        hooks : mhk.Hooks
+            Client hooks.
+        circuit_breakers : mb.CircuitBreakers, optional
+            Circuit breakers of the client, to report open circuits, by default None.
+        """
+        hooks.register(mhk.PRE_REQUEST, self.on_request)
+        hooks.register(mhk.POST_RESPONSE, self.on_response)
+        hooks.register(mhk.RETRY, self.on_retry)
+        hooks.register(mhk.UPLOAD_PROGRESS, self.on_upload_progress)
+
+        if circuit_breakers is not None:
+            with self._lock:
+                if circuit_breakers not in self.circuit_breakers:
+                    self.circuit_breakers.append(circuit_breakers)
+
+    def on_request(self, event: mhk.Event):
+        with self._lock:
+            self.requests[event.start] = event
+
+    def on_response(self, event: mhk.Event):
+        with self._lock:
+            self.requests.pop(event.start, None)
+
+    def on_retry(self, event: mhk.Event):
+        with self._lock:
+            self.retries.append((time.time(), event))
+
+    def on_upload_progress(self, event: mhk.Event):
+        # Events of the same file share a start
+        with self._lock:
+            if event.bytes_done < event.bytes_total:
+                self.uploads[event.start] = event
+            else:
+                self.uploads.pop(event.start, None)
+
+    def format(self) -> str:
+        """Format a snapshot of the progress, and the stacks of every thread.
+
+        Returns
+        -------
+        str
+            Snapshot.
+        """
+        now, wall = time.perf_counter(), time.time()
+        with self._lock:
+            requests = sorted(self.requests.values(), key=lambda e: e.start)
+            uploads = sorted(self.uploads.values(), key=lambda e: e.start)
+            retries = list(self.retries)
+            circuit_breakers = list(self.circuit_breakers)
+
+        taken = time.strftime("%Y-%m-%d %H:%M:%S")
+        lines = [
+            f"=== meorg snapshot {taken} (pid {os.getpid()}) ===",
+            f"Pending tasks: {meop.get_pending()}",
+            f"Requests in flight: {len(requests)}",
+        ]
+        for e in requests:
+            retry = f" (retry {e.attempt})" if e.attempt else ""
+            lines.append(f"  {now - e.start:8.1f}s  {e.method} {e.url}{retry}")
+
+        lines.append(f"Uploads in flight: {len(uploads)}")
+        for e in uploads:
+            elapsed = now - e.start
+            rate = e.bytes_done / elapsed / 1e6 if elapsed > 0 else 0
+            lines.append(
+                f"  {e.filename}: {e.bytes_done / 1e6:.1f}/{e.bytes_total / 1e6:.1f} MB "
+                f"({e.bytes_done / max(e.bytes_total, 1):.0%}) at {rate:.2f} MB/s, "
+                f"{elapsed:.1f}s"
+            )
+
+        lines.append(f"Recent retries: {len(retries)}")
+        for t, e in retries:
+            reason = e.status if e.status is not None else type(e.error).__name__
+            lines.append(
+                f"  {wall - t:8.1f}s ago  {e.method} {e.endpoint} attempt {e.attempt} "
+                f"after {reason}, backoff {e.backoff:.1f}s"
+            )
+
+        for breakers in circuit_breakers:
+            for endpoint, state in sorted(breakers.states().items()):
+                if state != mb.CLOSED:
+                    lines.append(f"Circuit {state}: {endpoint}")
+
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if names.get(ident) == THREAD_NAME:
+                continue
+            lines.append(f"--- Thread {names.get(ident, ident)} ---")
+            lines.append("".join(traceback.format_stack(frame)).rstrip("\n"))
+
+        return "\n".join(lines) + "\n"
+
+
+def write_snapshot(progress: Progress, path: str = None):
+    """Write a snapshot to a file, or stderr.
+
+    Parameters
+    ----------
+    progress : Progress
+        Progress.
+    path : str, optional
+        File to append to, by default None (stderr).
+    """
+    snapshot = progress.format()
+    if path is None:
+        sys.stderr.write(snapshot)
+        sys.stderr.flush()
+    else:
+        with open(path, "a") as f:
+            f.write(snapshot)
+
+
+def install(progress: Progress, path: str = None, signum: int = None) -> bool:
+    """Write a snapshot whenever the process receives a signal (SIGUSR1 by
+    default), without interrupting the work.
+
+    Must be called from the main thread.
+
+    Parameters
+    ----------
+    progress : Progress
+        Progress.
+    path : str, optional
+        File to append snapshots to, by default None (stderr).
+    signum : int, optional
+        Signal, by default SIGUSR1.
+
+    Returns
+    -------
+    bool
+        False when the signal is not available (i.e. on Windows).
+    """
+    signum = signum or getattr(signal, "SIGUSR1", None)
+    if signum is None:
+        return False
+
+    def _handler(signum, frame):
+        # Written from another thread, as the main thread may hold a lock of the
+        # work it was interrupted in
+        threading.Thread(
+            target=write_snapshot, args=(progress, path), name=THREAD_NAME
+        ).start()
+
+    signal.signal(signum, _handler)
+    return True
@@ -0,0 +1,286 @@
+"""Cached OpenAPI specification and client-side request validation."""
+
+import hashlib as hl
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from pathlib import Path
+import requests
+import meorg_client.endpoints as endpoints
+import meorg_client.exceptions as mx
+import meorg_client.utilities as mu
+from meorg_client import __version__
+
+# Age (seconds) after which the cached specification is refreshed in the background
+SPEC_MAX_AGE = 24 * 60 * 60
+
+# Timeout (seconds) for fetching the specification in the background
+SPEC_FETCH_TIMEOUT = 30
+
+# URL template fields, i.e. {id}
+_FIELD = re.compile(r"\{([^}]+)\}")
+
+
+def get_spec_filepath(base_url: str) -> Path:
+    """Get the path of the cached specification for a server and client version.
+
+    Parameters
+    ----------
+    base_url : str
+        Base URL of the server.
+
+    Returns
+    -------
+    Path
+        Path to the cached specification.
+    """
+    server = hl.sha1(str(base_url).encode("utf-8")).hexdigest()[:12]
+    return mu.get_user_data_filepath("openapi") / f"{server}-{__version__}.json"
+
+
+def is_spec(document) -> bool:
+    """Check that a document is an OpenAPI specification, not some other response.
+
+    Parameters
+    ----------
+    document : mixed
+        Decoded JSON document.
+
+    Returns
+    -------
+    bool
+        True if it is a dict with an openapi or paths key.
+    """
+    return isinstance(document, dict) and ("openapi" in document or "paths" in document)
+
+
+def fetch_spec(url: str, session: requests.Session = None) -> dict:
+    """Fetch a specification with a single GET, without retries or hooks.
+
+    Parameters
+    ----------
+    url : str
+        URL of the specification.
+    session : requests.Session, optional
+        Session to pool the connection in, by default none.
+
+    Returns
+    -------
+    dict
+        Specification, or None if the server did not return one.
+    """
+    response = (session or requests).get(
+        url,
+        headers={"user-agent": mu.get_user_agent()},
+        timeout=SPEC_FETCH_TIMEOUT,
+    )
+    return response.json() if response.status_code == 200 else None
+
+
+def _normalise(path: str) -> str:
+    """Normalise a URL template so that field names do not matter."""
+    return "/" + _FIELD.sub("{}", path.strip("/"))
+
+
+def build_index(spec: dict) -> dict:
+    """Build an index of the specification for validating requests.
+
+    Parameters
+    ----------
+    spec : dict
+        OpenAPI specification.
+
+    Returns
+    -------
+    dict
+        Normalised path templates mapped to dicts of methods to the required JSON
+        body fields.
+    """
+    index = dict()
+
+    for path, methods in spec.get("paths", dict()).items():
+        allowed = dict()
+        for method, operation in methods.items():
+            content = operation.get("requestBody", dict()).get("content", dict())
+            schema = content.get("application/json", dict()).get("schema", dict())
+            allowed[method.upper()] = list(schema.get("required", list()))
+        index[_normalise(path)] = allowed
+
+    return index
+
+
+class SpecCache:
+    """The OpenAPI specification of a server, cached on disk and indexed in memory.
+
+    The cached (or bundled) specification is used immediately, and refreshed from
+    the server in the background once it is older than SPEC_MAX_AGE. Changing the
+    base URL switches to the specification cached for that server.
+
+    Parameters
+    ----------
+    base_url : str
+        Base URL of the server.
+    max_age : float, optional
+        Age in seconds after which to refresh, by default SPEC_MAX_AGE.
+    fetch : callable, optional
+        Called with the URL of the specification to get it from the server, returning
+        None to skip the refresh, by default fetch_spec.
+    """
+
+    def __init__(
+        self, base_url: str, max_age: float = SPEC_MAX_AGE, fetch: callable = None
+    ):
+        self.max_age = max_age
+        self.fetch = fetch
+        self._refreshing = False
+        self.base_url = base_url
+
+    @property
+    def base_url(self) -> str:
+        return self._base_url
+
+    @base_url.setter
+    def base_url(self, base_url: str):
+        if base_url == getattr(self, "_base_url", object()):
+            return
+
+        # Loaded again from the cache of the new server on next use
+        self._base_url = base_url
+        self.filepath = get_spec_filepath(base_url)
+        self._spec, self._index = None, None
+
+    def __getstate__(self) -> dict:
+        # Reload lazily in other processes
+        state = self.__dict__.copy()
+        state.update(_spec=None, _index=None, _refreshing=False)
+        return state
+
+    def is_stale(self) -> bool:
+        try:
+            return time.time() - os.path.getmtime(self.filepath) > self.max_age
+        except OSError:
+            return True
+
+    def _load(self):
+        """Load the cached specification, falling back to the bundled one."""
+        try:
+            spec = json.loads(self.filepath.read_text())
+        except (OSError, ValueError):
+            spec = mu.load_package_data("openapi.json")
+
+        self._set(spec)
+
+        if self.is_stale():
+            self.refresh(background=True)
+
+    def _set(self, spec: dict):
+        # Swap both references at once, readers never see a partial index
+        self._spec, self._index = spec, build_index(spec)
+
+    @property
+    def spec(self) -> dict:
+        if self._spec is None:
+            self._load()
+        return self._spec
+
+    @property
+    def index(self) -> dict:
+        if self._index is None:
+            self._load()
+        return self._index
+
+    def save(self, spec: dict):
+        """Write a specification to the cache (atomically) and index it.
+
+        Parameters
+        ----------
+        spec : dict
+            OpenAPI specification.
+        """
+        self.filepath.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.filepath.parent, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(spec, f)
+        os.replace(tmp, self.filepath)
+        self._set(spec)
+
+    def _fetch(self):
+        """Fetch the specification from the server and save it, failures are ignored."""
+        base_url = self.base_url
+        try:
+            spec = (self.fetch or fetch_spec)(f"{base_url}/{endpoints.ENDPOINT_LIST}")
+
+            # Only a specification, of the server still in use, replaces the cached one
+            if is_spec(spec) and self.base_url == base_url:
+                self.save(spec)
+        except Exception:
+            # Often in a daemon thread, where there is nothing to handle it
+            pass
+        finally:
+            self._refreshing = False
+
+    def refresh(self, background: bool = False):
+        """Refresh the specification from the server.
+
+        Parameters
+        ----------
+        background : bool, optional
+            Refresh in a daemon thread rather than blocking, by default False.
+        """
+        if self._refreshing or not self.base_url:
+            return
+
+        self._refreshing = True
+        if background:
+            threading.Thread(target=self._fetch, daemon=True).start()
+        else:
+            self._fetch()
+
+    def validate(
+        self, method: str, endpoint: str, url_path_fields: dict = {}, json: dict = {}
+    ):
+        """Validate a request against the specification, without the network.
+
+        Endpoints that are not in the specification are not validated.
+
+        Parameters
+        ----------
+        method : str
+            HTTP method (upper case).
+        endpoint : str
+            URL template for the API endpoint.
+        url_path_fields : dict, optional
+            Fields to interpolate into the URL template, by default {}
+        json : dict, optional
+            JSON body, by default {}
+
+        Raises
+        ------
+        mx.RequestValidationException
+            When the method is not allowed, or path or body fields are missing.
+        """
+        allowed = self.index.get(_normalise(endpoint))
+        if allowed is None:
+            return
+
+        if method not in allowed:
+            raise mx.RequestValidationException(
+                f"{method} is not allowed for {endpoint} (allowed: {', '.join(allowed)})."
+            )
+
+        missing = [
+            f for f in _FIELD.findall(endpoint) if url_path_fields.get(f) in (None, "")
+        ]
+        if missing:
+            raise mx.RequestValidationException(
+                f"Missing path fields {missing} for {method} {endpoint}."
+            )
+
+        missing = [f for f in allowed[method] if f not in (json or dict())]
+        if missing:
+            raise mx.RequestValidationException(
+                f"Missing required fields {missing} for {method} {endpoint}."
+            )
@@ -0,0 +1,238 @@
+"""In-memory request statistics."""
+
+import bisect
+import math
+import sys
+import threading
+import meorg_client.hooks as mhk
+
+# Not available on Windows
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Latency histogram bucket bounds (seconds), 10% apart from 100us to ~3 hours
+LATENCY_BOUNDS = [1e-4 * 1.1**i for i in range(185)]
+
+# Percentiles reported
+PERCENTILES = [50, 95, 99]
+
+
+class Histogram:
+    """Histogram over fixed bucket bounds, with percentiles accurate to a bucket.
+
+    Parameters
+    ----------
+    bounds : list, optional
+        Ascending upper bounds of the buckets, by default LATENCY_BOUNDS. Values above
+        the last bound are counted in an overflow bucket.
+    """
+
+    def __init__(self, bounds: list = LATENCY_BOUNDS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def add(self, value: float):
+        """Add a value."""
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def percentile(self, percentile: float) -> float:
+        """Get a percentile (the upper bound of the bucket it falls in).
+
+        Parameters
+        ----------
+        percentile : float
+            Percentile, 0-100.
+
+        Returns
+        -------
+        float
+            Value, or None when empty.
+        """
+        if not self.count:
+            return None
+
+        rank = max(1, math.ceil(self.count * percentile / 100))
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return min(self.bounds[i], self.max) if i < len(self.bounds) else self.max
+
+    def cumulative(self, bounds: list) -> list:
+        """Get cumulative counts at coarser bounds (i.e. for exposition).
+
+        Parameters
+        ----------
+        bounds : list
+            Ascending bounds.
+
+        Returns
+        -------
+        list
+            Number of values at or below each bound (to bucket accuracy).
+        """
+        cumulative, seen, i = list(), 0, 0
+        for bound in bounds:
+            while i < len(self.bounds) and self.bounds[i] <= bound * (1 + 1e-9):
+                seen += self.counts[i]
+                i += 1
+            cumulative.append(seen)
+        return cumulative
+
+
+class EndpointStats:
+    """Statistics of the requests to one endpoint template."""
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.errors = 0
+        self.retries = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.statuses = dict()
+
+    def to_dict(self) -> dict:
+        stats = dict(
+            count=self.latency.count,
+            errors=self.errors,
+            retries=self.retries,
+            bytes_sent=self.bytes_sent,
+            bytes_received=self.bytes_received,
+            statuses=dict(self.statuses),
+            mean=self.latency.sum / self.latency.count if self.latency.count else None,
+            max=self.latency.max if self.latency.count else None,
+        )
+        for percentile in PERCENTILES:
+            stats[f"p{percentile}"] = self.latency.percentile(percentile)
+        return stats
+
+
+class ClientStats:
+    """Per-endpoint request statistics, collected by way of client hooks.
+
+    One instance may be shared by several clients.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.endpoints = dict()
+
+    def __getstate__(self) -> dict:
+        # Statistics are local to the process
+        return dict()
+
+    def __setstate__(self, state: dict):
+        self.__init__()
+
+    def attach(self, hooks: mhk.Hooks):
+        """Register with the hooks of a client.
+
+        Parameters
+        ----------
+        hooks : mhk.Hooks
+            Client hooks.
+        """
+        hooks.register(mhk.POST_RESPONSE, self.on_response)
+        hooks.register(mhk.RETRY, self.on_retry)
+
+    def _get(self, endpoint: str) -> EndpointStats:
+        stats = self.endpoints.get(endpoint)
+        if stats is None:
+            stats = self.endpoints[endpoint] = EndpointStats()
+        return stats
+
+    def on_response(self, event: mhk.Event):
+        with self._lock:
+            stats = self._get(event.endpoint)
+            stats.latency.add(event.duration)
+            stats.bytes_sent += event.bytes_sent or 0
+            stats.bytes_received += event.bytes_received or 0
+            stats.statuses[event.status] = stats.statuses.get(event.status, 0) + 1
+            if event.error is not None or event.status >= 400:
+                stats.errors += 1
+
+    def on_retry(self, event: mhk.Event):
+        with self._lock:
+            self._get(event.endpoint).retries += 1
+
+    def to_dict(self) -> dict:
+        """Get the statistics.
+
+        Returns
+        -------
+        dict
+            Endpoint templates mapped to dicts of count, errors, retries, bytes_sent,
+            bytes_received, statuses, mean, max and percentile latencies (seconds).
+        """
+        with self._lock:
+            return {e: s.to_dict() for e, s in sorted(self.endpoints.items())}
+
+
+def get_peak_rss() -> int:
+    """Get the peak resident set size of this process in bytes (None if unknown)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _format_bytes(n: float) -> str:
+    if n is None:
+        return "-"
+    for unit in ["B", "kB", "MB", "GB"]:
+        if n < 1000 or unit == "GB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1000
+
+
+def _format_seconds(s: float) -> str:
+    return "-" if s is None else f"{s * 1000:.0f}ms" if s < 1 else f"{s:.2f}s"
+
+
+def format_summary(stats: dict, wall_time: float) -> str:
+    """Format a summary report of client statistics.
+
+    Parameters
+    ----------
+    stats : dict
+        Statistics from ClientStats.to_dict.
+    wall_time : float
+        Wall time (seconds) the statistics were collected over.
+
+    Returns
+    -------
+    str
+        Report.
+    """
+    count = sum(s["count"] for s in stats.values())
+    errors = sum(s["errors"] for s in stats.values())
+    retries = sum(s["retries"] for s in stats.values())
+    sent = sum(s["bytes_sent"] for s in stats.values())
+    received = sum(s["bytes_received"] for s in stats.values())
+    rate = (sent + received) / 1e6 / wall_time if wall_time > 0 else 0
+
+    lines = [
+        f"Wall time: {wall_time:.2f}s, peak RSS: {_format_bytes(get_peak_rss())}",
+        f"Requests: {count} ({errors} errors, {retries} retries), "
+        f"sent {_format_bytes(sent)}, received {_format_bytes(received)}, {rate:.2f} MB/s",
+    ]
+
+    if stats:
+        width = max(len(e) for e in stats)
+        columns = ["COUNT", "ERRORS", "RETRIES", "P50", "P95", "P99", "SENT", "RECEIVED"]
+        lines.append(f"{'ENDPOINT':<{width}}  " + " ".join(f"{c:>8}" for c in columns))
+        for endpoint, s in stats.items():
+            values = [s["count"], s["errors"], s["retries"]]
+            values += [_format_seconds(s[f"p{p}"]) for p in PERCENTILES]
+            values += [_format_bytes(s["bytes_sent"]), _format_bytes(s["bytes_received"])]
+            lines.append(f"{endpoint:<{width}}  " + " ".join(f"{v:>8}" for v in values))
+
+    return "\n".join(lines)
@@ -0,0 +1,273 @@
+"""Streaming request bodies."""
+
+import hashlib as hl
+import io
+import os
+import tarfile
+import uuid
+import meorg_client.constants as mcc
+
+
+class HashingReader:
+    """File-like wrapper that updates a digest with every byte read through it.
+
+    Parameters
+    ----------
+    file_obj : file-like
+        Binary file object to read from.
+    algorithm : str, optional
+        Name of the hashlib algorithm, by default mcc.UPLOAD_HASH_ALGORITHM.
+    callback : callable, optional
+        Called with the total bytes read after every read, by default None.
+    """
+
+    def __init__(
+        self,
+        file_obj,
+        algorithm: str = mcc.UPLOAD_HASH_ALGORITHM,
+        callback: callable = None,
+    ):
+        self.file_obj = file_obj
+        self.algorithm = algorithm
+        self.hash = hl.new(algorithm)
+        self.bytes_read = 0
+        self.callback = callback
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = self.file_obj.read(size)
+        self.hash.update(chunk)
+        self.bytes_read += len(chunk)
+        if self.callback is not None and chunk:
+            self.callback(self.bytes_read)
+        return chunk
+
+    def hexdigest(self) -> str:
+        """Get the digest of the bytes read so far.
+
+        Returns
+        -------
+        str
+            Hexadecimal digest.
+        """
+        return self.hash.hexdigest()
+
+    def close(self):
+        self.file_obj.close()
+
+
+def _get_size(file_obj) -> int:
+    """Get the number of bytes remaining in a seekable file object.
+
+    Parameters
+    ----------
+    file_obj : file-like
+        File object.
+
+    Returns
+    -------
+    int
+        Number of bytes from the current position to the end.
+    """
+    file_obj = getattr(file_obj, "file_obj", file_obj)
+    position = file_obj.tell()
+    try:
+        return os.fstat(file_obj.fileno()).st_size - position
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        size = file_obj.seek(0, os.SEEK_END) - position
+        file_obj.seek(position)
+        return size
+
+
+def _quote(value: str) -> str:
+    """Quote a multipart header parameter value (WHATWG HTML5 style)."""
+    return value.replace("\\", "\\\\").replace('"', "%22").replace("\r", "%0D").replace("\n", "%0A")
+
+
+class _LazyFile:
+    """A file that is only opened when first read, and closed again at EOF.
+
+    Parameters
+    ----------
+    filepath : path-like
+        Path to the file.
+    size : int
+        Expected size of the file.
+    """
+
+    def __init__(self, filepath, size: int):
+        self.filepath = filepath
+        self.size = size
+        self.remaining = size
+        self.file_obj = None
+        self.done = False
+
+    def read(self, size: int = -1) -> bytes:
+        if self.done:
+            return b""
+        if self.file_obj is None:
+            self.file_obj = open(self.filepath, "rb")
+
+        size = self.remaining if size < 0 else min(size, self.remaining)
+        chunk = self.file_obj.read(size)
+        self.remaining -= len(chunk)
+
+        # The declared length has already been sent, so the file must not change
+        if size and not chunk:
+            self.close()
+            raise OSError(f"{self.filepath} changed size while being read.")
+        if not self.remaining:
+            self.close()
+        return chunk
+
+    def close(self):
+        self.done = True
+        if self.file_obj is not None:
+            self.file_obj.close()
+
+
+class ConcatenatedStream:
+    """A read-only stream over a sequence of byte strings and file objects.
+
+    Subclasses add segments with `_add`, the total length is known up front so that
+    requests are sent with a Content-Length rather than chunked transfer encoding.
+    """
+
+    def __init__(self):
+        self.segments = list()
+        self.length = 0
+        self._index = 0
+
+    def _add(self, segment, size: int):
+        self.segments.append(segment)
+        self.length += size
+
+    def __len__(self) -> int:
+        return self.length
+
+    def read(self, size: int = -1) -> bytes:
+        """Read up to size bytes of the stream (all remaining if negative).
+
+        Parameters
+        ----------
+        size : int, optional
+            Number of bytes, by default -1
+
+        Returns
+        -------
+        bytes
+            Stream bytes, empty when exhausted.
+        """
+        chunks = list()
+        remaining = size
+
+        while remaining != 0 and self._index < len(self.segments):
+            segment = self.segments[self._index]
+
+            if isinstance(segment, bytes):
+                chunk = segment if remaining < 0 else segment[:remaining]
+                rest = segment[len(chunk) :]
+                if rest:
+                    self.segments[self._index] = rest
+                else:
+                    self._index += 1
+            else:
+                chunk = segment.read(remaining if remaining > 0 else mcc.UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    self._index += 1
+
+            chunks.append(chunk)
+            if remaining > 0:
+                remaining -= len(chunk)
+
+        return b"".join(chunks)
+
+    def close(self):
+        """Close all file objects in the stream."""
+        for segment in self.segments:
+            if hasattr(segment, "close"):
+                segment.close()
+
+
+class MultipartEncoder(ConcatenatedStream):
+    """A multipart/form-data body that is read incrementally, never held in memory.
+
+    Parameters
+    ----------
+    parts : list
+        List of (name, filename, file_obj, content_type) or
+        (name, filename, file_obj, content_type, size) tuples, where size is
+        required for file objects that cannot seek.
+    boundary : str, optional
+        Multipart boundary, by default a random one.
+    """
+
+    def __init__(self, parts: list, boundary: str = None):
+        super().__init__()
+        self.boundary = boundary or uuid.uuid4().hex
+
+        for part in parts:
+            name, filename, file_obj, content_type = part[:4]
+            size = part[4] if len(part) > 4 else _get_size(file_obj)
+            header = (
+                f"--{self.boundary}\r\n"
+                f'Content-Disposition: form-data; name="{_quote(name)}"; filename="{_quote(filename)}"\r\n'
+                f"Content-Type: {content_type}\r\n\r\n"
+            ).encode("utf-8")
+            self._add(header, len(header))
+            self._add(file_obj, size)
+            self._add(b"\r\n", 2)
+
+        closing = f"--{self.boundary}--\r\n".encode("utf-8")
+        self._add(closing, len(closing))
+
+    @property
+    def content_type(self) -> str:
+        return f"multipart/form-data; boundary={self.boundary}"
+
+
+class TarStream(ConcatenatedStream):
+    """An uncompressed tar archive of files, built as it is read.
+
+    Nothing is written to disk and files are opened one at a time, so memory and
+    file descriptor use is bounded regardless of the number or size of the files.
+
+    Parameters
+    ----------
+    files : list
+        List of filepaths.
+    arcnames : list, optional
+        Names of the files within the archive, by default their basenames.
+
+    Raises
+    ------
+    ValueError
+        When names within the archive are not unique.
+    """
+
+    def __init__(self, files: list, arcnames: list = None):
+        super().__init__()
+        arcnames = arcnames or [os.path.basename(f) for f in files]
+
+        duplicates = {a for a in arcnames if arcnames.count(a) > 1}
+        if duplicates:
+            raise ValueError(f"Duplicate names in archive {sorted(duplicates)}.")
+
+        for filepath, arcname in zip(files, arcnames):
+            stat = os.stat(filepath)
+            info = tarfile.TarInfo(arcname)
+            info.size = stat.st_size
+            info.mtime = int(stat.st_mtime)
+            info.mode = stat.st_mode & 0o777
+
+            header = info.tobuf(format=tarfile.PAX_FORMAT)
+            self._add(header, len(header))
+            self._add(_LazyFile(filepath, info.size), info.size)
+
+            padding = -info.size % tarfile.BLOCKSIZE
+            if padding:
+                self._add(b"\0" * padding, padding)
+
+        # End of archive marker, padded out to a whole record (as tarfile does)
+        end = 2 * tarfile.BLOCKSIZE
+        end += -(self.length + end) % tarfile.RECORDSIZE
+        self._add(b"\0" * end, end)
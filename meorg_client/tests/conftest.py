@@ -2,9 +2,15 @@ from typing import Dict
 import os
 import pytest
 from pytest import StashKey, CollectReport
+import meorg_client.constants as mcc
+from meorg_client.client import Client
+from meorg_client.fake_server import FakeServer
 
 phase_report_key = StashKey[Dict[str, CollectReport]]()
 
+# Base URL of the server mocked (i.e. with requests_mock) in offline tests
+MOCK_BASE_URL = "http://meorg.test/api"
+
 # Set dev mode
 os.environ["MEORG_DEV_MODE"] = "1"
 
@@ -60,3 +66,52 @@ def model_output_name() -> str:
         Model output name.
     """
     return os.getenv("MEORG_MODEL_OUTPUT_NAME") or "meorg-client-model-output"
+
+
+@pytest.fixture
+def fake_server() -> FakeServer:
+    """Get a fake ME.org server, for tests that run offline.
+
+    Latency, bandwidth and fault rates can be set on it at any point.
+
+    Returns
+    -------
+    FakeServer
+        Running fake server.
+    """
+    with FakeServer(seed=0) as server:
+        yield server
+
+
+@pytest.fixture
+def make_client(monkeypatch) -> callable:
+    """Get a factory of clients of the mocked server, that retry without waiting.
+
+    Returns
+    -------
+    callable
+        Called with arguments to Client, returns a client with MOCK_BASE_URL (which
+        does not validate requests unless asked to).
+    """
+    monkeypatch.setattr(mcc, "RETRY_BACKOFF", 0)
+
+    def _make_client(**kwargs) -> Client:
+        # Not validated by default, which would refresh the specification from the mock
+        kwargs.setdefault("validate_requests", False)
+        client = Client(**kwargs)
+        client.base_url = MOCK_BASE_URL
+        return client
+
+    return _make_client
+
+
+@pytest.fixture
+def client(make_client) -> Client:
+    """Get a client of the mocked server, without circuit breakers.
+
+    Returns
+    -------
+    Client
+        Client.
+    """
+    return make_client(circuit_breakers=False)
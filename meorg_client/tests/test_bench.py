@@ -0,0 +1,91 @@
+"""Test the benchmark suites."""
+
+import json
+from click.testing import CliRunner
+import meorg_client.bench as mbench
+import meorg_client.cli as cli
+
+
+def _results(median: float, peak_memory: int) -> dict:
+    result = dict(
+        suite=mbench.DELETE,
+        params=dict(files=10, n=1),
+        median=median,
+        peak_memory=peak_memory,
+        operations=10,
+        operations_per_second=10 / median,
+    )
+    return dict(results=[result])
+
+
+def test_cases():
+    """Test that every suite has cases, with no more threads than files."""
+    cases = mbench.get_cases(quick=True)
+    assert {suite for suite, _ in cases} == set(mbench.SUITES)
+    assert all(p["n"] <= p["count"] for s, p in cases if s == mbench.UPLOAD)
+
+    cases = mbench.get_cases([mbench.UPLOAD])
+    assert (mbench.UPLOAD, dict(size=mbench.UPLOAD_SIZES[0], count=1, n=1)) in cases
+    assert (mbench.UPLOAD, dict(size=mbench.UPLOAD_SIZES[0], count=1, n=4)) not in cases
+
+
+def test_run():
+    """Test a quick run against the local fake server."""
+    results = mbench.run([mbench.UPLOAD, mbench.DELETE], quick=True, repeat=2)
+    json.dumps(results)
+
+    assert results["repeat"] == 2
+    assert len(results["results"]) == 4
+    for result in results["results"]:
+        assert len(result["seconds"]) == 2
+        assert result["median"] > 0
+        assert result["peak_memory"] > 0
+        assert result["operations_per_second"] > 0
+
+    upload = results["results"][0]
+    assert upload["bytes"] == mbench.QUICK_UPLOAD_SIZES[0] * mbench.QUICK_UPLOAD_COUNTS[0]
+    assert upload["bytes_per_second"] > 0
+
+    # Only the timed requests are counted
+    requests = upload["requests"]["modeloutput/{id}/files"]
+    assert requests["count"] == 2 * mbench.QUICK_UPLOAD_COUNTS[0]
+    assert requests["errors"] == 0
+
+
+def test_compare():
+    """Test that slower or larger runs are regressions, beyond the noise."""
+    baseline = _results(1.0, 10 * mbench.MEMORY_SLACK)
+
+    (row,) = mbench.compare(baseline, _results(1.05, 10 * mbench.MEMORY_SLACK))
+    assert row["time_change"] == 0.05
+    assert not row["regression"]
+
+    (row,) = mbench.compare(baseline, _results(1.2, 10 * mbench.MEMORY_SLACK))
+    assert row["regression"]
+
+    (row,) = mbench.compare(baseline, _results(1.0, 20 * mbench.MEMORY_SLACK))
+    assert row["memory_change"] == 1
+    assert row["regression"]
+
+    # Small increases in memory are noise
+    (row,) = mbench.compare(_results(1.0, 1000), _results(1.0, 2000))
+    assert not row["regression"]
+
+    assert mbench.compare(baseline, dict(results=list())) == list()
+
+
+def test_cli(tmp_path, monkeypatch):
+    """Test that results are written, and regressions fail the command."""
+    monkeypatch.setattr(mbench, "run", lambda **kwargs: _results(2.0, 1000))
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps(_results(1.0, 1000)))
+    output = tmp_path / "results.json"
+
+    result = CliRunner().invoke(cli.cli, ["bench", "--output", str(output)])
+    assert result.exit_code == 0
+    assert json.loads(output.read_text())["results"][0]["median"] == 2.0
+
+    result = CliRunner().invoke(cli.cli, ["bench", "--baseline", str(baseline)])
+    assert result.exit_code == 1
+    assert "time +100.0%" in result.output
+    assert "REGRESSION" in result.output
@@ -0,0 +1,102 @@
+"""Test the client-side circuit breakers."""
+
+import time
+import pytest
+import requests_mock
+import meorg_client.breaker as mb
+import meorg_client.endpoints as endpoints
+import meorg_client.exceptions as mx
+import meorg_client.hooks as mhk
+
+
+def test_circuit_breakers():
+    """Test the closed, open and half-open cycle and its notifications."""
+    breakers = mb.CircuitBreakers(window=4, min_calls=4, reset_timeout=0.05)
+    changes = list()
+    breakers.add_listener(lambda *change: changes.append(change))
+
+    # Half of the recent requests failing opens the circuit
+    for success in [True, False, True, False]:
+        breakers.before("a")
+        breakers.after("a", success)
+    assert breakers.states() == dict(a=mb.OPEN)
+
+    with pytest.raises(mx.CircuitOpenException):
+        breakers.before("a")
+
+    # Other endpoints are unaffected
+    breakers.before("b")
+    assert breakers.state("b") == mb.CLOSED
+
+    # A single trial is let through once the timeout has passed, a failure re-opens
+    time.sleep(0.06)
+    breakers.before("a")
+    with pytest.raises(mx.CircuitOpenException):
+        breakers.before("a")
+    breakers.after("a", False)
+    assert breakers.state("a") == mb.OPEN
+
+    # A successful trial closes the circuit
+    time.sleep(0.06)
+    breakers.before("a")
+    breakers.after("a", True)
+    assert breakers.state("a") == mb.CLOSED
+
+    assert changes == [
+        ("a", mb.CLOSED, mb.OPEN),
+        ("a", mb.OPEN, mb.HALF_OPEN),
+        ("a", mb.HALF_OPEN, mb.OPEN),
+        ("a", mb.OPEN, mb.HALF_OPEN),
+        ("a", mb.HALF_OPEN, mb.CLOSED),
+    ]
+    assert len(breakers.transitions) == 5
+
+
+def test_client_fails_fast(make_client):
+    """Test that the client stops sending to an endpoint returning server errors."""
+    client = make_client(circuit_breakers=mb.CircuitBreakers(min_calls=3), retries=0)
+
+    with requests_mock.Mocker() as mocker:
+        mocker.get(f"{client.base_url}/modeloutput/abc/files", status_code=503)
+
+        for _ in range(3):
+            with pytest.raises(mx.RequestException):
+                client.list_files("abc")
+
+        with pytest.raises(mx.CircuitOpenException):
+            client.list_files("abc")
+        assert mocker.call_count == 3
+
+    assert client.circuit_breakers.state(endpoints.FILE_LIST) == mb.OPEN
+
+
+def test_trial_released(make_client):
+    """Test that a half-open trial that fails other than in the request is recorded."""
+    breakers = mb.CircuitBreakers(min_calls=1, reset_timeout=0.05)
+    client = make_client(circuit_breakers=breakers, retries=0)
+
+    with requests_mock.Mocker() as mocker:
+        mocker.get(f"{client.base_url}/modeloutput/abc/files", status_code=503)
+        with pytest.raises(mx.RequestException):
+            client.list_files("abc")
+        assert breakers.state(endpoints.FILE_LIST) == mb.OPEN
+
+        def _fail(event):
+            raise RuntimeError("hook failed")
+
+        # The trial is let through, then fails before the request is sent
+        time.sleep(0.06)
+        client.hooks.register(mhk.PRE_REQUEST, _fail)
+        with pytest.raises(RuntimeError):
+            client.list_files("abc")
+        assert breakers.state(endpoints.FILE_LIST) == mb.OPEN
+        client.hooks.unregister(mhk.PRE_REQUEST, _fail)
+
+        # So the next trial is not refused for one still in flight
+        time.sleep(0.06)
+        mocker.get(
+            f"{client.base_url}/modeloutput/abc/files",
+            json=dict(data=dict(files=[])),
+        )
+        client.list_files("abc")
+        assert breakers.state(endpoints.FILE_LIST) == mb.CLOSED
@@ -0,0 +1,136 @@
+"""Test the local metadata cache and conditional requests."""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import requests_mock
+from meorg_client.cache import MetadataCache
+from meorg_client.client import Client
+
+
+@pytest.fixture
+def cache(tmp_path) -> MetadataCache:
+    """Get a cache in a temporary directory."""
+    return MetadataCache(tmp_path / "cache.sqlite", ttl=60)
+
+
+@pytest.fixture
+def cached_client(make_client, cache: MetadataCache) -> Client:
+    """Get a client using the cache."""
+    return make_client(cache=cache)
+
+
+def test_metadata_cache(cache: MetadataCache):
+    """Test get, set, expiry and invalidation."""
+    cache.set("a", dict(x=1), tag="mo1")
+    cache.set("b", dict(x=2), tag="mo2")
+    cache.set("c", dict(x=3), ttl=-1)
+
+    assert cache.get("a") == dict(x=1)
+    assert cache.get("c") is None
+
+    cache.invalidate("mo1")
+    assert cache.get("a") is None
+    assert cache.get("b") == dict(x=2)
+
+
+def test_cached_reads_and_invalidation(cached_client: Client):
+    """Test that reads are cached and mutations invalidate them."""
+    files = dict(data=dict(files=[dict(id="f1")]))
+    model_output = dict(data=dict(modeloutput=dict(id="mo1", name="my-output")))
+
+    with requests_mock.Mocker() as m:
+        base_url = cached_client.base_url
+        m.get(f"{base_url}/modeloutput/mo1/files", json=files)
+        m.get(f"{base_url}/modeloutput?name=my-output", json=model_output)
+        m.patch(f"{base_url}/modeloutput/mo1", json=dict(status="success"))
+
+        assert cached_client.list_files("mo1") == files
+        assert cached_client.list_files("mo1") == files
+        cached_client.model_output_query(name="my-output")
+        cached_client.model_output_query(name="my-output")
+        assert m.call_count == 2
+
+        # Invalidates everything about mo1, including the query by name
+        cached_client.model_output_update("mo1", dict(comments="updated"))
+        cached_client.list_files("mo1")
+        cached_client.model_output_query(name="my-output")
+        assert m.call_count == 5
+
+
+class _ValidatingHandler(BaseHTTPRequestHandler):
+    """Serves a file list with an ETag or Last-Modified, honouring conditional requests."""
+
+    def do_GET(self):
+        self.server.requests.append(dict(self.headers))
+        body = json.dumps(dict(data=dict(files=self.server.files))).encode()
+        etag = f'"{len(self.server.files)}"'
+
+        not_modified = (
+            self.headers.get("If-None-Match") == etag
+            if self.server.use_etag
+            else self.headers.get("If-Modified-Since") == self.server.last_modified
+        )
+
+        self.send_response(304 if not_modified else 200)
+        if self.server.use_etag:
+            self.send_header("ETag", etag)
+        else:
+            self.send_header("Last-Modified", self.server.last_modified)
+
+        if not_modified:
+            self.end_headers()
+            return
+
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(params=[True, False], ids=["etag", "last-modified"])
+def server(request):
+    """Local server emitting validators."""
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _ValidatingHandler)
+    httpd.requests = list()
+    httpd.files = [dict(id="f1")]
+    httpd.use_etag = request.param
+    httpd.last_modified = "Mon, 19 Oct 2026 00:00:00 GMT"
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield httpd
+    httpd.shutdown()
+
+
+def test_conditional_requests(server):
+    """Test that unchanged responses are revalidated and served from memory."""
+    client = Client(validate_requests=False)
+    client.base_url = f"http://127.0.0.1:{server.server_port}"
+
+    first = client.list_files("mo1")
+    second = client.list_files("mo1")
+
+    assert first == second == dict(data=dict(files=[dict(id="f1")]))
+    assert client.success()
+
+    # The second request was conditional
+    assert "If-None-Match" not in server.requests[0]
+    assert {"If-None-Match", "If-Modified-Since"} & set(server.requests[1])
+
+    # A change on the server is picked up
+    server.files = [dict(id="f1"), dict(id="f2")]
+    server.last_modified = "Tue, 20 Oct 2026 00:00:00 GMT"
+    assert len(client.list_files("mo1")["data"]["files"]) == 2
+
+
+def test_conditional_requests_disabled(server):
+    """Test that conditional requests can be switched off."""
+    client = Client(conditional_requests=False, validate_requests=False)
+    client.base_url = f"http://127.0.0.1:{server.server_port}"
+
+    client.list_files("mo1")
+    client.list_files("mo1")
+    assert not {"If-None-Match", "If-Modified-Since"} & set(server.requests[1])
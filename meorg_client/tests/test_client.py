@@ -306,6 +306,34 @@ def test_upload_file_multiple(client: Client, test_filepath: str, model_output_i
     )
 
 
+def test_attach_files_to_model_outputs(
+    client: Client, test_filepath: str, model_output_id: str, model_output_generator
+):
+    """Test attaching an uploaded file to other model outputs by file ID.
+
+    Parameters
+    ----------
+    client : Client
+        Client.
+    test_filepath : str
+        Test filepath.
+    model_output_id : str
+        Model output ID.
+    """
+    # Upload once
+    response = client.upload_files(test_filepath, id=model_output_id)[0]
+    file_id = response.get("data").get("files")[0].get("id")
+
+    # Attach to many
+    other_ids = [model_output_generator(f"meorg_test_attach{i}") for i in range(2)]
+    responses = client.attach_files_to_model_outputs(other_ids, [file_id], n=2)
+    assert len(responses) == 2
+
+    for other_id in other_ids:
+        files = client.list_files(other_id)
+        assert file_id in [f.get("id") for f in files.get("data").get("files")]
+
+
 def test_file_list(client: Client, model_output_id: str):
     """Test the listing of files for a model output.
 
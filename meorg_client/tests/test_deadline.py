@@ -0,0 +1,84 @@
+"""Test timeouts, retries and deadlines."""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import requests_mock
+import meorg_client.deadline as md
+import meorg_client.exceptions as mx
+from meorg_client.client import Client
+
+
+def test_deadline():
+    """Test that deadlines nest, and limit timeouts."""
+    assert md.current() is None
+
+    with md.deadline(10) as outer:
+        assert outer.timeout(5, None) == (5, pytest.approx(10, abs=0.1))
+
+        # An inner deadline cannot extend the outer one
+        with md.deadline(60) as inner:
+            assert inner is outer
+        with md.deadline(1) as inner:
+            assert md.current() is inner
+        with md.deadline(None) as inner:
+            assert inner is outer
+
+    assert md.current() is None
+
+    expired = md.Deadline(-1)
+    with pytest.raises(mx.DeadlineExceededException):
+        expired.check()
+
+
+def test_retries(client: Client):
+    """Test that reads are retried on server errors, and other requests are not."""
+    url = f"{client.base_url}/modeloutput/abc/files"
+
+    with requests_mock.Mocker() as mocker:
+        mocker.get(url, [dict(status_code=503), dict(json=dict(data=dict(files=[])))])
+        mocker.delete(f"{url}/f1", status_code=503)
+
+        assert client.list_files("abc") == dict(data=dict(files=[]))
+        assert mocker.call_count == 2
+
+        with pytest.raises(mx.RequestException):
+            client.delete_file_from_model_output("abc", "f1")
+        assert mocker.call_count == 3
+
+
+class _SlowHandler(BaseHTTPRequestHandler):
+    """Lists one file, then takes too long to delete it."""
+
+    def do_GET(self):
+        body = b'{"data": {"files": [{"id": "f1"}]}}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_DELETE(self):
+        time.sleep(2)
+        self.send_response(200)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def test_deadline_across_requests(client: Client):
+    """Test that the deadline of an operation spans its requests."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _SlowHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client.base_url = f"http://127.0.0.1:{server.server_port}/api"
+
+    start = time.time()
+    try:
+        with pytest.raises(mx.DeadlineExceededException):
+            client.delete_all_files_from_model_output("abc", deadline=0.5)
+    finally:
+        server.shutdown()
+
+    assert time.time() - start < 1.5
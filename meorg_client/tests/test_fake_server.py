@@ -0,0 +1,215 @@
+"""Test the fake ME.org server."""
+
+import time
+import pytest
+import requests
+from click.testing import CliRunner
+import meorg_client.cli as cli
+import meorg_client.constants as mcc
+import meorg_client.endpoints as endpoints
+import meorg_client.fake_server as mfs
+from meorg_client.exceptions import RequestException
+
+
+@pytest.fixture
+def client(fake_server, monkeypatch):
+    monkeypatch.setattr(mcc, "RETRY_BACKOFF", 0)
+    return fake_server.client(validate_requests=False, circuit_breakers=False)
+
+
+@pytest.fixture
+def model_output_id(client) -> str:
+    response = client.model_output_create("profile", "fake-model-output")
+    return response.get("data").get("modeloutput")
+
+
+def test_workflow(client, model_output_id, tmp_path):
+    """Test a full upload and analysis against the fake server."""
+    filepaths = list()
+    for i in range(3):
+        filepath = tmp_path / f"site{i}.nc"
+        filepath.write_bytes(bytes([i]) * (mcc.UPLOAD_CHUNK_SIZE + i))
+        filepaths.append(filepath)
+
+    # Server checksums are verified, in one request and in several
+    responses = client.upload_files(filepaths, id=model_output_id, n=2)
+    responses += client.upload_files(filepaths, id=model_output_id, batch_size=3)
+    file_ids = [r.get("data").get("files")[0].get("id") for r in responses]
+    assert len(set(file_ids)) == 6
+
+    files = client.list_files(model_output_id).get("data").get("files")
+    assert sorted(f.get("id") for f in files) == sorted(file_ids)
+    assert sorted(f.get("name") for f in files) == sorted(["site0.nc", "site1.nc", "site2.nc"] * 2)
+
+    # Files can be shared with another model output
+    other = client.model_output_create("profile", "other")["data"]["modeloutput"]
+    client.attach_files_to_model_output(other, file_ids[:1])
+    assert len(client.list_files(other)["data"]["files"]) == 1
+
+    client.delete_all_files_from_model_output(model_output_id)
+    assert client.list_files(model_output_id)["data"]["files"] == list()
+
+    # The analysis completes after a few polls
+    response = client.start_analysis(model_output_id, "experiment")
+    analysis_id = response.get("data").get("analysisId")
+    statuses = [
+        client.get_analysis_status(analysis_id)["data"]["status"] for _ in range(3)
+    ]
+    assert statuses == ["pending", "running", "complete"]
+
+    # Model outputs are found by ID and name
+    response = client.model_output_query(name="fake-model-output")
+    assert response["data"]["modeloutput"]["id"] == model_output_id
+    client.model_output_delete(model_output_id)
+    with pytest.raises(RequestException):
+        client.model_output_query(model_output_id)
+
+
+def test_attach_files(fake_server, client, model_output_id, tmp_path, monkeypatch):
+    """Test that files uploaded once are attached to other model outputs by ID."""
+    filepaths = list()
+    for i in range(2):
+        filepath = tmp_path / f"forcing{i}.nc"
+        filepath.write_bytes(bytes([i]) * 1000)
+        filepaths.append(filepath)
+
+    responses = client.upload_files(filepaths, id=model_output_id)
+    file_ids = [f["id"] for r in responses for f in r["data"]["files"]]
+    uploads = fake_server.hits[(mcc.HTTP_POST, endpoints.FILE_UPLOAD)]
+
+    # Concurrently, and once more without duplicating them
+    others = [
+        client.model_output_create("profile", f"other{i}")["data"]["modeloutput"]
+        for i in range(3)
+    ]
+    responses = client.attach_files_to_model_outputs(others, file_ids, n=2)
+    assert [r["data"]["files"] for r in responses] == [file_ids] * 3
+    client.attach_files_to_model_output(others[0], file_ids[0])
+
+    for other in others:
+        files = client.list_files(other)["data"]["files"]
+        assert sorted(f["id"] for f in files) == sorted(file_ids)
+
+    # Nothing is uploaded again, and unknown files are not attached
+    assert fake_server.hits[(mcc.HTTP_POST, endpoints.FILE_UPLOAD)] == uploads
+    with pytest.raises(RequestException):
+        client.attach_files_to_model_output(others[0], "missing")
+
+    # The command takes comma-separated IDs
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.setenv("MEORG_BASE_URL_DEV", fake_server.base_url)
+    monkeypatch.setenv("MEORG_EMAIL", mfs.EMAIL)
+    monkeypatch.setenv("MEORG_PASSWORD", mfs.PASSWORD)
+    other = client.model_output_create("profile", "other3")["data"]["modeloutput"]
+    result = CliRunner().invoke(
+        cli.cli, ["file", "attach", ",".join(file_ids), f"{others[0]},{other}"]
+    )
+    assert result.exit_code == 0, result.output
+    assert "SUCCESS" in result.output
+    assert len(client.list_files(other)["data"]["files"]) == 2
+
+
+def test_benchmarks_and_experiments(client, model_output_id):
+    """Test the benchmark and experiment endpoints."""
+    other = client.model_output_create("profile", "benchmark")["data"]["modeloutput"]
+    client.model_output_experiments_extend(other, ["experiment"])
+
+    response = client.model_output_benchmarks_list(model_output_id, "experiment")
+    assert response["data"]["benchmarks"] == [dict(id=other, name="benchmark")]
+    assert response["data"]["current"] == list()
+
+    client.model_output_benchmarks_replace(model_output_id, "experiment", [other])
+    response = client.model_output_benchmarks_list(model_output_id, "experiment")
+    assert response["data"]["current"] == [other]
+
+    client.model_output_experiment_delete(other, "experiment")
+    with pytest.raises(RequestException):
+        client.model_output_experiment_delete(other, "experiment")
+
+
+def test_auth(fake_server):
+    """Test that requests are rejected without logging in, and after logging out."""
+    client = fake_server.client(validate_requests=False)
+    client.logout()
+    with pytest.raises(RequestException) as ex:
+        client.model_output_create("profile", "name")
+    assert "401" in str(ex.value.msg)
+
+
+def test_spec(fake_server, tmp_path, monkeypatch):
+    """Test that the bundled specification is served, for validating requests."""
+    monkeypatch.setenv("HOME", str(tmp_path))
+    client = fake_server.client()
+    assert "/modeloutput" in client.list_endpoints(refresh=True)["paths"]
+
+
+def test_latency_and_bandwidth(fake_server, client, model_output_id, tmp_path):
+    """Test that latency and the bandwidth limit slow requests down."""
+    fake_server.latency = 0.1
+    start = time.perf_counter()
+    client.list_files(model_output_id)
+    assert time.perf_counter() - start >= 0.1
+
+    fake_server.latency = 0
+    fake_server.bandwidth = 10e6
+    filepath = tmp_path / "data.nc"
+    filepath.write_bytes(b"x" * 2 * mcc.UPLOAD_CHUNK_SIZE)
+    start = time.perf_counter()
+    client.upload_files(filepath, id=model_output_id)
+    assert time.perf_counter() - start >= 0.2
+
+
+def test_faults(fake_server, client, model_output_id):
+    """Test each kind of injected fault, and that reads are retried through them."""
+    list_files = [endpoints.FILE_LIST]
+
+    fake_server.fault_endpoints = list_files
+    fake_server.error_rate = 1
+    with pytest.raises(RequestException) as ex:
+        client.list_files(model_output_id)
+    assert "503" in str(ex.value.msg)
+    assert fake_server.faults[mfs.ERROR] == client.retries + 1
+
+    fake_server.error_rate, fake_server.throttle_rate = 0, 1
+    with pytest.raises(RequestException) as ex:
+        client.list_files(model_output_id)
+    assert "429" in str(ex.value.msg)
+    assert client.last_response.headers["Retry-After"] == str(mfs.RETRY_AFTER)
+
+    fake_server.throttle_rate, fake_server.drop_rate = 0, 1
+    with pytest.raises(requests.ConnectionError):
+        client.list_files(model_output_id)
+
+    # Other endpoints are untouched
+    client.model_output_query(model_output_id)
+
+    # Some of the reads fail, and are retried
+    fake_server.drop_rate, fake_server.error_rate = 0.2, 0.2
+    hits = fake_server.hits[(mcc.HTTP_GET, endpoints.FILE_LIST)]
+    for _ in range(10):
+        client.list_files(model_output_id)
+    assert fake_server.hits[(mcc.HTTP_GET, endpoints.FILE_LIST)] - hits > 10
+
+
+def test_cli(monkeypatch):
+    """Test that the command serves until interrupted."""
+
+    def _interrupt(server):
+        server.stop()
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(mfs.FakeServer, "serve_forever", _interrupt)
+    result = CliRunner().invoke(
+        cli.cli, ["fake-server", "--port", "0", "--latency", "0.1"]
+    )
+    assert result.exit_code == 0
+    assert "Serving a fake ME.org API at http://127.0.0.1:" in result.output
+
+
+def test_create_existing(client, model_output_id):
+    """Test that only an overwritten model output is flagged as existing."""
+    response = client.model_output_create("profile", "new-model-output")
+    assert "existing" not in response["data"]
+
+    response = client.model_output_create("profile", "fake-model-output")
+    assert response["data"] == dict(modeloutput=model_output_id, existing=True)
@@ -0,0 +1,103 @@
+"""Test hedged requests."""
+
+import pickle
+import threading
+import meorg_client.hedging as mh
+
+
+def _hedger(**kwargs) -> mh.Hedger:
+    """Get a hedger that has seen 20 fast requests to "key"."""
+    hedger = mh.Hedger(min_delay=0.01, **kwargs)
+    for _ in range(20):
+        hedger.record("key", 0.01)
+    return hedger
+
+
+def test_threshold():
+    """Test that the threshold tracks the latency percentile once there are enough."""
+    hedger = mh.Hedger(min_samples=10, min_delay=0)
+    for i in range(9):
+        hedger.record("key", i)
+    assert hedger.threshold("key") is None
+
+    for i in range(9, 100):
+        hedger.record("key", i)
+    assert hedger.threshold("key") == 95
+    assert hedger.threshold("other") is None
+
+
+def test_hedge_wins():
+    """Test that a stalled call is hedged and the hedge's result is returned."""
+    hedger = _hedger(budget=1)
+    release = threading.Event()
+    calls = list()
+
+    def _stall_first():
+        calls.append(None)
+        if len(calls) == 1:
+            release.wait(5)
+            return "slow"
+        return "fast"
+
+    assert hedger.call("key", _stall_first) == "fast"
+    assert (hedger.hedged, hedger.hedge_wins) == (1, 1)
+    release.set()
+
+
+def test_server_error_loses():
+    """Test that a hedge answering first with a server error is not returned."""
+    hedger = _hedger(budget=1)
+    calls = list()
+
+    class _Response:
+        def __init__(self, status_code):
+            self.status_code = status_code
+
+    def _stall_first():
+        calls.append(None)
+        if len(calls) == 1:
+            threading.Event().wait(0.1)
+            return _Response(200)
+        return _Response(503)
+
+    assert hedger.call("key", _stall_first).status_code == 200
+    assert (hedger.hedged, hedger.hedge_wins) == (1, 0)
+
+
+def test_inline():
+    """Test that calls that cannot be hedged are made on the calling thread."""
+    hedger = mh.Hedger()
+    assert hedger.call("key", threading.current_thread) is threading.current_thread()
+
+    hedger = _hedger(budget=0.5)
+    assert hedger.call("key", threading.current_thread) is threading.current_thread()
+
+
+def test_budget():
+    """Test that hedges are bounded by the budget, and failed hedges are not used."""
+    hedger = _hedger(budget=0.5, burst=1, percentile=50)
+    running = list()
+
+    def _slow_or_fail():
+        # Hedges start while the first call is still running
+        if running:
+            raise ValueError("hedge failed")
+        running.append(None)
+        threading.Event().wait(0.1)
+        running.clear()
+        return "ok"
+
+    # 0.5 tokens per call, so only every other call is hedged
+    results = [hedger.call("key", _slow_or_fail) for _ in range(4)]
+    assert results == ["ok"] * 4
+    assert hedger.requests == 4
+    assert hedger.hedged == 2
+    assert hedger.hedge_wins == 0
+
+
+def test_pickle():
+    """Test that a hedger can be sent to other processes."""
+    hedger = pickle.loads(pickle.dumps(_hedger(budget=0.2)))
+    assert hedger.budget == 0.2
+    assert hedger.threshold("key") is None
+    assert hedger.call("key", lambda: 1) == 1
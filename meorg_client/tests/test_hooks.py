@@ -0,0 +1,90 @@
+"""Test the request and upload hooks."""
+
+import pytest
+import requests_mock
+import meorg_client.constants as mcc
+import meorg_client.endpoints as endpoints
+import meorg_client.hooks as mhk
+from meorg_client.client import Client
+
+
+def test_request_hooks(client: Client):
+    """Test the events of a retried request."""
+    events = list()
+    for event in mhk.EVENTS:
+        client.hooks.register(event, events.append)
+
+    with requests_mock.Mocker() as mocker:
+        mocker.get(
+            f"{client.base_url}/modeloutput/abc/files",
+            [dict(status_code=503), dict(json=dict(data=dict(files=["f1"])))],
+        )
+        client.list_files("abc")
+
+    assert [e.name for e in events] == [
+        mhk.PRE_REQUEST,
+        mhk.POST_RESPONSE,
+        mhk.RETRY,
+        mhk.PRE_REQUEST,
+        mhk.POST_RESPONSE,
+    ]
+    assert {e.endpoint for e in events} == {endpoints.FILE_LIST}
+    assert [e.attempt for e in events] == [0, 0, 1, 1, 1]
+
+    retry, response = events[2], events[4]
+    assert retry.status == 503
+    assert response.status == 200
+    assert response.bytes_received == len(b'{"data": {"files": ["f1"]}}')
+    assert 0 <= response.first_byte <= response.duration
+
+    # Nothing is emitted once unregistered
+    for event in mhk.EVENTS:
+        client.hooks.unregister(event, events.append)
+
+    with requests_mock.Mocker() as mocker:
+        mocker.get(
+            f"{client.base_url}/modeloutput/abc/files",
+            json=dict(data=dict(files=[])),
+        )
+        client.list_files("abc")
+    assert len(events) == 5
+
+
+def test_no_hooks(client: Client, monkeypatch):
+    """Test that no events are even built without hooks (or statistics)."""
+
+    def _fail(*args, **kwargs):
+        raise AssertionError("Event built without hooks.")
+
+    monkeypatch.setattr(mhk, "Event", _fail)
+    with requests_mock.Mocker() as mocker:
+        mocker.get(
+            f"{client.base_url}/modeloutput/abc/files",
+            json=dict(data=dict(files=[])),
+        )
+        client.list_files("abc")
+
+
+def test_upload_progress(client: Client, tmp_path):
+    """Test that upload progress is reported as the body is sent."""
+    filepath = tmp_path / "data.nc"
+    filepath.write_bytes(b"x" * (3 * mcc.UPLOAD_CHUNK_SIZE))
+
+    progress = list()
+    client.hooks.register(mhk.UPLOAD_PROGRESS, progress.append)
+
+    def _read_body(request, context):
+        while request.body.read(mcc.UPLOAD_CHUNK_SIZE):
+            pass
+        return dict(data=dict(files=[dict(id="f1", name="data.nc")]))
+
+    with requests_mock.Mocker() as mocker:
+        mocker.post(f"{client.base_url}/modeloutput/abc/files", json=_read_body)
+        client.upload_files(filepath, id="abc", progress=False)
+
+    assert {e.filename for e in progress} == {"data.nc"}
+    assert progress[-1].bytes_done == progress[-1].bytes_total == filepath.stat().st_size
+    assert [e.bytes_done for e in progress] == sorted(e.bytes_done for e in progress)
+
+    with pytest.raises(ValueError):
+        client.hooks.register("bad", print)
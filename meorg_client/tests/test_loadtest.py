@@ -0,0 +1,166 @@
+"""Test the load test."""
+
+import json
+import pytest
+from click.testing import CliRunner
+import meorg_client.cli as cli
+import meorg_client.endpoints as endpoints
+import meorg_client.fake_server as mfs
+import meorg_client.loadtest as mlt
+
+
+def _step(throughput: float, error_rate: float = 0, p95: float = 0.1, **load) -> dict:
+    return dict(throughput=throughput, error_rate=error_rate, p95=p95, **load)
+
+
+@pytest.fixture
+def load_test(fake_server, tmp_path):
+    client = fake_server.client(
+        validate_requests=False,
+        retries=0,
+        circuit_breakers=False,
+        coalesce_requests=False,
+    )
+    # Seeded so that every operation is drawn within the first few
+    test = mlt.LoadTest(
+        client,
+        file_size=1000,
+        model_profile_id="profile",
+        experiment_id="experiment",
+        seed=2,
+    )
+    test.setup(str(tmp_path))
+    yield test
+    test.teardown()
+
+
+def test_parse_mix():
+    """Test parsing mixes of operations."""
+    assert mlt.parse_mix("upload=1, query=2.5,poll") == dict(
+        upload=1, query=2.5, poll=1
+    )
+    assert mlt.parse_mix("upload=0,query=1") == dict(query=1)
+    for value in ["download=1", "query=-1", "query=0", "query=x"]:
+        with pytest.raises(ValueError):
+            mlt.parse_mix(value)
+
+
+def test_percentile():
+    """Test nearest-rank percentiles."""
+    values = list(range(1, 101))
+    assert mlt.percentile(values, 50) == 50
+    assert mlt.percentile(values, 99) == 99
+    assert mlt.percentile(values, 100) == 100
+    assert mlt.percentile([3], 1) == 3
+    assert mlt.percentile(list(), 50) is None
+
+
+def test_find_saturation():
+    """Test each reason a step is saturated."""
+    steps = [
+        _step(10, concurrency=1),
+        _step(19, concurrency=2),
+        _step(20, concurrency=4),
+    ]
+    saturation = mlt.find_saturation(steps)
+    assert saturation["saturated"]
+    assert saturation["step"] == 2
+    assert saturation["sustained"] == 1
+    assert "19.0/s at concurrency 2" in saturation["reasons"][0]
+
+    steps = [_step(10, rate=10), _step(15, rate=20)]
+    saturation = mlt.find_saturation(steps)
+    assert saturation["step"] == 1
+    assert "below the target 20/s" in saturation["reasons"][0]
+
+    steps = [_step(10, error_rate=0.5, p95=2, rate=10)]
+    saturation = mlt.find_saturation(steps, max_p95=1)
+    assert saturation["sustained"] is None
+    assert len(saturation["reasons"]) == 2
+
+    steps = [_step(10, rate=10), _step(20, rate=20)]
+    assert mlt.find_saturation(steps) == dict(
+        saturated=False, step=None, reasons=list(), sustained=1
+    )
+
+
+def test_concurrency(fake_server, load_test):
+    """Test stepping up concurrency, with every operation in the mix."""
+    fake_server.latency = 0.01
+    result = load_test.run(concurrency=[1, 2], duration=0.3, stop_on_saturation=False)
+    json.dumps(result)
+
+    first, second = result["steps"]
+    assert first["concurrency"] == 1
+    assert first["error_rate"] == 0
+    assert set(first["by_operation"]) == set(mlt.OPERATIONS)
+    assert first["p50"] >= 0.01
+    assert second["throughput"] > first["throughput"]
+
+    # Every upload reached the model output
+    files = load_test.client.list_files(load_test.model_output_id)["data"]["files"]
+    uploads = sum(s["by_operation"][mlt.UPLOAD]["operations"] for s in result["steps"])
+    assert len(files) == uploads
+
+
+def test_rate(fake_server, load_test):
+    """Test a target rate, with errors counted by kind."""
+    fake_server.fault_endpoints = [endpoints.MODEL_OUTPUT_QUERY]
+    fake_server.error_rate = 1
+    load_test.mix = dict(query=1, poll=1)
+
+    steps = list()
+    result = load_test.run(rates=[50, 100], duration=0.5, callback=steps.append)
+
+    # Saturated at the first step, by the errors
+    assert result["steps"] == steps
+    (step,) = steps
+    assert step["rate"] == 50
+    assert 0.2 < step["error_rate"] < 0.8
+    assert set(step["errors"]) == {"HTTP 503"}
+    assert step["by_operation"][mlt.POLL]["error_rate"] == 0
+    assert result["saturation"]["saturated"]
+    assert "error rate" in mlt.format_saturation(result)
+    assert "rate 50/s" in mlt.format_step(step)
+
+
+def test_setup(load_test):
+    """Test that polling needs an analysis."""
+    test = mlt.LoadTest(load_test.client, mix=dict(poll=1), model_profile_id="p")
+    with pytest.raises(ValueError):
+        test.setup(".")
+
+
+def test_cli(fake_server, tmp_path, monkeypatch):
+    """Test the command against the fake server."""
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.setenv("MEORG_BASE_URL_DEV", fake_server.base_url)
+    monkeypatch.setenv("MEORG_EMAIL", mfs.EMAIL)
+    monkeypatch.setenv("MEORG_PASSWORD", mfs.PASSWORD)
+    output = tmp_path / "loadtest.json"
+
+    args = [
+        "loadtest",
+        "--model-profile",
+        "profile",
+        "--experiment",
+        "experiment",
+        "--concurrency",
+        "1,2",
+        "--duration",
+        "0.2",
+        "--file-size",
+        "1000",
+        "--output",
+        str(output),
+    ]
+    result = CliRunner().invoke(cli.cli, args)
+    assert result.exit_code == 0, result.output
+    assert "concurrency 1 " in result.output
+    assert len(json.loads(output.read_text())["steps"]) >= 1
+
+    # The test model output is removed
+    assert fake_server.model_outputs == dict()
+
+    result = CliRunner().invoke(cli.cli, args + ["--rate", "10"])
+    assert result.exit_code == 2
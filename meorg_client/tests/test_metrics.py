@@ -0,0 +1,111 @@
+"""Test the Prometheus metrics."""
+
+import threading
+import time
+import pytest
+import requests
+import requests_mock
+import meorg_client.constants as mcc
+import meorg_client.metrics as mmt
+import meorg_client.parallel as meop
+from meorg_client.client import Client
+
+
+@pytest.fixture
+def metrics() -> mmt.Metrics:
+    return mmt.Metrics()
+
+
+@pytest.fixture
+def client(make_client, metrics) -> Client:
+    return make_client(circuit_breakers=False, metrics=metrics)
+
+
+def _parse(text: str) -> dict:
+    """Parse samples of the exposition format into {name{labels}: value}."""
+    samples = dict()
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    return samples
+
+
+def test_requests(client: Client, metrics):
+    """Test request counts, retries and durations."""
+    with requests_mock.Mocker() as mocker:
+        mocker.get(
+            f"{client.base_url}/modeloutput/abc/files",
+            [dict(status_code=503), dict(json=dict(data=dict(files=[])))],
+        )
+        client.list_files("abc")
+
+    samples = _parse(metrics.expose())
+    labels = 'endpoint="modeloutput/{id}/files",method="GET"'
+    assert samples[f"meorg_requests_total{{{labels},status=\"503\"}}"] == 1
+    assert samples[f"meorg_requests_total{{{labels},status=\"200\"}}"] == 1
+    assert samples[f"meorg_retries_total{{{labels}}}"] == 1
+    assert samples[f"meorg_request_duration_seconds_count{{{labels}}}"] == 2
+    assert samples[f'meorg_request_duration_seconds_bucket{{{labels},le="+Inf"}}'] == 2
+    assert samples['meorg_inflight_requests{endpoint="modeloutput/{id}/files"}'] == 0
+    assert samples["meorg_pending_tasks"] == 0
+
+
+def test_upload_bytes(client: Client, metrics, tmp_path):
+    """Test that uploaded bytes are counted while the body is sent."""
+    filepaths = [tmp_path / f"data{i}.nc" for i in range(3)]
+    for filepath in filepaths:
+        filepath.write_bytes(b"x" * (2 * mcc.UPLOAD_CHUNK_SIZE))
+
+    def _read_body(request, context):
+        while request.body.read(mcc.UPLOAD_CHUNK_SIZE):
+            pass
+        return dict(data=dict(files=[dict(id="f1", name="data0.nc")]))
+
+    with requests_mock.Mocker() as mocker:
+        mocker.post(f"{client.base_url}/modeloutput/abc/files", json=_read_body)
+        client.upload_files(filepaths, id="abc", n=2, progress=False)
+
+    samples = _parse(metrics.expose())
+    assert samples["meorg_upload_bytes_total"] == 3 * 2 * mcc.UPLOAD_CHUNK_SIZE
+    assert samples["meorg_pending_tasks"] == 0
+
+
+def test_pending_tasks():
+    """Test that tasks are counted until they finish, even when one fails."""
+    release = threading.Event()
+
+    def _task(i):
+        release.wait()
+        if i == 3:
+            raise ValueError()
+        return [i]
+
+    def _run():
+        with pytest.raises(ValueError):
+            meop.parallelise(_task, 2, progress=False, threads=True, i=list(range(4)))
+
+    thread = threading.Thread(target=_run)
+    thread.start()
+    while meop.get_pending() < 4:
+        time.sleep(0.01)
+    release.set()
+    thread.join()
+
+    assert meop.get_pending() == 0
+
+
+def test_exposition(metrics, tmp_path):
+    """Test the HTTP listener and the textfile writer."""
+    server = mmt.MetricsServer(metrics, 0, "127.0.0.1")
+    try:
+        response = requests.get(f"http://127.0.0.1:{server.port}/metrics")
+        assert response.headers["Content-Type"] == mmt.CONTENT_TYPE
+        assert "# TYPE meorg_requests_total counter" in response.text
+        assert requests.get(f"http://127.0.0.1:{server.port}/other").status_code == 404
+    finally:
+        server.stop()
+
+    path = tmp_path / "meorg.prom"
+    mmt.TextfileWriter(metrics, path, interval=60).stop()
+    assert path.read_text() == metrics.expose()
@@ -0,0 +1,106 @@
+"""Test the preprocessing of files prior to upload."""
+
+import os
+import pytest
+import meorg_client.preprocessing as mpp
+
+netCDF4 = pytest.importorskip("netCDF4")
+np = pytest.importorskip("numpy")
+
+
+@pytest.fixture
+def netcdf_filepath(tmp_path) -> str:
+    """Create a small CABLE-like output file.
+
+    Returns
+    -------
+    str
+        Path to the file.
+    """
+    filepath = tmp_path / "cable_out.nc"
+
+    with netCDF4.Dataset(filepath, "w") as ds:
+        ds.createDimension("time", None)
+        ds.createDimension("x", 2)
+
+        time = ds.createVariable("time", "f8", ("time",))
+        time.units = "days since 2000-01-01 00:00:00"
+        time.calendar = "standard"
+        time[:] = np.arange(10)
+
+        x = ds.createVariable("x", "f8", ("x",))
+        x[:] = [1.0, 2.0]
+
+        for name in ["Qle", "Qh", "NEE"]:
+            var = ds.createVariable(name, "f4", ("time", "x"), fill_value=-9999.0)
+            var.units = "W/m^2"
+            var[:] = np.arange(20).reshape(10, 2)
+
+    return str(filepath)
+
+
+def test_parse_time_range():
+    """Test parse_time_range."""
+    start, end = mpp.parse_time_range("2000-01-01,")
+    assert start.year == 2000
+    assert end is None
+
+    with pytest.raises(ValueError):
+        mpp.parse_time_range("2001-01-01,2000-01-01")
+
+
+def test_subset_netcdf(netcdf_filepath: str, tmp_path):
+    """Test subsetting variables and time."""
+    dst = mpp.subset_netcdf(
+        netcdf_filepath,
+        tmp_path / "subset.nc",
+        variables=["Qle"],
+        time_range=("2000-01-03", "2000-01-05"),
+        chunk_size=2,
+    )
+
+    with netCDF4.Dataset(dst) as ds:
+        assert set(ds.variables.keys()) == {"time", "x", "Qle"}
+        assert list(ds.variables["time"][:]) == [2.0, 3.0, 4.0]
+        assert ds.variables["Qle"].units == "W/m^2"
+        assert ds.variables["Qle"][:].tolist() == [[4, 5], [6, 7], [8, 9]]
+
+
+def test_subset_netcdf_missing_variable(netcdf_filepath: str, tmp_path):
+    """Test that missing variables are rejected."""
+    with pytest.raises(ValueError):
+        mpp.subset_netcdf(netcdf_filepath, tmp_path / "subset.nc", variables=["GPP"])
+
+
+def test_subset_netcdf_scalar_time(tmp_path):
+    """Test that a file with a scalar time coordinate can only be subset by variable."""
+    src = tmp_path / "snapshot.nc"
+    with netCDF4.Dataset(src, "w") as ds:
+        ds.createDimension("x", 2)
+        time = ds.createVariable("time", "f8", ())
+        time.units = "days since 2000-01-01 00:00:00"
+        time.assignValue(5.0)
+        for name in ["Qle", "Qh"]:
+            ds.createVariable(name, "f4", ("x",))[:] = [1.0, 2.0]
+
+    dst = mpp.subset_netcdf(src, tmp_path / "subset.nc", variables=["Qle"])
+    with netCDF4.Dataset(dst) as ds:
+        assert set(ds.variables.keys()) == {"Qle"}
+
+    dst = mpp.subset_netcdf(src, tmp_path / "copy.nc")
+    with netCDF4.Dataset(dst) as ds:
+        assert set(ds.variables.keys()) == {"time", "Qle", "Qh"}
+        assert float(ds.variables["time"][...]) == 5.0
+
+    with pytest.raises(ValueError):
+        mpp.subset_netcdf(src, tmp_path / "range.nc", time_range="2000-01-01,")
+
+
+def test_subset_files_cleanup(netcdf_filepath: str):
+    """Test that temporary files are removed."""
+    with mpp.subset_files([netcdf_filepath], variables=["Qh"]) as files:
+        subset = files[0]
+        assert os.path.basename(subset) == os.path.basename(netcdf_filepath)
+        assert os.path.isfile(subset)
+
+    assert not os.path.exists(subset)
@@ -0,0 +1,67 @@
+"""Test profiling."""
+
+import os
+import pstats
+import time
+import pytest
+import meorg_client.parallel as meop
+import meorg_client.profiling as mprof
+
+_kept = list()
+
+
+def _spin(i: int) -> list:
+    end = time.perf_counter() + 0.05
+    while time.perf_counter() < end:
+        pass
+    return [i]
+
+
+def _allocate(i: int) -> list:
+    _kept.append(bytearray(1000000))
+    return [i]
+
+
+@pytest.mark.parametrize("threads", [True, False])
+def test_cpu(tmp_path, threads):
+    """Test that tasks in worker threads and processes are profiled."""
+    profiler = mprof.Profiler(mprof.CPU, tmp_path)
+    profiler.start()
+    meop.parallelise(_spin, 2, progress=False, threads=threads, i=[0, 1, 2])
+    summary = profiler.stop()
+
+    stats = pstats.Stats(str(tmp_path / "cpu.pstats"))
+    calls = {f[2]: v[1] for f, v in stats.stats.items()}
+    assert calls["_spin"] == 3
+    assert (tmp_path / "cpu-summary.txt").read_text() == summary + "\n"
+    assert mprof.ENV_MODE not in os.environ
+
+
+def test_wall(tmp_path):
+    """Test that the stacks of worker threads are sampled."""
+    profiler = mprof.Profiler(mprof.WALL, tmp_path)
+    profiler.start()
+    meop.parallelise(_spin, 2, progress=False, threads=True, i=[0, 1, 2, 3])
+    summary = profiler.stop()
+
+    folded = (tmp_path / "wall.folded").read_text()
+    assert "_spin (test_profiling.py:" in folded
+    assert "_spin (test_profiling.py:" in summary
+
+
+def test_memory(tmp_path):
+    """Test that the top allocators are reported."""
+    profiler = mprof.Profiler(mprof.MEMORY, tmp_path)
+    profiler.start()
+    meop.parallelise(_allocate, 2, progress=False, threads=True, i=[0, 1])
+    summary = profiler.stop()
+    _kept.clear()
+
+    assert (tmp_path / "memory.tracemalloc").exists()
+    assert "test_profiling.py" in summary.splitlines()[4]
+
+
+def test_unknown_mode():
+    """Test that unknown modes are rejected."""
+    with pytest.raises(ValueError):
+        mprof.Profiler("disk")
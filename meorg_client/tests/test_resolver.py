@@ -0,0 +1,116 @@
+"""Test the resolution of names to IDs."""
+
+import pytest
+from click.testing import CliRunner
+import meorg_client.cli as cli
+import meorg_client.exceptions as mx
+import meorg_client.resolver as mr
+
+MODEL_OUTPUT_ID = "AbCdEfGhJkLmNpQrS"
+BENCHMARK_ID = "ZyXwTsRqPnMkJhGfE"
+
+
+class _QueryClient:
+    """Minimal client that answers model output queries by name and counts them."""
+
+    base_url = "http://meorg.test/api"
+
+    def __init__(self, ids: dict):
+        self.ids = ids
+        self.queries = list()
+
+    def model_output_query(self, name: str):
+        self.queries.append(name)
+        if name not in self.ids:
+            raise mx.RequestException(404, "Model output not found.")
+        return dict(data=dict(modeloutput=dict(id=self.ids.get(name), name=name)))
+
+
+@pytest.fixture
+def client() -> _QueryClient:
+    return _QueryClient({"my-output": MODEL_OUTPUT_ID, "benchmark": BENCHMARK_ID})
+
+
+def test_is_id():
+    """Test that IDs are distinguished from names."""
+    assert mr.is_id(MODEL_OUTPUT_ID)
+    assert not mr.is_id("my-output")
+    assert not mr.is_id("my-output-named-17")
+    assert not mr.is_id(None)
+
+
+def test_resolve(client: _QueryClient, tmp_path):
+    """Test that names are looked up once, in one batch, and IDs never are."""
+    path = tmp_path / "names.json"
+    resolver = mr.Resolver(client, path=path)
+
+    # IDs pass straight through, without even loading the index
+    assert resolver.resolve(mr.MODEL_OUTPUT, MODEL_OUTPUT_ID) == MODEL_OUTPUT_ID
+    assert resolver._index is None
+
+    ids = resolver.resolve(mr.MODEL_OUTPUT, ["my-output", BENCHMARK_ID, "benchmark"])
+    assert ids == [MODEL_OUTPUT_ID, BENCHMARK_ID, BENCHMARK_ID]
+    assert sorted(client.queries) == ["benchmark", "my-output"]
+
+    # Served from the index on disk from now on
+    resolver = mr.Resolver(client, path=path)
+    assert resolver.resolve(mr.MODEL_OUTPUT, "my-output") == MODEL_OUTPUT_ID
+    assert len(client.queries) == 2
+
+    # Stale entries are refreshed
+    resolver.max_age = -1
+    assert resolver.refresh() == 2
+    assert len(client.queries) == 4
+
+
+def test_resolve_experiment(client: _QueryClient, tmp_path):
+    """Test that experiments are only resolved from the index."""
+    resolver = mr.Resolver(client, path=tmp_path / "names.json")
+
+    with pytest.raises(KeyError):
+        resolver.resolve(mr.EXPERIMENT, "five-site-test")
+
+    resolver.add(mr.EXPERIMENT, "five-site-test", BENCHMARK_ID)
+    assert resolver.resolve(mr.EXPERIMENT, ["five-site-test"]) == [BENCHMARK_ID]
+    assert client.queries == list()
+
+
+def test_learn(client: _QueryClient, tmp_path):
+    """Test that benchmark names are learned from benchmark list responses."""
+    resolver = mr.Resolver(client, path=tmp_path / "names.json")
+    resolver.learn(dict(data=dict(benchmarks=[dict(id=BENCHMARK_ID, name="other")])))
+
+    assert resolver.resolve(mr.MODEL_OUTPUT, "other") == BENCHMARK_ID
+    assert client.queries == list()
+
+
+def test_resolve_unknown(client: _QueryClient, tmp_path):
+    """Test that a name the server does not know is unresolved, not an error."""
+    resolver = mr.Resolver(client, path=tmp_path / "names.json")
+
+    with pytest.raises(KeyError):
+        resolver.resolve(mr.MODEL_OUTPUT, ["my-output", "no-such-name"])
+    assert sorted(client.queries) == ["my-output", "no-such-name"]
+    assert "no-such-name" not in resolver.index[mr.MODEL_OUTPUT]
+
+    # Other failures are not hidden
+    def _fail(name: str):
+        raise mx.RequestException(500, "Server error.")
+
+    client.model_output_query = _fail
+    with pytest.raises(mx.RequestException):
+        resolver.resolve(mr.MODEL_OUTPUT, "other-name")
+
+
+def test_cli_offline(tmp_path, monkeypatch):
+    """Test that the local name index is managed without credentials."""
+    monkeypatch.setenv("HOME", str(tmp_path))
+
+    runner = CliRunner()
+    args = ["names", "set", "experiment", "five-site", BENCHMARK_ID]
+    result = runner.invoke(cli.cli, args)
+    assert result.exit_code == 0, result.output
+
+    result = runner.invoke(cli.cli, ["names", "list"])
+    assert result.exit_code == 0, result.output
+    assert f"experiment five-site {BENCHMARK_ID}" in result.output
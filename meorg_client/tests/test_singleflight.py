@@ -0,0 +1,72 @@
+"""Test the coalescing of identical concurrent requests."""
+
+import threading
+import time
+from multiprocessing.pool import ThreadPool
+import pytest
+import requests_mock
+import meorg_client.singleflight as msf
+
+
+def test_single_flight():
+    """Test that concurrent callers share one call, including its exception."""
+    single_flight = msf.SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls = list()
+
+    def _slow(value):
+        calls.append(value)
+        started.set()
+        release.wait()
+        if value == "bad":
+            raise ValueError(value)
+        return value
+
+    for value, expected in [("good", "good"), ("bad", ValueError)]:
+        started.clear()
+        release.clear()
+        with ThreadPool(4) as pool:
+            leader = pool.apply_async(single_flight.do, ("key", _slow, value))
+            started.wait()
+            followers = [
+                pool.apply_async(single_flight.do, ("key", _slow, "other"))
+                for _ in range(3)
+            ]
+
+            # Wait for the followers to join the call in flight
+            while single_flight._calls["key"].waiters < 3:
+                time.sleep(0.01)
+            release.set()
+
+            for result in [leader] + followers:
+                if expected is ValueError:
+                    with pytest.raises(ValueError):
+                        result.get()
+                else:
+                    assert result.get() == expected
+
+    assert calls == ["good", "bad"]
+    assert single_flight.shared == 6
+
+    # Nothing is remembered once the call has finished
+    assert single_flight._calls == dict()
+    assert single_flight.do("key", _slow, "good") == "good"
+
+
+@pytest.mark.parametrize("coalesce", [True, False])
+def test_coalesced_requests(make_client, coalesce: bool):
+    """Test that identical concurrent GETs are sent once, when enabled."""
+    client = make_client(coalesce_requests=coalesce)
+    url = f"{client.base_url}/modeloutput/abc/files"
+
+    def _slow(request, context):
+        time.sleep(0.2)
+        return dict(data=dict(files=["f1"]))
+
+    with requests_mock.Mocker() as mocker:
+        mocker.get(url, json=_slow)
+        with ThreadPool(8) as pool:
+            responses = pool.map(lambda _: client.list_files("abc"), range(8))
+
+    assert all(r == dict(data=dict(files=["f1"])) for r in responses)
+    assert mocker.call_count == (1 if coalesce else 8)
@@ -0,0 +1,78 @@
+"""Test snapshots of client progress."""
+
+import os
+import signal
+import time
+import pytest
+import requests_mock
+import meorg_client.constants as mcc
+import meorg_client.snapshot as msn
+from meorg_client.client import Client
+
+
+@pytest.fixture
+def progress() -> msn.Progress:
+    return msn.Progress()
+
+
+@pytest.fixture
+def client(make_client, progress) -> Client:
+    return make_client(progress=progress)
+
+
+def test_snapshot(client: Client, progress, tmp_path):
+    """Test a snapshot taken in the middle of an upload."""
+    filepath = tmp_path / "data.nc"
+    filepath.write_bytes(b"x" * (4 * mcc.UPLOAD_CHUNK_SIZE))
+    snapshots = list()
+
+    def _read_body(request, context):
+        request.body.read(2 * mcc.UPLOAD_CHUNK_SIZE)
+        snapshots.append(progress.format())
+        while request.body.read(mcc.UPLOAD_CHUNK_SIZE):
+            pass
+        return dict(data=dict(files=[dict(id="f1", name="data.nc")]))
+
+    with requests_mock.Mocker() as mocker:
+        mocker.get(
+            f"{client.base_url}/modeloutput/abc/files",
+            [dict(status_code=503), dict(json=dict(data=dict(files=[])))],
+        )
+        mocker.post(f"{client.base_url}/modeloutput/abc/files", json=_read_body)
+        client.list_files("abc")
+        client.upload_files(filepath, id="abc", progress=False)
+
+    (snapshot,) = snapshots
+    assert "Requests in flight: 1" in snapshot
+    assert f"POST {client.base_url}/modeloutput/abc/files" in snapshot
+    assert "Uploads in flight: 1" in snapshot
+    assert "data.nc: 2.1/4.2 MB (50%)" in snapshot
+    assert "Recent retries: 1" in snapshot
+    assert "attempt 1 after 503" in snapshot
+    assert "--- Thread MainThread ---" in snapshot
+    assert "_read_body" in snapshot
+
+    # Nothing is left in flight
+    snapshot = progress.format()
+    assert "Requests in flight: 0" in snapshot
+    assert "Uploads in flight: 0" in snapshot
+
+
+@pytest.mark.skipif(not hasattr(signal, "SIGUSR1"), reason="No SIGUSR1")
+def test_signal(progress, tmp_path):
+    """Test that the signal writes a snapshot without interrupting the work."""
+    path = tmp_path / "snapshot.txt"
+    previous = signal.getsignal(signal.SIGUSR1)
+    try:
+        assert msn.install(progress, path)
+        os.kill(os.getpid(), signal.SIGUSR1)
+
+        deadline = time.monotonic() + 5
+        while not path.exists() and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        signal.signal(signal.SIGUSR1, previous)
+
+    time.sleep(0.1)
+    assert "=== meorg snapshot" in path.read_text()
+    assert "test_signal" in path.read_text()
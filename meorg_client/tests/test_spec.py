@@ -0,0 +1,112 @@
+"""Test the cached API specification and request validation."""
+
+import pytest
+import requests
+import requests_mock
+import meorg_client.constants as mcc
+import meorg_client.endpoints as endpoints
+import meorg_client.exceptions as mx
+import meorg_client.hooks as mhk
+import meorg_client.spec as msp
+import meorg_client.utilities as mu
+
+
+@pytest.fixture
+def spec_cache(tmp_path) -> msp.SpecCache:
+    """Get a specification cache in a temporary directory, without a server."""
+    spec_cache = msp.SpecCache(None)
+    spec_cache.filepath = tmp_path / "openapi.json"
+    return spec_cache
+
+
+def test_build_index():
+    """Test build_index on the bundled specification."""
+    index = msp.build_index(mu.load_package_data("openapi.json"))
+    assert set(index["/modeloutput/{}/files"]) == {"GET", "POST"}
+    assert index["/modeloutput"]["POST"] == ["model", "name"]
+
+
+def test_validate(spec_cache: msp.SpecCache):
+    """Test that bad requests are rejected and good ones are not."""
+    spec_cache.validate(mcc.HTTP_GET, endpoints.FILE_LIST, dict(id="abc"))
+    spec_cache.validate(mcc.HTTP_PUT, endpoints.ANALYSIS_START, dict(id="a", expid="b"))
+
+    # Not in the specification, not validated
+    spec_cache.validate(mcc.HTTP_POST, endpoints.FILE_ATTACH, dict(id="abc"))
+
+    with pytest.raises(mx.RequestValidationException):
+        spec_cache.validate(mcc.HTTP_PUT, endpoints.FILE_LIST, dict(id="abc"))
+
+    with pytest.raises(mx.RequestValidationException):
+        spec_cache.validate(mcc.HTTP_GET, endpoints.FILE_LIST, dict(id=None))
+
+    with pytest.raises(mx.RequestValidationException):
+        spec_cache.validate(
+            mcc.HTTP_POST, endpoints.MODEL_OUTPUT_CREATE, json=dict(model="abc")
+        )
+
+
+def test_client_validation(make_client, spec_cache: msp.SpecCache):
+    """Test that the client rejects a bad request without sending it."""
+    client = make_client()
+    client.spec = spec_cache
+
+    with requests_mock.Mocker() as m:
+        with pytest.raises(mx.RequestValidationException):
+            client.list_files(None)
+        assert m.call_count == 0
+
+
+def test_list_endpoints_cached(make_client, spec_cache: msp.SpecCache):
+    """Test that list_endpoints is served from a fresh cache."""
+    client = make_client()
+    client.spec = spec_cache
+
+    spec = dict(paths={"/test": dict(get=dict(description="Test"))})
+
+    with requests_mock.Mocker() as m:
+        m.get(f"{client.base_url}/{endpoints.ENDPOINT_LIST}", json=spec)
+
+        assert client.list_endpoints() == spec
+        assert client.list_endpoints() == spec
+        assert m.call_count == 1
+        assert spec_cache.filepath.is_file()
+        assert "/test" in spec_cache.index
+
+
+def test_spec_follows_base_url(make_client, tmp_path, monkeypatch):
+    """Test that the specification is cached and refreshed for the server in use, out
+    of sight of the user's requests."""
+    monkeypatch.setenv("HOME", str(tmp_path))
+    client = make_client(validate_requests=True)
+    assert client.spec.base_url == client.base_url
+    assert client.spec.filepath == msp.get_spec_filepath(client.base_url)
+
+    sent = list()
+    client.hooks.register(mhk.PRE_REQUEST, lambda event: sent.append(event.url))
+    url = f"{client.base_url}/{endpoints.ENDPOINT_LIST}"
+
+    spec = dict(paths={"/test": dict(get=dict(description="Test"))})
+    with requests_mock.Mocker() as m:
+        # Other responses are not taken for the specification
+        m.get(url, json=dict(data=dict(files=[])))
+        client.spec.refresh()
+        assert not client.spec.filepath.is_file()
+
+        m.get(url, json=spec)
+        client.spec.refresh()
+        assert m.call_count == 2
+    assert sent == list()
+    assert client.spec.filepath.is_file()
+    assert client.spec.spec == spec
+
+    # Another server has its own
+    client.base_url = "http://other.test/api"
+    assert client.spec.filepath == msp.get_spec_filepath("http://other.test/api")
+    assert client.spec.spec != spec
+
+    # Nothing is sent around a custom transport, i.e. a transcript
+    client.transport = requests.adapters.HTTPAdapter()
+    with requests_mock.Mocker() as m:
+        client.spec.refresh()
+        assert m.call_count == 0
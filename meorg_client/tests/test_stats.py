@@ -0,0 +1,65 @@
+"""Test the request statistics."""
+
+import pytest
+import requests_mock
+from click.testing import CliRunner
+import meorg_client.cli as cli
+import meorg_client.endpoints as endpoints
+import meorg_client.exceptions as mx
+import meorg_client.stats as mst
+
+
+def test_histogram():
+    """Test that percentiles are accurate to a bucket."""
+    histogram = mst.Histogram()
+    for i in range(1, 101):
+        histogram.add(i / 100)
+
+    assert histogram.percentile(50) == pytest.approx(0.5, rel=0.1)
+    assert histogram.percentile(99) == pytest.approx(0.99, rel=0.1)
+    assert histogram.percentile(100) == 1.0
+    assert histogram.cumulative([0.1, 1, 10]) == [
+        pytest.approx(10, abs=1),
+        pytest.approx(100, abs=10),
+        100,
+    ]
+    assert mst.Histogram().percentile(50) is None
+
+
+def test_client_stats(make_client):
+    """Test per-endpoint counts, errors, retries and bytes."""
+    client = make_client(circuit_breakers=False, stats=True)
+
+    with requests_mock.Mocker() as mocker:
+        mocker.get(
+            f"{client.base_url}/modeloutput/abc/files",
+            [dict(status_code=503), dict(json=dict(data=dict(files=[])))],
+        )
+        mocker.delete(f"{client.base_url}/modeloutput/abc/files/f1", status_code=404)
+        client.list_files("abc")
+        with pytest.raises(mx.RequestException):
+            client.delete_file_from_model_output("abc", "f1")
+
+    stats = client.stats()
+    assert set(stats) == {endpoints.FILE_LIST, endpoints.FILE_DELETE}
+
+    files = stats[endpoints.FILE_LIST]
+    assert (files["count"], files["errors"], files["retries"]) == (2, 1, 1)
+    assert files["statuses"] == {503: 1, 200: 1}
+    assert files["bytes_received"] == len(b'{"data": {"files": []}}')
+    assert files["p50"] <= files["p99"] <= files["max"] * 1.1
+
+    delete = stats[endpoints.FILE_DELETE]
+    assert (delete["count"], delete["errors"]) == (1, 1)
+
+    summary = mst.format_summary(stats, 1.0)
+    assert "Requests: 3 (2 errors, 1 retries)" in summary
+    assert endpoints.FILE_LIST in summary
+
+
+def test_cli_stats(monkeypatch, tmp_path):
+    """Test that the summary is printed on exit, even without requests."""
+    monkeypatch.setenv("HOME", str(tmp_path))
+    result = CliRunner().invoke(cli.cli, ["--stats", "cache", "clear"])
+    assert result.exit_code == 0
+    assert "Requests: 0" in result.output
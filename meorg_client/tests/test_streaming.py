@@ -0,0 +1,155 @@
+"""Test streaming request bodies."""
+
+import hashlib as hl
+import io
+import os
+import tarfile
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from meorg_client.client import Client
+import meorg_client.exceptions as mx
+import meorg_client.streaming as ms
+
+
+class _UploadHandler(BaseHTTPRequestHandler):
+    """Records the upload body and reports a checksum of its file part."""
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.bodies.append(body)
+
+        # Pull the file content out of the (single part) body
+        content = body.split(b"\r\n\r\n", 1)[1].rsplit(b"\r\n--", 1)[0]
+        checksum = self.server.checksum or hl.sha256(content).hexdigest()
+
+        record = {"id": "abc", "name": "test.txt", self.server.checksum_key: checksum}
+        payload = dict(data=dict(files=[record]))
+        raw = json.dumps(payload).encode()
+        self.send_response(201)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    """Local upload server."""
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _UploadHandler)
+    httpd.bodies = list()
+    httpd.checksum = None
+    httpd.checksum_key = "sha256"
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield httpd
+    httpd.shutdown()
+
+
+@pytest.fixture
+def local_client(server) -> Client:
+    """Client pointed at the local server."""
+    client = Client()
+    client.base_url = f"http://127.0.0.1:{server.server_port}"
+    return client
+
+
+def test_multipart_encoder():
+    """Test that the encoder produces a well-formed body of the declared length."""
+    data = b"x" * 100
+    reader = ms.HashingReader(io.BytesIO(data))
+    encoder = ms.MultipartEncoder([("file", 'a"b.nc', reader, "application/x-netcdf")])
+
+    # Read in awkward sizes
+    chunks = list()
+    while chunk := encoder.read(7):
+        chunks.append(chunk)
+    body = b"".join(chunks)
+
+    assert len(body) == len(encoder)
+    assert b'filename="a%22b.nc"' in body
+    assert body.endswith(f"--{encoder.boundary}--\r\n".encode())
+    assert reader.hexdigest() == hl.sha256(data).hexdigest()
+
+
+def test_upload_checksum(server, local_client: Client, tmp_path):
+    """Test the digest is computed as the file is sent and verified."""
+    filepath = tmp_path / "test.txt"
+    filepath.write_bytes(b"hello world\n" * 1000)
+
+    response = local_client.upload_files(str(filepath), id="mo")[0]
+    assert response["data"]["files"][0]["sha256"] == hl.sha256(filepath.read_bytes()).hexdigest()
+
+    server.checksum = "0" * 64
+    with pytest.raises(mx.ChecksumMismatchException):
+        local_client.upload_files(str(filepath), id="mo")
+
+
+def test_upload_checksum_algorithm(server, local_client: Client, tmp_path):
+    """Test only digests that are explicitly sha256 are verified."""
+    filepath = tmp_path / "test.txt"
+    filepath.write_bytes(b"hello world\n" * 1000)
+    digest = hl.sha256(filepath.read_bytes()).hexdigest()
+
+    # A digest of another (or unknown) algorithm is not compared
+    server.checksum_key = "checksum"
+    server.checksum = hl.md5(filepath.read_bytes()).hexdigest()
+    response = local_client.upload_files(str(filepath), id="mo")[0]
+    assert response["data"]["files"][0]["sha256"] == digest
+
+    server.checksum = f"md5:{server.checksum}"
+    local_client.upload_files(str(filepath), id="mo")
+
+    # A prefixed sha256 digest is
+    server.checksum = f"SHA256:{digest.upper()}"
+    local_client.upload_files(str(filepath), id="mo")
+
+    server.checksum = "sha256:" + "0" * 64
+    with pytest.raises(mx.ChecksumMismatchException):
+        local_client.upload_files(str(filepath), id="mo")
+
+
+def test_tar_stream(tmp_path):
+    """Test the archive is identical in length to its declared size and readable."""
+    files = list()
+    for i, size in enumerate([0, 1, 512, 100000]):
+        filepath = tmp_path / f"site_{i}.nc"
+        filepath.write_bytes(os.urandom(size))
+        files.append(str(filepath))
+
+    archive = ms.TarStream(files)
+    data = b""
+    while chunk := archive.read(4096):
+        data += chunk
+
+    assert len(data) == len(archive)
+
+    with tarfile.open(fileobj=io.BytesIO(data)) as tar:
+        assert tar.getnames() == [os.path.basename(f) for f in files]
+        for f in files:
+            member = tar.extractfile(os.path.basename(f))
+            assert member.read() == open(f, "rb").read()
+
+    with pytest.raises(ValueError):
+        ms.TarStream(files + files)
+
+
+def test_upload_bundle(server, local_client: Client, tmp_path):
+    """Test the archive is streamed into the upload body."""
+    files = list()
+    for i in range(3):
+        filepath = tmp_path / f"site_{i}.nc"
+        filepath.write_bytes(os.urandom(1000))
+        files.append(str(filepath))
+
+    response = local_client.upload_files(files, id="mo", bundle="sites")[0]
+
+    content = server.bodies[-1].split(b"\r\n\r\n", 1)[1].rsplit(b"\r\n--", 1)[0]
+    assert b'filename="sites.tar"' in server.bodies[-1]
+    assert response["data"]["files"][0]["sha256"] == hl.sha256(content).hexdigest()
+
+    with tarfile.open(fileobj=io.BytesIO(content)) as tar:
+        assert len(tar.getnames()) == 3
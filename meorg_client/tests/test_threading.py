@@ -0,0 +1,67 @@
+"""Test sharing one client between threads."""
+
+import pickle
+from multiprocessing.pool import ThreadPool
+import pytest
+import requests_mock
+import meorg_client.endpoints as endpoints
+import meorg_client.exceptions as mx
+from meorg_client.client import Client
+
+
+@pytest.fixture
+def client(make_client) -> Client:
+    return make_client(circuit_breakers=False, retries=0)
+
+
+def test_per_thread_responses(client: Client):
+    """Test that each thread sees the outcome of its own requests."""
+
+    def _query(i):
+        try:
+            client.model_output_query(model_id=f"mo{i}")
+        except mx.RequestException:
+            pass
+        return i, client.success(), client.last_response.status_code
+
+    with requests_mock.Mocker() as mocker:
+        for i in range(32):
+            mocker.get(
+                f"{client.base_url}/{endpoints.MODEL_OUTPUT_QUERY}?id=mo{i}",
+                json=dict(data=dict(modeloutput=dict(id=f"mo{i}"))),
+                status_code=404 if i % 2 else 200,
+            )
+
+        with ThreadPool(16) as pool:
+            results = pool.map(_query, list(range(32)) * 4)
+
+    for i, success, status_code in results:
+        assert success == (i % 2 == 0)
+        assert status_code == (404 if i % 2 else 200)
+
+
+def test_auth_swap(client: Client):
+    """Test that auth headers are read-only and replaced whole on login and logout."""
+    with pytest.raises(TypeError):
+        client.headers["X-Auth-Token"] = "token"
+
+    with requests_mock.Mocker() as mocker:
+        mocker.post(
+            f"{client.base_url}/{endpoints.LOGIN}",
+            json=dict(data=dict(userId="user", authToken="token")),
+        )
+        mocker.post(f"{client.base_url}/{endpoints.LOGOUT}")
+
+        before = client.headers
+        client.login("user@example.com", "password")
+        assert "X-Auth-Token" not in before
+        assert client.headers["X-Auth-Token"] == "token"
+
+        # Auth travels with the client to other processes, responses do not
+        clone = pickle.loads(pickle.dumps(client))
+        assert clone.headers == client.headers
+        assert clone.last_response is None
+
+        client.logout()
+        assert "X-Auth-Token" not in client.headers
+        assert mocker.request_history[0].headers["Cache-Control"] == "no-cache"
@@ -0,0 +1,111 @@
+"""Test tracing of client operations."""
+
+import json
+import pytest
+import requests_mock
+import meorg_client.endpoints as endpoints
+import meorg_client.exceptions as mx
+import meorg_client.parallel as meop
+import meorg_client.tracing as mtr
+from meorg_client.client import Client
+
+
+@pytest.fixture
+def trace_path(tmp_path):
+    return tmp_path / "trace.jsonl"
+
+
+@pytest.fixture
+def client(make_client, trace_path) -> Client:
+    tracer = mtr.Tracer(mtr.FileExporter(trace_path))
+    return make_client(circuit_breakers=False, tracer=tracer)
+
+
+def _read_spans(path) -> list:
+    """Read the spans of every line of an OTLP JSON file, checking the layout."""
+    spans = list()
+    for line in open(path):
+        for resource_spans in json.loads(line)["resourceSpans"]:
+            assert resource_spans["resource"]["attributes"][0]["key"] == "service.name"
+            for scope_spans in resource_spans["scopeSpans"]:
+                spans += scope_spans["spans"]
+    return spans
+
+
+def test_request_spans(client: Client, trace_path):
+    """Test a span per call with a child span per attempt and an event per retry."""
+    with requests_mock.Mocker() as mocker:
+        mocker.get(
+            f"{client.base_url}/modeloutput/abc/files",
+            [dict(status_code=503), dict(json=dict(data=dict(files=[])))],
+        )
+        client.list_files("abc")
+
+    root, *requests = sorted(_read_spans(trace_path), key=lambda s: "parentSpanId" in s)
+    assert root["name"] == "Client.list_files"
+    assert "parentSpanId" not in root
+    assert dict(key="meorg.id", value=dict(stringValue="abc")) in root["attributes"]
+    assert root["events"][0]["name"] == "retry"
+
+    assert [s["name"] for s in requests] == [f"GET {endpoints.FILE_LIST}"] * 2
+    assert [s["status"]["code"] for s in requests] == [mtr.STATUS_ERROR, mtr.STATUS_UNSET]
+    for span in requests:
+        assert span["traceId"] == root["traceId"]
+        assert span["parentSpanId"] == root["spanId"]
+        assert span["kind"] == mtr.KIND_CLIENT
+        assert int(root["startTimeUnixNano"]) <= int(span["startTimeUnixNano"])
+        assert int(span["endTimeUnixNano"]) <= int(root["endTimeUnixNano"])
+
+
+def test_thread_propagation(client: Client, trace_path):
+    """Test that requests made from worker threads belong to the caller's trace."""
+    with requests_mock.Mocker() as mocker:
+        mocker.post(f"{client.base_url}/modeloutput/a/files/attach", json=dict())
+        mocker.post(f"{client.base_url}/modeloutput/b/files/attach", json=dict())
+        mocker.post(f"{client.base_url}/modeloutput/c/files/attach", status_code=500)
+        with pytest.raises(mx.RequestException):
+            client.attach_files_to_model_outputs(["a", "b", "c"], "f1", n=3)
+
+    spans = {s["spanId"]: s for s in _read_spans(trace_path)}
+    (root,) = [
+        s for s in spans.values() if s["name"] == "Client.attach_files_to_model_outputs"
+    ]
+    assert root["status"]["code"] == mtr.STATUS_ERROR
+
+    attaches = [
+        s for s in spans.values() if s["name"] == "Client.attach_files_to_model_output"
+    ]
+    assert len(attaches) == 3
+    assert {s["parentSpanId"] for s in attaches} == {root["spanId"]}
+    assert {s["traceId"] for s in spans.values()} == {root["traceId"]}
+
+
+def _worker(tracer: mtr.Tracer, i: int) -> list:
+    with tracer.span("worker", **{"meorg.i": i}):
+        pass
+    return [i]
+
+
+def test_process_propagation(trace_path):
+    """Test that spans in worker processes continue the caller's trace."""
+    tracer = mtr.Tracer(mtr.FileExporter(trace_path))
+    with tracer.span("parent") as parent:
+        meop.parallelise(_worker, 2, progress=False, tracer=tracer, i=[0, 1, 2])
+
+    spans = _read_spans(trace_path)
+    workers = [s for s in spans if s["name"] == "worker"]
+    assert len(workers) == 3
+    assert {s["parentSpanId"] for s in workers} == {parent.span_id}
+    assert {s["traceId"] for s in spans} == {parent.trace_id}
+
+
+def test_no_tracer(make_client, monkeypatch):
+    """Test that nothing is recorded without a tracer."""
+    monkeypatch.setattr(mtr, "Span", None)
+    client = make_client(circuit_breakers=False)
+    with requests_mock.Mocker() as mocker:
+        mocker.get(
+            f"{client.base_url}/modeloutput/abc/files",
+            json=dict(data=dict(files=[])),
+        )
+        client.list_files("abc")
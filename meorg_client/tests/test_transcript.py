@@ -0,0 +1,119 @@
+"""Test recording and replaying transcripts."""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import requests
+import meorg_client.constants as mcc
+import meorg_client.exceptions as mx
+import meorg_client.transcript as mtt
+from meorg_client.client import Client
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def _reply(self, status: int, body: dict):
+        content = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.send_header("Set-Cookie", "session=secret")
+        self.end_headers()
+        self.wfile.write(content)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        if self.path == "/api/login":
+            self._reply(200, dict(data=dict(userId="user-42", authToken="secret")))
+        else:
+            self.send_error(404)
+
+    def do_GET(self):
+        time.sleep(0.05)
+        if self.path == "/api/modeloutput/abc/files":
+            self._reply(200, dict(data=dict(files=[dict(id="f1")])))
+        else:
+            self._reply(404, dict(error="Not found"))
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def base_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/api"
+    server.shutdown()
+    server.server_close()
+
+
+def _get_client(base_url: str, transport) -> Client:
+    client = Client(validate_requests=False, retries=0, transport=transport)
+    client.base_url = base_url
+    return client
+
+
+@pytest.mark.parametrize("filename", ["transcript.jsonl", "transcript.jsonl.gz"])
+def test_record_replay(base_url, tmp_path, filename):
+    """Test that a recorded session replays offline, with secrets redacted."""
+    path = tmp_path / filename
+
+    client = _get_client(base_url, mtt.Recorder(path))
+    client.login("user@example.com", "password")
+    files = client.list_files("abc")
+    with pytest.raises(mx.RequestException):
+        client.list_files("missing")
+
+    # Nothing secret is written
+    entries = mtt.load(path)
+    text = json.dumps(entries)
+    assert [e["response"]["status"] for e in entries] == [200, 200, 404]
+    assert "secret" not in text
+    assert client.headers["X-Auth-Token"] not in text
+    assert "user@example.com" not in text
+    assert "user-42" not in text
+    assert entries[0]["request"]["content"]["text"].count(mtt.REDACTED) == 2
+    assert entries[1]["request"]["headers"]["X-User-Id"] == mtt.REDACTED
+    assert entries[1]["timings"]["total"] >= 0.05
+
+    # The same calls are served from the transcript, with the original latencies
+    client = _get_client(base_url, mtt.Replayer(path))
+    client.login("user@example.com", "password")
+    start = time.perf_counter()
+    assert client.list_files("abc") == files
+    assert time.perf_counter() - start >= 0.05
+    with pytest.raises(mx.RequestException):
+        client.list_files("missing")
+
+    # Unrecorded requests fail as if the server was unreachable
+    with pytest.raises(requests.ConnectionError):
+        client.list_files("other")
+
+
+def test_replay_failures(tmp_path):
+    """Test that recorded failures, and latencies beyond the timeout, are raised."""
+    path = tmp_path / "transcript.jsonl"
+    client = _get_client("http://127.0.0.1:1/api", mtt.Recorder(path))
+    with pytest.raises(requests.ConnectionError):
+        client.list_files("abc")
+    assert mtt.load(path)[0]["error"] == "ConnectionError"
+
+    client = _get_client("http://127.0.0.1:1/api", mtt.Replayer(path, scale=0))
+    with pytest.raises(requests.ConnectionError):
+        client.list_files("abc")
+
+    entry = dict(
+        method=mcc.HTTP_GET,
+        url="http://meorg.test/api/modeloutput/abc/files",
+        response=dict(status=200),
+        timings=dict(wait=10, total=10),
+    )
+    path.write_text(json.dumps(entry) + "\n")
+    client = Client(validate_requests=False, retries=0, timeout=0.01)
+    client.base_url = "http://meorg.test/api"
+    client.transport = mtt.Replayer(path)
+    with pytest.raises(requests.ReadTimeout):
+        client.list_files("abc")
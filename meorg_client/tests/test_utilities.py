@@ -31,3 +31,31 @@ def test_load_package_data():
 def test_get_user_agent():
     """Test get_user_agent."""
     assert "meorg_client/" in mu.get_user_agent()
+
+
+def test_batch_files(tmp_path):
+    """Test batch_files."""
+    files = list()
+    for i, size in enumerate([10, 10, 10, 50, 10]):
+        filepath = tmp_path / f"{i}.nc"
+        filepath.write_bytes(b"x" * size)
+        files.append(str(filepath))
+
+    # Limited by count
+    batches = mu.batch_files(files, max_files=2, max_bytes=1000)
+    assert [len(b) for b in batches] == [2, 2, 1]
+
+    # Limited by size, oversized files go on their own
+    batches = mu.batch_files(files, max_files=10, max_bytes=30)
+    assert [len(b) for b in batches] == [3, 1, 1]
+
+
+def test_split_upload_response():
+    """Test split_upload_response."""
+    response = dict(
+        status="success",
+        data=dict(files=[dict(id="2", name="b.nc"), dict(id="1", name="a.nc")]),
+    )
+    responses = mu.split_upload_response(response, ["a.nc", "b.nc"])
+    assert [r["data"]["files"][0]["id"] for r in responses] == ["1", "2"]
+    assert all(r["status"] == "success" for r in responses)
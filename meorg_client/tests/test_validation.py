@@ -0,0 +1,82 @@
+"""Test the pre-flight validation of files."""
+
+import os
+import pytest
+import meorg_client.exceptions as mx
+import meorg_client.validation as mv
+
+netCDF4 = pytest.importorskip("netCDF4")
+np = pytest.importorskip("numpy")
+
+
+def _write_netcdf(filepath, format: str) -> str:
+    """Write a small file with a record and a fixed variable.
+
+    Returns
+    -------
+    str
+        Path to the file.
+    """
+    with netCDF4.Dataset(filepath, "w", format=format) as ds:
+        ds.createDimension("time", None)
+        ds.createDimension("x", 3)
+
+        x = ds.createVariable("x", "f8", ("x",))
+        x[:] = [1.0, 2.0, 3.0]
+
+        for name in ["Qle", "Qh"]:
+            var = ds.createVariable(name, "f4", ("time", "x"))
+            var.units = "W/m^2"
+            var[:] = np.ones((5, 3))
+
+    return str(filepath)
+
+
+@pytest.mark.parametrize(
+    "format",
+    ["NETCDF3_CLASSIC", "NETCDF3_64BIT_OFFSET", "NETCDF3_64BIT_DATA", "NETCDF4"],
+)
+def test_validate_file(tmp_path, format: str):
+    """Test that valid files pass and truncated files do not."""
+    filepath = _write_netcdf(tmp_path / "valid.nc", format)
+
+    assert mv.validate_file(filepath) == []
+    assert mv.validate_file(filepath, {"Qle": "W/m^2", "x": None}) == []
+
+    problems = mv.validate_file(filepath, {"Qle": "K", "NEE": None})
+    assert len(problems) == 2
+
+    # Chop the end off the file
+    size = os.path.getsize(filepath)
+    with open(filepath, "r+b") as f:
+        f.truncate(size - 16)
+
+    assert "truncated" in mv.validate_file(filepath)[0]
+
+
+def test_read_classic_header(tmp_path):
+    """Test read_classic_header."""
+    filepath = _write_netcdf(tmp_path / "valid.nc", "NETCDF3_CLASSIC")
+
+    with open(filepath, "rb") as f:
+        header = mv.read_classic_header(f)
+
+    assert header["numrecs"] == 5
+    assert header["variables"]["Qh"]["dimensions"] == ["time", "x"]
+    assert header["expected_size"] == os.path.getsize(filepath)
+
+
+def test_validate_files(tmp_path):
+    """Test that bad files are reported together, and non-NetCDF files ignored."""
+    good = _write_netcdf(tmp_path / "good.nc", "NETCDF4")
+    bad = tmp_path / "bad.nc"
+    bad.write_bytes(b"not a netcdf file")
+    other = tmp_path / "notes.txt"
+    other.write_text("ignored")
+
+    mv.validate_files([good, str(other)])
+
+    with pytest.raises(mx.FileValidationException) as ex:
+        mv.validate_files([good, str(bad), str(other)], n=2)
+
+    assert list(ex.value.errors.keys()) == [str(bad)]
@@ -0,0 +1,456 @@
+"""Tracing of client operations, exported as OTLP JSON."""
+
+import atexit
+import contextlib
+import contextvars
+import functools
+import inspect
+import json
+import os
+import random
+import threading
+import time
+import meorg_client.hooks as mhk
+from meorg_client import __version__
+
+# Span kinds (OTLP)
+KIND_INTERNAL = 1
+KIND_CLIENT = 3
+
+# Status codes (OTLP)
+STATUS_UNSET = 0
+STATUS_ERROR = 2
+
+# Arguments never recorded on spans
+REDACTED = ["email", "password"]
+
+# The innermost span of the calling thread (or task), threads started by
+# meorg_client.parallel inherit it
+_current = contextvars.ContextVar("meorg_span", default=None)
+
+
+class SpanContext:
+    """Identity of a span, as propagated to other threads and processes.
+
+    Parameters
+    ----------
+    trace_id : str
+        32 hex digit trace ID.
+    span_id : str
+        16 hex digit span ID.
+    """
+
+    __slots__ = ["trace_id", "span_id"]
+
+    def __init__(self, trace_id: str, span_id: str):
+        self.trace_id = trace_id
+        self.span_id = span_id
+
+    def __getstate__(self) -> tuple:
+        return self.trace_id, self.span_id
+
+    def __setstate__(self, state: tuple):
+        self.trace_id, self.span_id = state
+
+
+class Span(SpanContext):
+    """A timed operation.
+
+    Times are nanoseconds since the epoch, as in OTLP.
+
+    Parameters
+    ----------
+    name : str
+        Name of the operation.
+    parent : SpanContext, optional
+        Parent span, by default None (a new trace).
+    kind : int, optional
+        KIND_INTERNAL or KIND_CLIENT, by default KIND_INTERNAL.
+    start : int, optional
+        Start time, by default now.
+    **attributes :
+        Attributes of the span.
+    """
+
+    __slots__ = ["parent", "name", "kind", "start", "end", "attributes", "events", "error"]
+
+    def __init__(
+        self,
+        name: str,
+        parent: SpanContext = None,
+        kind: int = KIND_INTERNAL,
+        start: int = None,
+        **attributes,
+    ):
+        trace_id = parent.trace_id if parent is not None else f"{random.getrandbits(128):032x}"
+        super().__init__(trace_id, f"{random.getrandbits(64):016x}")
+        self.parent = parent
+        self.name = name
+        self.kind = kind
+        self.start = start or time.time_ns()
+        self.end = None
+        self.attributes = attributes
+        self.events = list()
+        self.error = None
+
+    def __reduce__(self):
+        # Only the identity travels, i.e. as the parent of spans in another process
+        return SpanContext, (self.trace_id, self.span_id)
+
+    @property
+    def local_root(self) -> bool:
+        """Whether the span has no parent in this process."""
+        return not isinstance(self.parent, Span)
+
+    def add_event(self, name: str, **attributes):
+        """Add a timestamped event (i.e. a retry) to the span."""
+        self.events.append((time.time_ns(), name, attributes))
+
+    def set_error(self, error: Exception):
+        """Mark the span as failed."""
+        self.error = getattr(error, "msg", None) or str(error) or type(error).__name__
+        self.attributes["exception.type"] = type(error).__name__
+
+    def to_otlp(self) -> dict:
+        """Get the span as OTLP JSON.
+
+        Returns
+        -------
+        dict
+            Span.
+        """
+        span = dict(
+            traceId=self.trace_id,
+            spanId=self.span_id,
+            name=self.name,
+            kind=self.kind,
+            startTimeUnixNano=str(self.start),
+            endTimeUnixNano=str(self.end),
+            attributes=_to_attributes(self.attributes),
+            status=dict(code=STATUS_UNSET),
+        )
+
+        if self.parent is not None:
+            span["parentSpanId"] = self.parent.span_id
+
+        if self.events:
+            span["events"] = [
+                dict(timeUnixNano=str(t), name=name, attributes=_to_attributes(attributes))
+                for t, name, attributes in self.events
+            ]
+
+        if self.error is not None:
+            span["status"] = dict(code=STATUS_ERROR, message=self.error)
+
+        return span
+
+
+def _to_value(value) -> dict:
+    if isinstance(value, bool):
+        return dict(boolValue=value)
+    if isinstance(value, int):
+        return dict(intValue=str(value))
+    if isinstance(value, float):
+        return dict(doubleValue=value)
+    return dict(stringValue=str(value))
+
+
+def _to_attributes(attributes: dict) -> list:
+    return [
+        dict(key=k, value=_to_value(v)) for k, v in attributes.items() if v is not None
+    ]
+
+
+def get_context() -> SpanContext:
+    """Get the current span of the caller, to continue the trace elsewhere.
+
+    Returns
+    -------
+    SpanContext
+        Current span, or None outside of a trace.
+    """
+    return _current.get()
+
+
+@contextlib.contextmanager
+def attach(context: SpanContext):
+    """Continue a trace (i.e. from another process) within the block.
+
+    Parameters
+    ----------
+    context : SpanContext
+        Parent of the spans started within the block, None for no change.
+    """
+    if context is None:
+        yield
+        return
+
+    token = _current.set(context)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+class FileExporter:
+    """Export spans to a file as OTLP JSON, one ExportTraceServiceRequest per line
+    (as written by the OpenTelemetry Collector file exporter).
+
+    Spans are written in batches, and whenever the outermost span in the process
+    ends, so that spans from worker processes are not lost. Each batch is a single
+    append, so several processes may share the file.
+
+    Parameters
+    ----------
+    path : str
+        Path to the file.
+    batch_size : int, optional
+        Spans to buffer before writing, by default 512.
+    """
+
+    def __init__(self, path: str, batch_size: int = 512):
+        self.path = path
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._spans = list()
+        atexit.register(self.flush)
+
+    def __getstate__(self) -> dict:
+        return dict(path=self.path, batch_size=self.batch_size)
+
+    def __setstate__(self, state: dict):
+        self.__init__(**state)
+
+    def export(self, span: Span):
+        """Add an ended span to the batch.
+
+        Parameters
+        ----------
+        span : Span
+            Span.
+        """
+        with self._lock:
+            self._spans.append(span)
+            full = len(self._spans) >= self.batch_size
+
+        if full or span.local_root:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered spans."""
+        with self._lock:
+            spans, self._spans = self._spans, list()
+
+        if not spans:
+            return
+
+        resource = dict(
+            attributes=_to_attributes(
+                {
+                    "service.name": "meorg_client",
+                    "service.version": __version__,
+                    "process.pid": os.getpid(),
+                }
+            )
+        )
+        scope = dict(name="meorg_client", version=__version__)
+        request = dict(
+            resourceSpans=[
+                dict(
+                    resource=resource,
+                    scopeSpans=[dict(scope=scope, spans=[s.to_otlp() for s in spans])],
+                )
+            ]
+        )
+
+        with open(self.path, "a") as f:
+            f.write(json.dumps(request, separators=(",", ":")) + "\n")
+
+
+class Tracer:
+    """Record spans of client operations and the requests they make.
+
+    One instance may be shared by several clients.
+
+    Parameters
+    ----------
+    exporter : FileExporter
+        Destination of ended spans (anything with an export(span) method).
+    """
+
+    def __init__(self, exporter: FileExporter):
+        self.exporter = exporter
+        self._local = threading.local()
+
+    def __getstate__(self) -> dict:
+        # Requests in flight are local to the thread
+        return dict(exporter=self.exporter)
+
+    def __setstate__(self, state: dict):
+        self.__init__(**state)
+
+    @contextlib.contextmanager
+    def span(self, name: str, kind: int = KIND_INTERNAL, **attributes):
+        """Record a span around a block, as the parent of any spans started within it.
+
+        Parameters
+        ----------
+        name : str
+            Name of the operation.
+        kind : int, optional
+            KIND_INTERNAL or KIND_CLIENT, by default KIND_INTERNAL.
+        **attributes :
+            Attributes of the span.
+
+        Yields
+        ------
+        Span
+            The span, to add attributes and events to.
+        """
+        span = Span(name, parent=_current.get(), kind=kind, **attributes)
+        token = _current.set(span)
+        try:
+            yield span
+        except BaseException as ex:
+            span.set_error(ex)
+            raise
+        finally:
+            _current.reset(token)
+            self.end(span)
+
+    def end(self, span: Span, end: int = None):
+        """End a span and export it.
+
+        Parameters
+        ----------
+        span : Span
+            Span.
+        end : int, optional
+            End time, by default now.
+        """
+        span.end = end or time.time_ns()
+        self.exporter.export(span)
+
+    def attach(self, hooks: mhk.Hooks):
+        """Register with the hooks of a client, recording a span per request attempt
+        and an event per retry.
+
+        Parameters
+        ----------
+        hooks : mhk.Hooks
+            Client hooks.
+        """
+        hooks.register(mhk.PRE_REQUEST, self.on_request)
+        hooks.register(mhk.POST_RESPONSE, self.on_response)
+        hooks.register(mhk.RETRY, self.on_retry)
+
+    def _requests(self) -> dict:
+        requests = getattr(self._local, "requests", None)
+        if requests is None:
+            requests = self._local.requests = dict()
+        return requests
+
+    def on_request(self, event: mhk.Event):
+        # Keyed on the start, which is shared by the events of an attempt
+        self._requests()[event.start] = Span(
+            f"{event.method} {event.endpoint}",
+            parent=_current.get(),
+            kind=KIND_CLIENT,
+            **{
+                "http.request.method": event.method,
+                "url.full": event.url,
+                "url.template": event.endpoint,
+                "http.request.resend_count": event.attempt or None,
+                "http.request.body.size": event.bytes_sent,
+            },
+        )
+
+    def on_response(self, event: mhk.Event):
+        span = self._requests().pop(event.start, None)
+        if span is None:
+            return
+
+        span.attributes["http.response.status_code"] = event.status
+        span.attributes["http.response.body.size"] = event.bytes_received
+        if event.bytes_sent is not None:
+            span.attributes["http.request.body.size"] = event.bytes_sent
+        if event.first_byte is not None:
+            span.attributes["meorg.first_byte"] = event.first_byte
+
+        if event.error is not None:
+            span.set_error(event.error)
+        elif event.status >= 400:
+            span.error = str(event.status)
+
+        self.end(span, span.start + int(event.duration * 1e9))
+
+    def on_retry(self, event: mhk.Event):
+        span = _current.get()
+        if isinstance(span, Span):
+            span.add_event(
+                "retry",
+                **{
+                    "http.request.resend_count": event.attempt,
+                    "http.response.status_code": event.status,
+                    "exception.type": type(event.error).__name__ if event.error else None,
+                    "meorg.backoff": event.backoff,
+                },
+            )
+
+
+def span(tracer: Tracer, name: str, **attributes):
+    """Record a span around a block, if tracing.
+
+    Parameters
+    ----------
+    tracer : Tracer
+        Tracer, or None.
+    name : str
+        Name of the operation.
+    **attributes :
+        Attributes of the span.
+
+    Returns
+    -------
+    contextmanager
+        Yielding the span (or None).
+    """
+    if tracer is None:
+        return contextlib.nullcontext()
+    return tracer.span(name, **attributes)
+
+
+def traced(method: callable) -> callable:
+    """Decorate a Client method to record a span for each call, with its scalar
+    arguments as attributes (except REDACTED).
+
+    Parameters
+    ----------
+    method : callable
+        Method of an object with a tracer attribute.
+
+    Returns
+    -------
+    callable
+        Decorated method.
+    """
+    signature = inspect.signature(method)
+    name = f"Client.{method.__name__}"
+
+    @functools.wraps(method)
+    def _traced(self, *args, **kwargs):
+        tracer = self.tracer
+        if tracer is None:
+            return method(self, *args, **kwargs)
+
+        arguments = signature.bind_partial(self, *args, **kwargs).arguments
+        attributes = {
+            f"meorg.{k}": v
+            for k, v in arguments.items()
+            if isinstance(v, (str, int, float)) and k not in REDACTED
+        }
+
+        with tracer.span(name, **attributes):
+            return method(self, *args, **kwargs)
+
+    return _traced
@@ -0,0 +1,297 @@
+"""Record and replay HTTP transcripts, to reproduce client behaviour offline."""
+
+import base64
+import gzip
+import json
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+from http import HTTPStatus
+from io import BytesIO
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+import meorg_client.constants as mcc
+import meorg_client.hooks as mhk
+
+# Headers and JSON keys whose values are never written to a transcript, covering
+# credentials and the identifiers of the user
+REDACTED_HEADERS = [
+    "authorization",
+    "cookie",
+    "set-cookie",
+    "x-auth-token",
+    "x-user-id",
+]
+REDACTED_KEYS = ["password", "authToken", "token", "email", "userId"]
+REDACTED = "REDACTED"
+
+# Response headers worth keeping for replay
+RESPONSE_HEADERS = ["content-type", "etag", "last-modified", "retry-after"]
+
+# Failures recorded in place of a response, raised again on replay
+ERRORS = {
+    e.__name__: e
+    for e in [
+        requests.ConnectTimeout,
+        requests.ReadTimeout,
+        requests.Timeout,
+        requests.ConnectionError,
+    ]
+}
+
+
+def _open(path: str, mode: str):
+    """Open a transcript, compressed if the path ends in .gz."""
+    if str(path).endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def redact(value):
+    """Redact secrets from a decoded JSON body.
+
+    Parameters
+    ----------
+    value : mixed
+        Decoded JSON.
+
+    Returns
+    -------
+    mixed
+        Copy with the values of REDACTED_KEYS replaced.
+    """
+    if isinstance(value, dict):
+        return {
+            k: REDACTED if k in REDACTED_KEYS else redact(v) for k, v in value.items()
+        }
+    if isinstance(value, list):
+        return [redact(v) for v in value]
+    return value
+
+
+def _redact_headers(headers: dict, keep: list = None) -> dict:
+    return {
+        k: REDACTED if k.lower() in REDACTED_HEADERS else v
+        for k, v in headers.items()
+        if keep is None or k.lower() in keep
+    }
+
+
+def _encode_content(content: bytes, content_type: str) -> dict:
+    """Encode a body for the transcript, redacting JSON."""
+    if "json" in (content_type or ""):
+        try:
+            content = json.dumps(redact(json.loads(content))).encode("utf-8")
+        except ValueError:
+            pass
+
+    try:
+        return dict(size=len(content), text=content.decode("utf-8"))
+    except UnicodeDecodeError:
+        text = base64.b64encode(content).decode()
+        return dict(size=len(content), text=text, encoding="base64")
+
+
+def _decode_content(content: dict) -> bytes:
+    if content.get("encoding") == "base64":
+        return base64.b64decode(content["text"])
+    return content.get("text", "").encode("utf-8")
+
+
+class Recorder(HTTPAdapter):
+    """Transport that records every request and response to a transcript.
+
+    The transcript is HAR-like JSON, one entry per line, with timings and sizes.
+    Request bodies are recorded by size only (JSON bodies in full, redacted) and
+    secrets in headers and JSON are redacted.
+
+    Parameters
+    ----------
+    path : str
+        File to append entries to, compressed if it ends in .gz.
+    **kwargs :
+        Arguments to requests.adapters.HTTPAdapter.
+    """
+
+    def __init__(self, path: str, **kwargs):
+        kwargs.setdefault("pool_connections", mcc.HTTP_POOL_SIZE)
+        kwargs.setdefault("pool_maxsize", mcc.HTTP_POOL_SIZE)
+        super().__init__(**kwargs)
+        self.path = path
+        self._lock = threading.Lock()
+        self._start = time.time()
+
+    def __reduce__(self):
+        # Connections and locks are local to the process
+        return type(self), (self.path,)
+
+    def send(self, request: requests.PreparedRequest, stream=False, **kwargs):
+        start = time.time()
+        t0 = time.perf_counter()
+
+        request_type = request.headers.get("Content-Type", "")
+        entry = dict(
+            started=round(start - self._start, 6),
+            method=request.method,
+            url=request.url,
+            request=dict(
+                headers=_redact_headers(dict(request.headers)),
+                size=mhk.get_body_size(request.body),
+            ),
+        )
+
+        body = request.body
+        if isinstance(body, (bytes, str)) and "json" in request_type:
+            body = body if isinstance(body, bytes) else body.encode("utf-8")
+            entry["request"]["content"] = _encode_content(body, request_type)
+
+        try:
+            response = super().send(request, stream=stream, **kwargs)
+
+            # Streamed bodies are left for the caller to read
+            content = None if stream else response.content
+
+        # Failures are replayed too
+        except requests.RequestException as ex:
+            errors = [n for n, e in ERRORS.items() if isinstance(ex, e)]
+            entry["error"] = errors[0] if errors else type(ex).__name__
+            entry["timings"] = dict(total=round(time.perf_counter() - t0, 6))
+            self._write(entry)
+            raise
+
+        entry["response"] = dict(
+            status=response.status_code,
+            headers=_redact_headers(dict(response.headers), RESPONSE_HEADERS),
+        )
+        if content is not None:
+            content_type = response.headers.get("Content-Type")
+            entry["response"]["content"] = _encode_content(content, content_type)
+
+        entry["timings"] = dict(
+            wait=round(response.elapsed.total_seconds(), 6),
+            total=round(time.perf_counter() - t0, 6),
+        )
+        self._write(entry)
+
+        return response
+
+    def _write(self, entry: dict):
+        line = json.dumps(entry, separators=(",", ":")) + "\n"
+        with self._lock:
+            with _open(self.path, "a") as f:
+                f.write(line)
+
+
+def load(path: str) -> list:
+    """Load the entries of a transcript.
+
+    Parameters
+    ----------
+    path : str
+        Transcript.
+
+    Returns
+    -------
+    list
+        Entries, in the order recorded.
+    """
+    with _open(path, "r") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class Replayer(BaseAdapter):
+    """Transport that serves the responses of a transcript, with their original
+    latencies (or scaled), so no network is needed.
+
+    Requests are matched on method and URL. Responses for the same request are
+    served in the order recorded, the last one repeatedly once they run out (i.e.
+    for polling). Request bodies are read (so uploads are hashed and reported as
+    they are when sent) and discarded.
+
+    Parameters
+    ----------
+    path : str
+        Transcript.
+    scale : float, optional
+        Multiplier of the recorded latencies, 0 for none, by default 1.
+
+    Raises
+    ------
+    requests.ConnectionError
+        When sending a request that is not in the transcript, or that failed when
+        recorded (as the same subclass, i.e. requests.ConnectTimeout).
+    requests.ReadTimeout
+        When the recorded latency exceeds the read timeout.
+    """
+
+    def __init__(self, path: str, scale: float = 1):
+        super().__init__()
+        self.path = path
+        self.scale = scale
+        self._lock = threading.Lock()
+        self.entries = defaultdict(list)
+        for entry in load(path):
+            self.entries[(entry["method"], entry["url"])].append(entry)
+        self.served = defaultdict(int)
+
+    def __reduce__(self):
+        return type(self), (self.path, self.scale)
+
+    def send(
+        self, request: requests.PreparedRequest, stream=False, timeout=None, **kwargs
+    ):
+        key = (request.method, request.url)
+        with self._lock:
+            entries = self.entries.get(key)
+            if not entries:
+                raise requests.ConnectionError(
+                    f"No recorded response for {request.method} {request.url}.",
+                    request=request,
+                )
+            entry = entries[min(self.served[key], len(entries) - 1)]
+            self.served[key] += 1
+
+        # Consume the body as the server would
+        start = time.perf_counter()
+        body = request.body
+        if hasattr(body, "read"):
+            while body.read(mcc.UPLOAD_CHUNK_SIZE):
+                pass
+
+        # Wait out the rest of the recorded latency
+        read_timeout = timeout[1] if isinstance(timeout, tuple) else timeout
+        latency = entry["timings"]["total"] * self.scale
+        if read_timeout is not None and latency > read_timeout:
+            time.sleep(read_timeout)
+            raise requests.ReadTimeout(
+                f"Read timed out ({read_timeout}s).", request=request
+            )
+        time.sleep(max(0, latency - (time.perf_counter() - start)))
+
+        if "error" in entry:
+            error = ERRORS.get(entry["error"], requests.ConnectionError)
+            raise error(f"Recorded {entry['error']}.", request=request)
+
+        return self._build_response(request, entry)
+
+    def _build_response(self, request: requests.PreparedRequest, entry: dict):
+        recorded = entry["response"]
+        response = requests.Response()
+        response.status_code = recorded["status"]
+        response.headers = CaseInsensitiveDict(recorded.get("headers", dict()))
+        response.raw = BytesIO(_decode_content(recorded.get("content", dict())))
+        response.url = request.url
+        response.request = request
+        try:
+            response.reason = HTTPStatus(response.status_code).phrase
+        except ValueError:
+            response.reason = None
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.elapsed = timedelta(seconds=entry["timings"]["wait"] * self.scale)
+        response.connection = self
+        return response
+
+    def close(self):
+        pass
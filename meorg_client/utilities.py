@@ -1,5 +1,7 @@
 """Utility methods."""
 
+import functools
+import hashlib as hl
 import pkgutil
 import json
 import yaml
@@ -105,13 +107,134 @@ def get_uploaded_file_ids(response):
     return file_ids
 
 
+def get_model_output_id(response: dict) -> str:
+    """Get the model output id out of a model output query response.
+
+    Parameters
+    ----------
+    response : dict
+        Response dictionary from a query call.
+
+    Returns
+    -------
+    str
+        Model output id, or None if not present.
+    """
+    model_output = (response.get("data") or dict()).get("modeloutput") or dict()
+    return model_output.get("id") if isinstance(model_output, dict) else None
+
+
+def batch_files(files: list, max_files: int, max_bytes: int) -> list:
+    """Group files into consecutive batches bounded by count and total size.
+
+    A file larger than max_bytes is placed in a batch on its own.
+
+    Parameters
+    ----------
+    files : list
+        List of filepaths.
+    max_files : int
+        Maximum number of files per batch.
+    max_bytes : int
+        Maximum total size of a batch in bytes.
+
+    Returns
+    -------
+    list
+        List of lists of filepaths.
+    """
+    batches = list()
+    batch, batch_bytes = list(), 0
+
+    for filepath in files:
+        size = os.path.getsize(filepath) if os.path.isfile(filepath) else 0
+
+        if batch and (len(batch) >= max_files or batch_bytes + size > max_bytes):
+            batches.append(batch)
+            batch, batch_bytes = list(), 0
+
+        batch.append(filepath)
+        batch_bytes += size
+
+    if batch:
+        batches.append(batch)
+
+    return batches
+
+
+def get_checksum_algorithm(key: str, value: str) -> str:
+    """Get the algorithm of a checksum in a file record.
+
+    Parameters
+    ----------
+    key : str
+        Key of the checksum, i.e. "sha256" or "checksum".
+    value : str
+        Checksum, optionally prefixed with its algorithm (i.e. "sha256:...").
+
+    Returns
+    -------
+    str
+        Algorithm (lower case) from the prefix, or the key when it names the
+        algorithm, otherwise None (unknown).
+    """
+    if not value or not isinstance(value, str):
+        return None
+
+    algorithm, _, _ = value.rpartition(":")
+    if algorithm:
+        return algorithm.lower()
+
+    return key.lower() if key.lower() in hl.algorithms_available else None
+
+
+def split_upload_response(response: dict, filenames: list) -> list:
+    """Split a multi-file upload response into one response per file.
+
+    File records are matched by name, falling back to their position.
+
+    Parameters
+    ----------
+    response : dict
+        Response dictionary from an upload call.
+    filenames : list
+        Names of the files, in the order they were sent.
+
+    Returns
+    -------
+    list
+        List of response dictionaries, each with a single file record.
+    """
+    records = list(response.get("data", dict()).get("files") or list())
+    unused = list(range(len(records)))
+
+    responses = list()
+    for i, filename in enumerate(filenames):
+        match = next((j for j in unused if records[j].get("name") == filename), None)
+        if match is None and i in unused:
+            match = i
+
+        files = list()
+        if match is not None:
+            unused.remove(match)
+            files.append(records[match])
+
+        data = {**response.get("data", dict()), "files": files}
+        responses.append({**response, "data": data})
+
+    return responses
+
+
 def is_dev_mode():
     return os.getenv("MEORG_DEV_MODE", "0") == "1"
 
 
+@functools.lru_cache(maxsize=None)
 def get_user_agent() -> str:
     """Return the client's user agent to send along with the request.
 
+    Computed once, as the version may come from git (in a checkout).
+
     Returns
     -------
     str
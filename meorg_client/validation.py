@@ -0,0 +1,407 @@
+"""Pre-flight validation of NetCDF files prior to upload.
+
+Only the file header is read: the NetCDF classic (CDF-1, CDF-2 and CDF-5) header is
+parsed directly, while NetCDF-4 (HDF5) files have their superblock checked for
+truncation and their metadata read with the optional netCDF4 package when variables
+are required.
+"""
+
+import os
+import struct
+from functools import partial
+from pathlib import Path
+from typing import Union
+import meorg_client.exceptions as mx
+import meorg_client.parallel as meop
+import meorg_client.preprocessing as mpp
+
+# Magic bytes
+CDF_MAGIC = b"CDF"
+HDF5_MAGIC = b"\x89HDF\r\n\x1a\n"
+
+# Classic format tags and type sizes (in bytes)
+_NC_DIMENSION = 0x0A
+_NC_VARIABLE = 0x0B
+_NC_ATTRIBUTE = 0x0C
+_NC_CHAR = 2
+_NC_TYPE_SIZES = {1: 1, 2: 1, 3: 2, 4: 4, 5: 4, 6: 8, 7: 1, 8: 2, 9: 4, 10: 8, 11: 8}
+
+# Streaming files do not record the number of records
+_NC_STREAMING = 0xFFFFFFFF
+
+# Amount of the file to read up front, most headers fit in here
+_HEADER_READ_SIZE = 64 * 1024
+
+# Number of threads to validate with
+DEFAULT_THREADS = 8
+
+
+class _HeaderReader:
+    """Sequential big-endian reader over the start of a file, fetching more as needed."""
+
+    def __init__(self, file_obj, version: int):
+        self.file_obj = file_obj
+        self.buffer = file_obj.read(_HEADER_READ_SIZE)
+        self.offset = 0
+        self.size_fmt = ">Q" if version == 5 else ">I"
+        self.size_len = 8 if version == 5 else 4
+
+    def read(self, n: int) -> bytes:
+        while self.offset + n > len(self.buffer):
+            chunk = self.file_obj.read(max(n, _HEADER_READ_SIZE))
+            if not chunk:
+                raise EOFError("Header is truncated.")
+            self.buffer += chunk
+        data = self.buffer[self.offset : self.offset + n]
+        self.offset += n
+        return data
+
+    def int32(self) -> int:
+        return struct.unpack(">I", self.read(4))[0]
+
+    def size(self) -> int:
+        return struct.unpack(self.size_fmt, self.read(self.size_len))[0]
+
+    def name(self) -> str:
+        n = self.size()
+        return self.read(_pad4(n))[:n].decode("utf-8", "replace")
+
+
+def _pad4(n: int) -> int:
+    """Round n up to a multiple of 4."""
+    return (n + 3) & ~3
+
+
+def _read_attributes(reader: _HeaderReader) -> dict:
+    """Read an attribute list, decoding only text attributes.
+
+    Parameters
+    ----------
+    reader : _HeaderReader
+        Reader positioned at the start of the list.
+
+    Returns
+    -------
+    dict
+        Attribute names mapped to values (None for non-text attributes).
+    """
+    tag, nelems = reader.int32(), reader.size()
+    if tag not in (0, _NC_ATTRIBUTE):
+        raise ValueError(f"Invalid attribute list tag {tag}.")
+
+    attrs = dict()
+    for _ in range(nelems):
+        name = reader.name()
+        nc_type = reader.int32()
+        if nc_type not in _NC_TYPE_SIZES:
+            raise ValueError(f"Invalid type {nc_type} for attribute {name}.")
+        n = reader.size()
+        raw = reader.read(_pad4(n * _NC_TYPE_SIZES[nc_type]))
+        attrs[name] = raw[:n].decode("utf-8", "replace") if nc_type == _NC_CHAR else None
+    return attrs
+
+
+def read_classic_header(file_obj) -> dict:
+    """Read the header of a NetCDF classic file.
+
+    Parameters
+    ----------
+    file_obj : file-like
+        Binary file object positioned at the start of the file.
+
+    Returns
+    -------
+    dict
+        Header with version, numrecs, dimensions, variables and expected_size.
+
+    Raises
+    ------
+    ValueError
+        When the header is malformed.
+    EOFError
+        When the header is truncated.
+    """
+    magic = file_obj.read(4)
+    if magic[:3] != CDF_MAGIC or magic[3] not in (1, 2, 5):
+        raise ValueError("Not a NetCDF classic file.")
+
+    version = magic[3]
+    reader = _HeaderReader(file_obj, version)
+    numrecs = reader.size()
+
+    # Dimensions
+    tag, nelems = reader.int32(), reader.size()
+    if tag not in (0, _NC_DIMENSION):
+        raise ValueError(f"Invalid dimension list tag {tag}.")
+
+    dimensions = list()
+    for _ in range(nelems):
+        dimensions.append((reader.name(), reader.size()))
+
+    _ = _read_attributes(reader)
+
+    # Variables
+    tag, nelems = reader.int32(), reader.size()
+    if tag not in (0, _NC_VARIABLE):
+        raise ValueError(f"Invalid variable list tag {tag}.")
+
+    variables = dict()
+    for _ in range(nelems):
+        name = reader.name()
+        dimids = [reader.size() for _ in range(reader.size())]
+        attrs = _read_attributes(reader)
+        nc_type = reader.int32()
+        _ = reader.size()
+        begin = reader.int32() if version == 1 else struct.unpack(">Q", reader.read(8))[0]
+
+        if nc_type not in _NC_TYPE_SIZES:
+            raise ValueError(f"Invalid type {nc_type} for variable {name}.")
+
+        bad = [i for i in dimids if i >= len(dimensions)]
+        if bad:
+            raise ValueError(f"Variable {name} refers to undefined dimensions {bad}.")
+
+        variables[name] = dict(
+            dimensions=[dimensions[i][0] for i in dimids],
+            is_record=bool(dimids) and dimensions[dimids[0]][1] == 0,
+            shape=[dimensions[i][1] for i in dimids],
+            nc_type=nc_type,
+            begin=begin,
+            units=attrs.get("units"),
+        )
+
+    header = dict(
+        version=version,
+        numrecs=numrecs,
+        dimensions=dict(dimensions),
+        variables=variables,
+    )
+    header["expected_size"] = _expected_classic_size(header)
+    return header
+
+
+def _expected_classic_size(header: dict) -> int:
+    """Calculate the minimum size of a classic file from its header.
+
+    Parameters
+    ----------
+    header : dict
+        Header from read_classic_header.
+
+    Returns
+    -------
+    int
+        Minimum number of bytes in the file, or None when unknown (streaming).
+    """
+    numrecs = header["numrecs"]
+    if numrecs == _NC_STREAMING:
+        return None
+
+    def _nbytes(var):
+        # Size of the variable (per record, for record variables)
+        shape = var["shape"][1:] if var["is_record"] else var["shape"]
+        n = _NC_TYPE_SIZES[var["nc_type"]]
+        for dim_len in shape:
+            n *= dim_len
+        return n
+
+    expected = 0
+    record_vars = [v for v in header["variables"].values() if v["is_record"]]
+
+    for var in header["variables"].values():
+        if not var["is_record"]:
+            expected = max(expected, var["begin"] + _nbytes(var))
+
+    if record_vars and numrecs > 0:
+        # A single record variable is not padded
+        if len(record_vars) == 1:
+            recsize = _nbytes(record_vars[0])
+        else:
+            recsize = sum(_pad4(_nbytes(v)) for v in record_vars)
+
+        for var in record_vars:
+            end = var["begin"] + (numrecs - 1) * recsize + _nbytes(var)
+            expected = max(expected, end)
+
+    return expected
+
+
+def _hdf5_end_of_file(file_obj) -> int:
+    """Read the end-of-file address out of an HDF5 superblock.
+
+    Parameters
+    ----------
+    file_obj : file-like
+        Binary file object positioned at the start of the file.
+
+    Returns
+    -------
+    int
+        Minimum number of bytes in the file.
+
+    Raises
+    ------
+    ValueError
+        When the superblock is malformed.
+    """
+    header = file_obj.read(128)
+    if header[:8] != HDF5_MAGIC:
+        raise ValueError("Not an HDF5 file.")
+
+    version = header[8]
+    if version in (0, 1):
+        sizeof_offsets = header[13]
+        base = 24 if version == 0 else 28
+    elif version in (2, 3):
+        sizeof_offsets = header[9]
+        base = 12
+    else:
+        raise ValueError(f"Unsupported HDF5 superblock version {version}.")
+
+    fmt = {2: "<H", 4: "<I", 8: "<Q"}.get(sizeof_offsets)
+    if fmt is None:
+        raise ValueError(f"Invalid HDF5 offset size {sizeof_offsets}.")
+
+    def _address(i):
+        start = base + i * sizeof_offsets
+        return struct.unpack(fmt, header[start : start + sizeof_offsets])[0]
+
+    # Base address, (free-space or extension address), end-of-file address
+    return _address(0) + _address(2)
+
+
+def _read_hdf5_variables(filepath) -> dict:
+    """Read variable metadata from a NetCDF-4 file with netCDF4 (no data is read).
+
+    Parameters
+    ----------
+    filepath : path-like
+        Path to the file.
+
+    Returns
+    -------
+    dict
+        Variable names mapped to dicts of dimensions, shape and units.
+    """
+    netCDF4 = mpp._import_netcdf4()
+
+    with netCDF4.Dataset(filepath, "r") as ds:
+        return {
+            name: dict(
+                dimensions=list(var.dimensions),
+                shape=list(var.shape),
+                units=getattr(var, "units", None),
+            )
+            for name, var in ds.variables.items()
+        }
+
+
+def validate_file(
+    filepath: Union[str, Path], required_variables: Union[list, dict] = None
+) -> list:
+    """Validate the header of a single NetCDF file.
+
+    Parameters
+    ----------
+    filepath : Union[str, Path]
+        Path to the file.
+    required_variables : Union[list, dict], optional
+        Variable names that must exist, or a dict of names to required units,
+        by default None.
+
+    Returns
+    -------
+    list
+        Problems found, empty if the file is valid.
+    """
+    if isinstance(required_variables, (list, tuple)):
+        required_variables = dict.fromkeys(required_variables)
+    required_variables = required_variables or dict()
+
+    try:
+        file_size = os.path.getsize(filepath)
+        with open(filepath, "rb") as file_obj:
+            magic = file_obj.read(8)
+            file_obj.seek(0)
+
+            if magic[:3] == CDF_MAGIC:
+                header = read_classic_header(file_obj)
+                expected_size = header["expected_size"]
+                variables = header["variables"] if required_variables else dict()
+
+            elif magic == HDF5_MAGIC:
+                expected_size = _hdf5_end_of_file(file_obj)
+                variables = None
+
+            else:
+                return [f"Unrecognised file signature {magic[:4]!r}."]
+
+        if expected_size is not None and file_size < expected_size:
+            return [f"File is truncated ({file_size} of {expected_size} bytes)."]
+
+        # NetCDF-4 metadata is only read when it is actually needed
+        if variables is None and required_variables:
+            variables = _read_hdf5_variables(filepath)
+
+    except (ValueError, EOFError, OSError) as ex:
+        return [str(ex)]
+
+    problems = list()
+    for name, units in required_variables.items():
+        variable = variables.get(name)
+        if variable is None:
+            problems.append(f"Required variable {name} is missing.")
+            continue
+
+        # The record dimension of a classic file is always 0 in the header
+        dims = list(zip(variable["dimensions"], variable["shape"]))
+        dims = dims[1:] if variable.get("is_record") else dims
+        empty = [d for d, n in dims if n == 0]
+        if empty:
+            problems.append(f"Variable {name} has empty dimensions {empty}.")
+
+        if units is not None and variable["units"] != units:
+            problems.append(
+                f"Variable {name} has units {variable['units']}, expected {units}."
+            )
+
+    return problems
+
+
+def _validate_file(filepath, required_variables=None) -> list:
+    """Parallelisable wrapper for validate_file, returning [(filepath, problems)]."""
+    return [(filepath, validate_file(filepath, required_variables))]
+
+
+def validate_files(
+    files: list, required_variables: Union[list, dict] = None, n: int = DEFAULT_THREADS
+):
+    """Validate the headers of NetCDF files in parallel, ignoring other files.
+
+    Parameters
+    ----------
+    files : list
+        List of filepaths.
+    required_variables : Union[list, dict], optional
+        Variable names that must exist, or a dict of names to required units,
+        by default None.
+    n : int, optional
+        Number of threads, by default DEFAULT_THREADS.
+
+    Raises
+    ------
+    mx.FileValidationException
+        When any file fails validation.
+    """
+    files = [f for f in files if mpp.is_netcdf(f)]
+    if not files:
+        return
+
+    func = partial(_validate_file, required_variables=required_variables)
+    results = meop.parallelise(
+        func, min(n, len(files)), progress=False, threads=True, filepath=files
+    )
+
+    errors = {str(filepath): problems for filepath, problems in results if problems}
+    if errors:
+        raise mx.FileValidationException(errors)